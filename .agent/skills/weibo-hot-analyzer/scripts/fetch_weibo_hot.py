@@ -4,16 +4,33 @@
 Weibo Hot Search Data Fetcher
 
 使用微博官方 API 获取实时热搜 Top 50 数据
+所有数据源都失败时返回失败；设置 WEIBO_MOCK_FALLBACK=true 才改用模拟数据（仍标记为失败）
+
+用法:
+    python fetch_weibo_hot.py            # 获取并打印 Top 10
+    python fetch_weibo_hot.py --json     # 同时输出 JSON
+    python fetch_weibo_hot.py --health   # 查看各数据源的健康记录和熔断状态
 """
 
+import hashlib
 import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
+from pathlib import Path
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 from urllib.parse import quote
 
+from hot_items import HotSnapshot, json_default, normalize_title
+from http_pool import KeepAlivePool
+from keyword_automaton import CategoryMatcher, merge_keyword_file
+from source_adapters import SourceAdapter, merge_ranked
+from source_health import SourceHealth
+
 # 支持环境变量覆盖默认值
 WEIBO_API_KEY = os.environ.get("WEIBO_API_KEY", "84312028a068cdebe51762a507a935cc")
 WEIBO_HOT_SEARCH_URL = os.environ.get(
@@ -21,183 +38,497 @@ WEIBO_HOT_SEARCH_URL = os.environ.get(
     "https://weibo.com/ajax/side/hotSearch"
 )
 BACKUP_API_URL = os.environ.get("BACKUP_API_URL", "https://tenapi.cn/v2/weibohot")
+FETCH_TIMEOUT = float(os.environ.get("WEIBO_FETCH_TIMEOUT", "10"))
+# 对冲延迟（秒）：留空为顺序回退，0 为主备并行，>0 为主 API 超过该时间未返回才启动备用 API
+HEDGE_DELAY = os.environ.get("WEIBO_HEDGE_DELAY", "")
+# 联合模式：并发请求全部数据源并按标题合并；WEIBO_FEDERATION_WAIT_FOR 为必须等待的数据源（逗号分隔，
+# 默认全部），其余数据源在这些数据源返回时还没完成就不再等待
+FEDERATE = os.environ.get("WEIBO_FEDERATE", "false").lower() == "true"
+FEDERATION_WAIT_FOR = os.environ.get("WEIBO_FEDERATION_WAIT_FOR", "")
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# 单个数据源失败时会被捕获的异常（超时属于 OSError，JSON 错误属于 ValueError）
+FETCH_ERRORS = (URLError, HTTPError, OSError, ValueError)
+# 条件请求状态（ETag / Last-Modified 及上次解析结果），留空则不发送条件请求
+FETCH_STATE_FILE = os.environ.get("WEIBO_FETCH_STATE", ".cache/fetch-state.json")
+# 指纹覆盖的热搜条数
+FINGERPRINT_TOP_N = int(os.environ.get("WEIBO_FINGERPRINT_TOP_N", "10"))
+# 各数据源的健康记录和熔断状态，留空则只保存在内存中
+SOURCE_HEALTH_FILE = os.environ.get("WEIBO_SOURCE_HEALTH", ".cache/source-health.json")
+# 所有数据源都失败时是否改用模拟数据（仅用于本地调试，结果仍标记为失败）
+MOCK_FALLBACK = os.environ.get("WEIBO_MOCK_FALLBACK", "false").lower() == "true"
+
+
+# 分类关键词：(分类, 关键词, 是否忽略大小写)，按列表顺序决定优先级
+CATEGORY_KEYWORDS = [
+    ("娱乐", [
+        "明星", "演员", "歌手", "导演", "电影", "电视剧", "综艺", "演唱会",
+        "粉丝", "官宣", "恋情", "结婚", "离婚", "出轨", "绯闻", "代言",
+        "新歌", "专辑", "MV", "颁奖", "红毯", "造型", "直播", "带货"
+    ], False),
+    ("社会", [
+        "政策", "法律", "法规", "通报", "公告", "事故", "地震", "台风",
+        "疫情", "确诊", "核酸", "接种", "医院", "学校", "高考", "考研",
+        "房价", "物价", "工资", "就业", "失业", "养老", "退休"
+    ], False),
+    ("科技", [
+        "AI", "人工智能", "芯片", "手机", "电脑", "互联网", "5G", "6G",
+        "苹果", "华为", "小米", "特斯拉", "新能源", "电动车", "机器人",
+        "元宇宙", "VR", "AR", "区块链", "加密货币", "比特币"
+    ], True),
+    ("体育", [
+        "世界杯", "奥运", "冠军", "金牌", "决赛", "半决赛", "联赛",
+        "足球", "篮球", "乒乓球", "羽毛球", "游泳", "田径", "体操",
+        "NBA", "CBA", "英超", "西甲", "中超"
+    ], True),
+    ("财经", [
+        "股市", "A股", "港股", "美股", "基金", "理财", "银行", "利率",
+        "汇率", "通胀", "GDP", "经济", "投资", "融资", "上市", "IPO"
+    ], True),
+]
+# 额外关键词词典（JSON），与内置关键词合并后编译
+CATEGORY_KEYWORDS_FILE = os.environ.get("WEIBO_CATEGORY_KEYWORDS", "")
+
+
+class FetchCancelled(Exception):
+    """对冲请求中落败的一路被取消"""
+
+
+# 长连接池，默认关闭（单次运行使用 urlopen），由 enable_keepalive() 启用
+_KEEPALIVE_POOL = None
+
+# 各数据源的条件请求状态：{name: {"etag", "last_modified", "data"}}，首次使用时从 FETCH_STATE_FILE 加载
+_CONDITIONAL_STATE = None
+_CONDITIONAL_LOCK = threading.Lock()
+
+# 数据源健康记录，首次使用时从 SOURCE_HEALTH_FILE 加载
+_SOURCE_HEALTH = None
+
+# 导入时编译一次分类自动机
+_CATEGORY_MATCHER = CategoryMatcher(
+    merge_keyword_file(CATEGORY_KEYWORDS, CATEGORY_KEYWORDS_FILE) if CATEGORY_KEYWORDS_FILE else CATEGORY_KEYWORDS
+)
+
+
+def _build_headers() -> dict:
+    """构造主 API 请求头（Cookie 中带 WEIBO_API_KEY）"""
+    return {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        "Referer": "https://weibo.com/",
+        "Cookie": f"SUB={quote(WEIBO_API_KEY, safe='')}"
+    }
+
+
+def enable_keepalive():
+    """启用长连接池（守护进程模式），之后的请求复用 TCP/TLS 连接"""
+    global _KEEPALIVE_POOL
+    if _KEEPALIVE_POOL is None:
+        _KEEPALIVE_POOL = KeepAlivePool(FETCH_TIMEOUT)
+    return _KEEPALIVE_POOL
+
+
+def _request(url: str, headers: dict, cancel_event: threading.Event = None) -> tuple:
+    """
+    发起 GET 请求；对冲模式下如果已被取消则不再读取响应体
+
+    Returns:
+        tuple: (status, headers, body)，304 时 body 为空
+    """
+    if _KEEPALIVE_POOL is not None:
+        status, response_headers, body = _KEEPALIVE_POOL.get(url, headers, cancel_event)
+        if status is None:
+            raise FetchCancelled(url)
+        return status, response_headers, body
+
+    req = Request(url, headers=headers)
+    try:
+        with urlopen(req, timeout=FETCH_TIMEOUT) as response:
+            if cancel_event is not None and cancel_event.is_set():
+                raise FetchCancelled(url)
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        if e.code == 304:
+            return 304, e.headers, b""
+        raise
+
+
+def source_health() -> SourceHealth:
+    global _SOURCE_HEALTH
+    if _SOURCE_HEALTH is None:
+        _SOURCE_HEALTH = SourceHealth(SOURCE_HEALTH_FILE or None)
+    return _SOURCE_HEALTH
+
+
+def _conditional_state() -> dict:
+    global _CONDITIONAL_STATE
+    with _CONDITIONAL_LOCK:
+        if _CONDITIONAL_STATE is None:
+            _CONDITIONAL_STATE = {}
+            if FETCH_STATE_FILE:
+                try:
+                    _CONDITIONAL_STATE = json.loads(Path(FETCH_STATE_FILE).read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    pass
+        return _CONDITIONAL_STATE
+
+
+def _save_conditional_state():
+    """把条件请求状态原子写回 FETCH_STATE_FILE"""
+    if not FETCH_STATE_FILE:
+        return
+    path = Path(FETCH_STATE_FILE)
+    with _CONDITIONAL_LOCK:
+        content = json.dumps(_CONDITIONAL_STATE or {}, ensure_ascii=False, default=json_default)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ 条件请求状态保存失败: {e}")
+
+
+def _conditional_fetch(name: str, url: str, headers: dict, parse, cancel_event: threading.Event = None) -> tuple:
+    """
+    带 If-None-Match / If-Modified-Since 的请求：数据源返回 304 时复用上次解析结果
+
+    Args:
+        parse: 把原始响应字节解析为 HotSnapshot
+
+    Returns:
+        tuple: (HotSnapshot, 是否为 304 未修改, 响应体字节数)
+    """
+    state = _conditional_state()
+    previous = state.get(name) if FETCH_STATE_FILE else None
+    if previous and previous.get("data"):
+        headers = dict(headers)
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+    status, response_headers, body = _request(url, headers, cancel_event)
+    if status == 304:
+        if not previous or not previous.get("data"):
+            raise ValueError("数据源返回 304，但本地没有上次的数据")
+        return HotSnapshot.from_items(previous["data"]), True, 0
+
+    items = parse(body)
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if FETCH_STATE_FILE:
+        with _CONDITIONAL_LOCK:
+            if etag or last_modified:
+                state[name] = {"etag": etag, "last_modified": last_modified, "data": items}
+            else:
+                state.pop(name, None)
+    return items, False, len(body)
+
+
+def _primary_entries(data: dict) -> list:
+    """微博官方 API：data.realtime[]，字段 word / num / label_name / is_hot ..."""
+    if data.get("ok") != 1 or "data" not in data:
+        raise ValueError("主 API 返回无效数据")
+    return data["data"].get("realtime", [])
+
+
+def _backup_entries(data: dict) -> list:
+    """备用 API：data[]，字段 name / hot / url"""
+    if data.get("code") != 200 or "data" not in data:
+        raise ValueError("备用 API 返回无效数据")
+    return data["data"]
+
+
+# 已注册的数据源，顺序即优先级：顺序回退和对冲按此顺序请求，联合模式合并时字段取靠前的数据源
+SOURCES = {}
+
+
+def register_source(adapter: SourceAdapter) -> SourceAdapter:
+    """注册（或替换同名的）数据源"""
+    SOURCES[adapter.name] = adapter
+    return adapter
+
+
+register_source(SourceAdapter(
+    "primary", WEIBO_HOT_SEARCH_URL, _primary_entries,
+    {"title": ("word", "note"), "hot_value": ("num", "raw_hot"), "label": ("label_name",),
+     "is_hot": ("is_hot",), "is_new": ("is_new",), "is_fei": ("is_fei",)},
+    headers=_build_headers,
+))
+register_source(SourceAdapter(
+    "backup", BACKUP_API_URL, _backup_entries,
+    {"title": ("name", "word"), "hot_value": ("hot", "num"), "url": ("url",)},
+    headers=lambda: {"User-Agent": USER_AGENT},
+))
+
+
+def _fetch_source(name: str, cancel_event: threading.Event = None) -> tuple:
+    """按数据源名称请求并解析，返回 (热搜列表, 是否未修改, 字节数)；失败时抛出 FETCH_ERRORS 中的异常"""
+    adapter = SOURCES[name]
+
+    def parse(body):
+        snapshot = adapter.decode(body)
+        snapshot.categories = categorize_topics(snapshot.titles)
+        return snapshot
+
+    return _conditional_fetch(name, adapter.url, adapter.headers(), parse, cancel_event)
+
+
+def _timed_fetch(name: str, timings: dict, cancel_event: threading.Event = None) -> list:
+    """执行一次数据源请求，并把耗时、响应字节数和结果状态（ok / not_modified / error）记录到 timings"""
+    start = time.perf_counter()
+    try:
+        data, not_modified, size = _fetch_source(name, cancel_event)
+    except FETCH_ERRORS as e:
+        timings[name] = {"status": "error", "elapsed": round(time.perf_counter() - start, 3), "error": str(e)}
+        raise
+    status = "not_modified" if not_modified else "ok"
+    timings[name] = {"status": status, "elapsed": round(time.perf_counter() - start, 3), "bytes": size}
+    return data
+
+
+def _fetch_sequential(timings: dict, sources: list):
+    """顺序回退：前一个数据源失败后才请求下一个"""
+    last_error = None
+    for name in sources:
+        try:
+            return name, _timed_fetch(name, timings)
+        except FETCH_ERRORS as e:
+            last_error = e
+    return None, last_error
+
+
+def _fetch_hedged(timings: dict, hedge_delay: float, sources: list):
+    """
+    对冲请求：先发第一个数据源，hedge_delay 秒内未成功则并发请求其余数据源，
+    取最先返回的有效结果，并取消另一路请求（hedge_delay=0 即完全并行）
+
+    取消是尽力而为的：启用长连接池时直接关闭落败一路的 socket，其线程随即结束；
+    未启用时 urlopen 无法中断，落败的线程在响应到达或 FETCH_TIMEOUT 超时后才结束，只是不再读取响应体。
+    """
+    cancel_event = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="weibo-fetch")
+    started = {}
+    pending = {}
+
+    def launch(name):
+        started[name] = time.perf_counter()
+        pending[pool.submit(_timed_fetch, name, timings, cancel_event)] = name
+
+    winner, data, last_error = None, None, None
+    try:
+        launch(sources[0])
+        done, _ = wait(pending, timeout=hedge_delay)
+        for future in done:
+            if future.exception() is None:
+                winner, data = pending.pop(future), future.result()
+            else:
+                last_error = future.exception()
+                pending.pop(future)
+
+        if winner is None:
+            for name in sources[1:]:
+                launch(name)
+            # 取第一个成功的结果，失败的继续等待其他来源
+            for future in as_completed(list(pending)):
+                name = pending.pop(future)
+                if future.exception() is None:
+                    winner, data = name, future.result()
+                    break
+                last_error = future.exception()
+    finally:
+        cancel_event.set()
+        if _KEEPALIVE_POOL is not None:
+            _KEEPALIVE_POOL.abort(cancel_event)
+        now = time.perf_counter()
+        for name in pending.values():
+            timings[name] = {"status": "cancelled", "elapsed": round(now - started[name], 3)}
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if winner is None:
+        return None, last_error
+    return winner, data
+
 
+def _fetch_federated(timings: dict, sources: list, wait_for: set):
+    """
+    联合模式：通过共享的长连接池并发请求全部数据源，按归一化标题合并
+
+    等到 wait_for 中的数据源都返回（wait_for 为空时等待全部），其余已返回的一并合并，未返回的取消；
+    等待的数据源全部失败时继续等待其余数据源。总耗时由最慢的必须等待的数据源决定。
+
+    Returns:
+        tuple: (参与合并的数据源列表, 合并后的热搜列表)，全部失败时为 (None, 最后一个异常)
+    """
+    enable_keepalive()
+    cancel_event = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="weibo-fetch")
+    started = time.perf_counter()
+    futures = {pool.submit(_timed_fetch, name, timings, cancel_event): name for name in sources}
+    required = [future for future, name in futures.items() if name in wait_for] or list(futures)
+    try:
+        wait(required)
+        if all(future.exception() is not None for future in required):
+            wait(futures)
+    finally:
+        cancel_event.set()
+        _KEEPALIVE_POOL.abort(cancel_event)
+        now = time.perf_counter()
+        for future, name in futures.items():
+            if not future.done():
+                timings[name] = {"status": "cancelled", "elapsed": round(now - started, 3)}
+        pool.shutdown(wait=False, cancel_futures=True)
 
-def fetch_weibo_hot_search():
+    lists, last_error = {}, None
+    for future, name in futures.items():  # 按注册顺序，即合并时的优先级
+        if not future.done():
+            continue
+        if future.exception() is None:
+            lists[name] = future.result()
+        else:
+            last_error = future.exception()
+    if not lists:
+        return None, last_error
+    return list(lists), merge_ranked(lists, normalize_title)
+
+
+def fetch_weibo_hot_search(hedge_delay: float = None, allow_mock: bool = None, federate: bool = None):
     """
     获取微博热搜数据
-    
+
+    Args:
+        hedge_delay: 对冲延迟（秒）。None 时读取 WEIBO_HEDGE_DELAY 环境变量，
+            仍未设置则使用顺序回退；0 表示主备并行请求
+        federate: 联合模式，并发请求全部数据源并按标题合并（忽略 hedge_delay）。None 时读取 WEIBO_FEDERATE
+        allow_mock: 所有数据源都失败时返回模拟数据。None 时读取 WEIBO_MOCK_FALLBACK 环境变量；
+            模拟数据的 success 始终为 False，source 为 mock
+
+    熔断中的数据源（见 source_health.py）直接跳过，不再等待超时。
+
     Returns:
         dict: 包含热搜数据的字典，格式：
         {
             "success": bool,
             "fetch_time": str,
-            "data": [
+            "source": str,  # 实际采用的数据源 primary / backup，联合模式为 primary+backup，模拟数据为 mock
+            "not_modified": bool,  # 数据源返回 304，data 为上次的结果
+            "timings": {    # 每个数据源的耗时，用于调优对冲延迟
+                "primary": {"status": "ok" / "not_modified" / "error" / "cancelled" / "skipped", "elapsed": float,
+                            "bytes": int},  # bytes 仅成功时有，skipped 为熔断跳过
+                ...
+            },
+            "health": {     # 每个数据源的健康状况，见 SourceHealth.summary
+                "primary": {"state": "closed" / "open" / "half_open", "error_rate": float, ...},
+                ...
+            },
+            "data": HotSnapshot(  # 按列保存，遍历得到 HotItem，可按字段名读取；json_default 可转为 dict 列表
                 {
                     "rank": int,
                     "title": str,
                     "hot_value": int,
                     "category": str,
                     "url": str,
-                    "label": str  # 新/热/沸 等标签
+                    "label": str,  # 新/热/沸 等标签
+                    "sources": {"primary": int, ...}  # 仅联合模式：出现在哪些数据源及其排名
                 },
                 ...
-            ],
+            ),
             "error": str (如果失败)
         }
     """
     result = {
         "success": False,
         "fetch_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "source": None,
+        "not_modified": False,
+        "timings": {},
+        "health": {},
         "data": [],
         "error": None
     }
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        "Referer": "https://weibo.com/",
-        "Cookie": f"SUB={quote(WEIBO_API_KEY, safe='')}"
-    }
-    
-    try:
-        # 尝试官方 API
-        req = Request(WEIBO_HOT_SEARCH_URL, headers=headers)
-        with urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            
-            if data.get("ok") == 1 and "data" in data:
-                realtime = data["data"].get("realtime", [])
-                
-                for idx, item in enumerate(realtime[:50], 1):
-                    hot_item = {
-                        "rank": idx,
-                        "title": item.get("word", item.get("note", "")),
-                        "hot_value": item.get("num", item.get("raw_hot", 0)),
-                        "category": categorize_topic(item.get("word", "")),
-                        "url": f"https://s.weibo.com/weibo?q=%23{item.get('word', '')}%23",
-                        "label": item.get("label_name", ""),
-                        "is_hot": item.get("is_hot", 0) == 1,
-                        "is_new": item.get("is_new", 0) == 1,
-                        "is_fei": item.get("is_fei", 0) == 1
-                    }
-                    result["data"].append(hot_item)
-                
-                result["success"] = True
-                return result
-    
-    except (URLError, HTTPError, json.JSONDecodeError) as e:
-        # 主 API 失败，尝试备用 API
-        pass
-    
-    # 尝试备用 API
-    try:
-        req = Request(BACKUP_API_URL, headers={"User-Agent": headers["User-Agent"]})
-        with urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            
-            if data.get("code") == 200 and "data" in data:
-                for idx, item in enumerate(data["data"][:50], 1):
-                    hot_item = {
-                        "rank": idx,
-                        "title": item.get("name", item.get("word", "")),
-                        "hot_value": item.get("hot", item.get("num", 0)),
-                        "category": categorize_topic(item.get("name", item.get("word", ""))),
-                        "url": item.get("url", f"https://s.weibo.com/weibo?q=%23{item.get('name', '')}%23"),
-                        "label": "",
-                        "is_hot": False,
-                        "is_new": False,
-                        "is_fei": False
-                    }
-                    result["data"].append(hot_item)
-                
-                result["success"] = True
-                return result
-    
-    except (URLError, HTTPError, json.JSONDecodeError) as e:
-        result["error"] = f"API 请求失败: {str(e)}"
-    
-    # 如果都失败，返回模拟数据用于测试
-    if not result["data"]:
-        result["data"] = generate_mock_data()
+
+    if hedge_delay is None and HEDGE_DELAY != "":
+        hedge_delay = float(HEDGE_DELAY)
+    if allow_mock is None:
+        allow_mock = MOCK_FALLBACK
+    if federate is None:
+        federate = FEDERATE
+
+    health = source_health()
+    sources, skipped = health.available(list(SOURCES))
+    timings = {name: {"status": "skipped", "elapsed": 0.0} for name in skipped}
+    if federate and len(sources) > 1:
+        wait_for = {name.strip() for name in FEDERATION_WAIT_FOR.split(",") if name.strip()}
+        merged, outcome = _fetch_federated(timings, sources, wait_for)
+        source = "+".join(merged) if merged else None
+    elif hedge_delay is None or len(sources) == 1:
+        source, outcome = _fetch_sequential(timings, sources)
+    else:
+        source, outcome = _fetch_hedged(timings, max(hedge_delay, 0.0), sources)
+    # 对冲模式下被取消的请求线程仍可能写入，这里取一份快照
+    result["timings"] = dict(timings)
+
+    # 被取消和跳过的请求不影响健康记录
+    for name, timing in result["timings"].items():
+        if timing["status"] in ("ok", "not_modified"):
+            health.record_success(name, timing["elapsed"])
+        elif timing["status"] == "error":
+            health.record_failure(name, timing["elapsed"], timing.get("error"))
+    health.save()
+    result["health"] = {name: health.summary(name) for name in SOURCES}
+
+    if source is not None:
+        result["source"] = source
+        result["data"] = outcome
         result["success"] = True
-        result["error"] = "使用模拟数据（API 暂不可用）"
-    
+        result["not_modified"] = all(result["timings"][name]["status"] == "not_modified" for name in source.split("+"))
+        if not result["not_modified"]:
+            _save_conditional_state()
+        return result
+
+    result["error"] = f"API 请求失败: {outcome}" if outcome is not None else "API 请求失败"
+    if skipped:
+        result["error"] += f"（熔断跳过: {', '.join(skipped)}）"
+
+    # 模拟数据只在显式开启时返回，且不算成功，调用方不能把它当作真实热搜
+    if allow_mock:
+        result["data"] = generate_mock_data()
+        result["source"] = "mock"
+        result["error"] += "，已改用模拟数据"
+
     return result
 
 
+def topics_fingerprint(items: list, top_n: int = FINGERPRINT_TOP_N) -> str:
+    """
+    前 top_n 条热搜的稳定指纹：只取归一化后的标题集合，与排名顺序和热度数值无关，
+    热度的正常波动和名次互换不会改变指纹
+    """
+    titles = sorted(normalize_title(item["title"]) for item in items[:top_n])
+    return hashlib.sha256("\n".join(titles).encode("utf-8")).hexdigest()[:16]
+
+
 def categorize_topic(title: str) -> str:
     """
     根据标题内容自动分类话题
-    
+
     Args:
         title: 热搜标题
-    
+
     Returns:
         str: 分类标签
     """
-    # 娱乐关键词
-    entertainment_keywords = [
-        "明星", "演员", "歌手", "导演", "电影", "电视剧", "综艺", "演唱会",
-        "粉丝", "官宣", "恋情", "结婚", "离婚", "出轨", "绯闻", "代言",
-        "新歌", "专辑", "MV", "颁奖", "红毯", "造型", "直播", "带货"
-    ]
-    
-    # 社会关键词
-    society_keywords = [
-        "政策", "法律", "法规", "通报", "公告", "事故", "地震", "台风",
-        "疫情", "确诊", "核酸", "接种", "医院", "学校", "高考", "考研",
-        "房价", "物价", "工资", "就业", "失业", "养老", "退休"
-    ]
-    
-    # 科技关键词
-    tech_keywords = [
-        "AI", "人工智能", "芯片", "手机", "电脑", "互联网", "5G", "6G",
-        "苹果", "华为", "小米", "特斯拉", "新能源", "电动车", "机器人",
-        "元宇宙", "VR", "AR", "区块链", "加密货币", "比特币"
-    ]
-    
-    # 体育关键词
-    sports_keywords = [
-        "世界杯", "奥运", "冠军", "金牌", "决赛", "半决赛", "联赛",
-        "足球", "篮球", "乒乓球", "羽毛球", "游泳", "田径", "体操",
-        "NBA", "CBA", "英超", "西甲", "中超"
-    ]
-    
-    # 财经关键词
-    finance_keywords = [
-        "股市", "A股", "港股", "美股", "基金", "理财", "银行", "利率",
-        "汇率", "通胀", "GDP", "经济", "投资", "融资", "上市", "IPO"
-    ]
-    
-    title_lower = title.lower()
-    
-    for keyword in entertainment_keywords:
-        if keyword in title:
-            return "娱乐"
-    
-    for keyword in society_keywords:
-        if keyword in title:
-            return "社会"
-    
-    for keyword in tech_keywords:
-        if keyword.lower() in title_lower:
-            return "科技"
-    
-    for keyword in sports_keywords:
-        if keyword in title or keyword.lower() in title_lower:
-            return "体育"
-    
-    for keyword in finance_keywords:
-        if keyword in title or keyword.lower() in title_lower:
-            return "财经"
-    
-    return "其他"
+    return _CATEGORY_MATCHER.classify(title)
+
+
+def categorize_topics(titles: list) -> list:
+    """批量分类，返回与 titles 顺序一致的分类标签列表"""
+    return _CATEGORY_MATCHER.classify_many(titles)
 
 
 def generate_mock_data():
-    """生成模拟数据用于测试"""
+    """生成模拟数据用于测试（HotSnapshot）"""
     mock_topics = [
         {"title": "某明星官宣恋情", "hot": 9999999, "cat": "娱乐"},
         {"title": "新能源汽车政策发布", "hot": 8888888, "cat": "科技"},
@@ -225,7 +556,30 @@ def generate_mock_data():
             "is_fei": idx == 1
         })
     
-    return data
+    return HotSnapshot.from_items(data)
+
+
+def format_timings(timings: dict) -> str:
+    """格式化各数据源耗时，例如 primary=0.82s(ok) backup=0.31s(cancelled)"""
+    if not timings:
+        return "-"
+    return " ".join(f"{name}={t['elapsed']:.2f}s({t['status']})" for name, t in timings.items())
+
+
+def format_health(name: str, summary: dict) -> str:
+    """格式化数据源健康状况，例如 primary: open  错误率 60%（最近 5 次） ... 冷却至 10:15:00"""
+    states = {"closed": "正常", "open": "熔断", "half_open": "半开"}
+    parts = [f"{name}: {states.get(summary['state'], summary['state'])}",
+             f"错误率 {summary['error_rate']:.0%}（最近 {summary['requests']} 次）"]
+    if summary.get("median_latency") is not None:
+        parts.append(f"耗时中位数 {summary['median_latency']:.2f}s")
+    if summary.get("last_success"):
+        parts.append(f"最近成功 {datetime.fromtimestamp(summary['last_success']).strftime('%Y-%m-%d %H:%M:%S')}")
+    if summary["state"] == "open" and summary.get("reopen_at"):
+        parts.append(f"冷却至 {datetime.fromtimestamp(summary['reopen_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+    if summary["state"] != "closed" and summary.get("last_error"):
+        parts.append(f"最近错误: {summary['last_error']}")
+    return "  ".join(parts)
 
 
 def format_hot_value(value: int) -> str:
@@ -248,12 +602,26 @@ if __name__ == "__main__":
             "data": generate_mock_data(),
             "error": None
         }
+    elif len(sys.argv) > 1 and sys.argv[1] == "--health":
+        for name in SOURCES:
+            print(format_health(name, source_health().summary(name)))
+        sys.exit(0)
     else:
         print("🔄 正在获取微博热搜数据...")
         result = fetch_weibo_hot_search()
-    
-    if result["success"]:
-        print(f"✅ 获取成功！时间：{result['fetch_time']}")
+
+    if not result["success"]:
+        print(f"❌ 获取失败：{result['error']}")
+        for name, summary in result.get("health", {}).items():
+            print(f"   {format_health(name, summary)}")
+    if result["data"]:
+        if result["success"]:
+            print(f"✅ 获取成功！时间：{result['fetch_time']}")
+        else:
+            print("⚠️ 以下为模拟数据，不是真实热搜")
+        print(f"📡 数据源：{result.get('source')}  耗时：{format_timings(result.get('timings', {}))}")
+        print(f"🔑 Top {FINGERPRINT_TOP_N} 指纹：{topics_fingerprint(result['data'])}"
+              f"{'（数据源未修改）' if result.get('not_modified') else ''}")
         print(f"📊 共获取 {len(result['data'])} 条热搜\n")
         
         print("=" * 60)
@@ -277,7 +645,6 @@ if __name__ == "__main__":
         if len(sys.argv) > 1 and sys.argv[1] == "--json":
             print("\n" + "=" * 60)
             print("JSON 输出：")
-            print(json.dumps(result, ensure_ascii=False, indent=2))
-    else:
-        print(f"❌ 获取失败：{result['error']}")
+            print(json.dumps(result, ensure_ascii=False, indent=2, default=json_default))
+    if not result["success"]:
         sys.exit(1)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+紧凑的热搜条目
+HotItem 用 __slots__ 保存一条热搜：is_hot / is_new / is_fei 压缩为一个位字段，按标题生成的默认链接不单独保存；
+HotSnapshot 按列保存一次快照：排名、热度和标记为 array，文本字段为 list，分类和标签为驻留的共享字符串。
+
+两者都兼容按字段名读写（item["title"]、item.get("label")、item["category"] = ...），
+原来按 dict 读取热搜条目的代码无需修改；HotSnapshot 可以直接索引、切片和遍历，遍历时按需生成 HotItem。
+注意遍历和索引得到的 HotItem 是副本：修改后要用 snapshot[i] = item 写回，或直接修改列（snapshot.categories[i] = ...），
+原来「遍历 dict 列表并原地修改」的代码需要相应调整。
+"""
+
+import re
+import sys
+import unicodedata
+from array import array
+
+# is_hot / is_new / is_fei 压缩为一个位字段（与快照库 items.flags 相同）
+FLAG_BITS = (("is_hot", 1), ("is_new", 2), ("is_fei", 4))
+FIELDS = ("rank", "title", "hot_value", "category", "url", "label", "is_hot", "is_new", "is_fei")
+_FIELD_SET = frozenset(FIELDS)
+
+
+def normalize_title(title: str) -> str:
+    """归一化标题：全半角统一、去掉 # 和空白、转小写（分析缓存、联合去重和排名对比共用）"""
+    text = unicodedata.normalize("NFKC", title)
+    text = re.sub(r"[#\s]+", "", text)
+    return text.lower()
+
+
+def topic_url(title: str) -> str:
+    return f"https://s.weibo.com/weibo?q=%23{title}%23"
+
+
+def to_int(value) -> int:
+    """热度值可能是字符串（备用 API），可能带千分位逗号或小数（"1,234"、"123.4"），仍无法解析时记为 0"""
+    if isinstance(value, str):
+        value = value.strip().replace(",", "").replace("，", "")
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def pack_flags(item) -> int:
+    return sum(bit for key, bit in FLAG_BITS if item.get(key))
+
+
+def _custom_url(title: str, url):
+    """与按标题生成的默认链接相同时返回 None，不单独保存"""
+    return url if url and url != topic_url(title) else None
+
+
+def _flag_property(bit: int):
+    def getter(self):
+        return bool(self.flags & bit)
+
+    def setter(self, value):
+        self.flags = self.flags | bit if value else self.flags & ~bit
+
+    return property(getter, setter)
+
+
+class HotItem:
+    """
+    一条热搜，字段与原来的 dict 相同（rank / title / hot_value / category / url / label / is_hot / is_new / is_fei），
+    合并后附加的 variants、sources 等字段保存在 extra 中
+    """
+
+    __slots__ = ("rank", "title", "hot_value", "category", "_url", "label", "flags", "extra")
+
+    def __init__(self, rank: int, title: str, hot_value: int = 0, category: str = "", url: str = None,
+                 label: str = "", flags: int = 0, extra: dict = None):
+        self.rank = rank
+        self.title = title
+        self.hot_value = hot_value
+        self.category = category
+        self._url = url
+        self.label = label
+        self.flags = flags
+        self.extra = extra
+
+    @property
+    def url(self) -> str:
+        return self._url or topic_url(self.title)
+
+    @url.setter
+    def url(self, value: str):
+        self._url = value
+
+    is_hot = _flag_property(1)
+    is_new = _flag_property(2)
+    is_fei = _flag_property(4)
+
+    def __getitem__(self, key: str):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_SET or (self.extra is not None and key in self.extra)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> tuple:
+        return FIELDS + tuple(self.extra or ())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self.keys()}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (HotItem, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HotItem({self.to_dict()!r})"
+
+
+class HotSnapshot:
+    """
+    按列保存的一次快照（按排名顺序）
+
+    Attributes:
+        ranks: array("I")
+        titles: list[str]
+        hot_values: array("q")，无法解析的热度为 0
+        categories / labels: list[str]
+        urls: list，与默认链接相同的为 None
+        flags: array("B")，见 FLAG_BITS
+        extras: 每条的附加字段（dict 或 None），都没有时为 None
+    """
+
+    __slots__ = ("ranks", "titles", "hot_values", "categories", "urls", "labels", "flags", "extras")
+
+    def __init__(self, ranks, titles, hot_values, categories, urls, labels, flags, extras=None):
+        self.ranks = ranks
+        self.titles = titles
+        self.hot_values = hot_values
+        self.categories = categories
+        self.urls = urls
+        self.labels = labels
+        self.flags = flags
+        self.extras = extras
+
+    @classmethod
+    def from_items(cls, items) -> "HotSnapshot":
+        """由 dict 或 HotItem 列表构造（附加字段保存到 extras）"""
+        ranks, titles, hot_values = array("I"), [], array("q")
+        categories, urls, labels, flags, extras = [], [], [], array("B"), []
+        intern = sys.intern
+        for item in items:
+            title = item.get("title") or ""
+            ranks.append(item.get("rank") or len(ranks) + 1)
+            titles.append(title)
+            hot_values.append(to_int(item.get("hot_value")))
+            categories.append(intern(item.get("category") or ""))
+            urls.append(_custom_url(title, item.get("url")))
+            labels.append(intern(item.get("label") or ""))
+            flags.append(pack_flags(item))
+            extra = {key: item[key] for key in item.keys() if key not in _FIELD_SET}
+            extras.append(extra or None)
+        return cls(ranks, titles, hot_values, categories, urls, labels, flags,
+                   extras if any(extras) else None)
+
+    @classmethod
+    def from_rows(cls, rows) -> "HotSnapshot":
+        """由快照库的 (rank, title, hot_value, category, url, label, flags) 行构造"""
+        columns = list(zip(*rows)) or [()] * 7
+        ranks, titles, hot_values, categories, urls, labels, flags = columns
+        intern = sys.intern
+        return cls(
+            array("I", ranks), list(titles), array("q", hot_values),
+            [intern(c or "") for c in categories],
+            [_custom_url(title, url) for title, url in zip(titles, urls)],
+            [intern(label or "") for label in labels],
+            array("B", flags),
+        )
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def _item(self, i: int) -> HotItem:
+        extra = self.extras[i] if self.extras is not None else None
+        return HotItem(self.ranks[i], self.titles[i], self.hot_values[i], self.categories[i], self.urls[i],
+                       self.labels[i], self.flags[i], dict(extra) if extra else None)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return HotSnapshot(
+                self.ranks[index], self.titles[index], self.hot_values[index], self.categories[index],
+                self.urls[index], self.labels[index], self.flags[index],
+                self.extras[index] if self.extras is not None else None,
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("HotSnapshot index out of range")
+        return self._item(index)
+
+    def __setitem__(self, index: int, item):
+        """写回一条（HotItem 或 dict），附加字段一并保存"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("HotSnapshot index out of range")
+        title = item.get("title") or ""
+        self.ranks[index] = item.get("rank") or index + 1
+        self.titles[index] = title
+        self.hot_values[index] = to_int(item.get("hot_value"))
+        self.categories[index] = sys.intern(item.get("category") or "")
+        self.urls[index] = _custom_url(title, item.get("url"))
+        self.labels[index] = sys.intern(item.get("label") or "")
+        self.flags[index] = pack_flags(item)
+        extra = {key: item[key] for key in item.keys() if key not in _FIELD_SET}
+        if extra and self.extras is None:
+            self.extras = [None] * len(self)
+        if self.extras is not None:
+            self.extras[index] = extra or None
+
+    def __iter__(self):
+        for i in range(len(self.titles)):
+            yield self._item(i)
+
+    def rows(self):
+        """按快照库 items 表的列顺序逐条返回 (rank, title, hot_value, category, url, label, flags)"""
+        for rank, title, hot_value, category, url, label, flags in zip(
+            self.ranks, self.titles, self.hot_values, self.categories, self.urls, self.labels, self.flags
+        ):
+            yield rank, title, hot_value, category, url or topic_url(title), label, flags
+
+    def to_dicts(self) -> list:
+        """转为 dict 列表（JSON 输出用）"""
+        return [item.to_dict() for item in self]
+
+    def __repr__(self) -> str:
+        return f"HotSnapshot({len(self)} items)"
+
+
+def as_snapshot(items) -> HotSnapshot:
+    """HotSnapshot 原样返回，dict / HotItem 列表转为 HotSnapshot"""
+    if isinstance(items, HotSnapshot):
+        return items
+    return HotSnapshot.from_items(items)
+
+
+def json_default(obj):
+    """json.dumps 的 default：HotSnapshot / HotItem 输出为 dict 列表 / dict"""
+    if isinstance(obj, HotSnapshot):
+        return obj.to_dicts()
+    if isinstance(obj, HotItem):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
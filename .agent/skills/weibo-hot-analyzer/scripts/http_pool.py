@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+长连接池
+按 (scheme, host, port) 复用 http.client 连接，守护进程模式下避免每轮重新建立 TCP/TLS
+"""
+
+import http.client
+import socket
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+
+MAX_REDIRECTS = 3
+
+
+class KeepAlivePool:
+    """
+    线程安全的连接池：取出空闲连接使用，完整读完响应后放回
+
+    请求出错的连接直接关闭，不放回池中；空闲连接被服务端关闭时自动重连一次。
+    带 cancel_event 的请求在进行中登记，abort(cancel_event) 直接关闭其 socket，阻塞中的读取立即返回。
+    """
+
+    def __init__(self, timeout: float, max_idle_per_host: int = 2):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def _checkout(self, key: tuple):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_class(host, port, timeout=self.timeout), False
+
+    def _checkin(self, key: tuple, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _request_once(self, url: str, headers: dict, cancel_event: threading.Event = None):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        conn, reused = self._checkout(key)
+        try:
+            try:
+                self._track(cancel_event, conn)
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused or (cancel_event is not None and cancel_event.is_set()):
+                    raise
+                # 空闲连接已被服务端关闭，换新连接重试一次
+                self._untrack(cancel_event, conn)
+                conn.close()
+                conn, reused = self._checkout(key)
+                self._track(cancel_event, conn)
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+
+            if cancel_event is not None and cancel_event.is_set():
+                conn.close()
+                return None, None, None
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            # abort 关闭 socket 导致的读写错误按取消处理
+            if cancel_event is not None and cancel_event.is_set():
+                return None, None, None
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            self._untrack(cancel_event, conn)
+
+        # 读完后才被取消的连接可能已被 abort 关闭，不放回池中
+        if response.will_close or (cancel_event is not None and cancel_event.is_set()):
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        return response.status, response.headers, body
+
+    def _track(self, cancel_event, conn):
+        """登记进行中的连接；已被取消时不再发出请求"""
+        if cancel_event is None:
+            return
+        with self._lock:
+            self._active.setdefault(cancel_event, set()).add(conn)
+        if cancel_event.is_set():
+            raise ConnectionAbortedError("请求已取消")
+
+    def _untrack(self, cancel_event, conn):
+        if cancel_event is None:
+            return
+        with self._lock:
+            active = self._active.get(cancel_event)
+            if active is not None:
+                active.discard(conn)
+                if not active:
+                    del self._active[cancel_event]
+
+    def abort(self, cancel_event: threading.Event):
+        """关闭以 cancel_event 发出、仍在进行中的请求的 socket（调用前先 set cancel_event）"""
+        with self._lock:
+            conns = list(self._active.get(cancel_event, ()))
+        for conn in conns:
+            sock = conn.sock
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def get(self, url: str, headers: dict, cancel_event: threading.Event = None):
+        """
+        发起 GET 请求，跟随最多 MAX_REDIRECTS 次重定向
+
+        Returns:
+            tuple: (status, headers, body)，被取消时均为 None
+
+        Raises:
+            HTTPError: 4xx / 5xx 响应
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._request_once(url, headers, cancel_event)
+            if status in (301, 302, 303, 307, 308) and response_headers.get("Location"):
+                url = urljoin(url, response_headers["Location"])
+                continue
+            if status is not None and status >= 400:
+                raise HTTPError(url, status, http.client.responses.get(status, ""), response_headers, None)
+            return status, response_headers, body
+        raise HTTPError(url, status, "too many redirects", response_headers, None)
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
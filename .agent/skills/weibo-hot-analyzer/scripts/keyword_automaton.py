@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+关键词多模式匹配
+Aho-Corasick Keyword Automaton
+
+把所有分类关键词编译成一个 Aho-Corasick 自动机，每个标题只需扫描一遍
+即可得到优先级最高的命中分类，耗时与关键词数量无关。
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick 自动机，每个关键词带一个优先级（数值越小越优先）
+
+    只保留每个状态可达的最小优先级，因此匹配时不需要展开输出链。
+    """
+
+    def __init__(self, patterns: Iterable[tuple]):
+        # 状态 0 为根节点
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+
+        for keyword, priority in patterns:
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = nxt
+            if self._best[node] is None or priority < self._best[node]:
+                self._best[node] = priority
+
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        """按 BFS 顺序构建失败指针，并把失败链上的最小优先级合并到当前状态"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    def best(self, text: str, floor: int = 0):
+        """
+        返回文本中命中关键词的最小优先级，无命中返回 None
+
+        Args:
+            text: 待匹配文本
+            floor: 已知的最优优先级，命中该值后立即停止扫描
+        """
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        found = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            priority = best_at[node]
+            if priority is not None and (found is None or priority < found):
+                found = priority
+                if found <= floor:
+                    break
+        return found
+
+
+class CategoryMatcher:
+    """
+    按优先级把标题归入第一个命中的分类
+
+    categories 为 (分类名, 关键词列表, 是否忽略大小写) 的有序列表，
+    区分大小写和忽略大小写的关键词分别编译成两个自动机。
+    """
+
+    def __init__(self, categories: list, default: str = "其他"):
+        self.default = default
+        self.names = [name for name, _, _ in categories]
+        sensitive, insensitive = [], []
+        for priority, (_, keywords, ignore_case) in enumerate(categories):
+            if ignore_case:
+                insensitive.extend((k.lower(), priority) for k in keywords)
+            else:
+                sensitive.extend((k, priority) for k in keywords)
+        self._sensitive = KeywordAutomaton(sensitive)
+        self._insensitive = KeywordAutomaton(insensitive)
+
+    def classify(self, title: str) -> str:
+        """返回标题的分类"""
+        found = self._sensitive.best(title)
+        if found != 0:
+            other = self._insensitive.best(title.lower())
+            if other is not None and (found is None or other < found):
+                found = other
+        return self.default if found is None else self.names[found]
+
+    def classify_many(self, titles: Iterable[str]) -> list:
+        """批量分类，返回与输入顺序一致的分类列表"""
+        classify = self.classify
+        return [classify(title) for title in titles]
+
+
+def merge_keyword_file(categories: list, path) -> list:
+    """
+    从 JSON 文件加载额外关键词并合并到分类表
+
+    文件格式：{"娱乐": ["关键词", ...], "新分类": [...]}
+    已有分类沿用原来的优先级和大小写规则；新分类追加在最后，忽略大小写。
+    """
+    with open(Path(path), "r", encoding="utf-8") as f:
+        extra = json.load(f)
+
+    merged = [(name, list(keywords), ignore_case) for name, keywords, ignore_case in categories]
+    index = {name: i for i, (name, _, _) in enumerate(merged)}
+    for name, keywords in extra.items():
+        if name in index:
+            merged[index[name]][1].extend(keywords)
+        else:
+            index[name] = len(merged)
+            merged.append((name, list(keywords), True))
+    return merged
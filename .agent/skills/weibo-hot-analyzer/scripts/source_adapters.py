@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+热搜数据源适配器
+每个数据源声明请求地址、请求头、响应解码和字段映射，由原始响应字节按列批量解码为 HotSnapshot；
+联合模式下多个数据源的排名列表按归一化标题合并为一个列表，并记录每条来自哪些数据源
+"""
+
+import json
+import sys
+from array import array
+
+from hot_items import FLAG_BITS, HotSnapshot, to_int, topic_url
+
+TOP_LIMIT = 50  # 每个数据源最多取的条数
+RRF_K = 60  # 倒数排名融合的平滑常数，越大各数据源名次差异的影响越小
+
+
+def _lookup(entry: dict, keys: tuple, default=None):
+    """依次尝试 keys，返回第一个存在的字段"""
+    for key in keys:
+        if key in entry:
+            return entry[key]
+    return default
+
+
+def _column(entries: list, keys: tuple, default) -> list:
+    """取出所有条目的一个字段：先直接取第一个源字段，缺失时才依次尝试其余源字段"""
+    if not keys:
+        return [default] * len(entries)
+    first, rest = keys[0], keys[1:]
+    if not rest:
+        return [entry.get(first, default) for entry in entries]
+    return [entry[first] if first in entry else _lookup(entry, rest, default) for entry in entries]
+
+
+class SourceAdapter:
+    """
+    一个热搜数据源
+
+    Args:
+        name: 数据源名称，用于健康记录、条件请求状态和条目来源
+        url: 请求地址
+        entries: 从解析后的 JSON 中取出原始条目列表，响应无效时抛出 ValueError
+        fields: 统一字段 -> 依次尝试的源字段，如 {"title": ("word", "note")}；
+            未映射 url 时按标题生成，未映射 label 时为空，
+            is_hot / is_new / is_fei 的源字段值为 1 时为 True，未映射时为 False
+        headers: 生成请求头的函数，每次请求时调用（Cookie 等配置可以在运行中修改）
+    """
+
+    def __init__(self, name: str, url: str, entries, fields: dict, headers=None):
+        self.name = name
+        self.url = url
+        self.entries = entries
+        self.fields = fields
+        self.headers = headers or dict
+
+    def decode(self, body: bytes) -> HotSnapshot:
+        """
+        把原始响应字节解析为 HotSnapshot（category 留空，由调用方批量分类）
+
+        解析 JSON 后按列取字段，不为每条构造中间 dict。
+        """
+        fields = self.fields
+        # 按 UTF-8 解码后再解析：json.loads(bytes) 需要探测编码并以 surrogatepass 解码，更慢
+        entries = self.entries(json.loads(body.decode("utf-8")))[:TOP_LIMIT]
+        n = len(entries)
+        titles = _column(entries, fields["title"], "")
+        urls = _column(entries, fields.get("url", ()), None)
+        flags = [0] * n
+        for flag, bit in FLAG_BITS:
+            if fields.get(flag):
+                flags = [f | bit if value == 1 else f for f, value in zip(flags, _column(entries, fields[flag], 0))]
+        intern = sys.intern
+        return HotSnapshot(
+            array("I", range(1, n + 1)),
+            titles,
+            array("q", [v if type(v) is int else to_int(v) for v in _column(entries, fields["hot_value"], 0)]),
+            [""] * n,
+            [url if url and url != topic_url(title) else None for title, url in zip(titles, urls)],
+            [intern(label or "") for label in _column(entries, fields.get("label", ()), "")],
+            array("B", flags),
+        )
+
+
+def merge_ranked(lists: dict, key, limit: int = TOP_LIMIT) -> HotSnapshot:
+    """
+    按 key(标题) 合并多个数据源的排名列表（倒数排名融合：得分为各数据源中 1 / (RRF_K + 排名) 之和），
+    多个数据源都上榜的话题排在只有一个数据源的前面
+
+    Args:
+        lists: {数据源: HotSnapshot}，按优先级排序；同一话题的字段（含热度）取优先级最高的数据源，
+            各数据源的热度口径不同，只出现在低优先级数据源中的话题热度不能直接与其他话题比较
+
+    Returns:
+        HotSnapshot: 前 limit 条，rank 重新编号，每条附加 sources: {数据源: 该数据源中的排名}
+    """
+    merged = {}
+    for priority, (name, snapshot) in enumerate(lists.items()):
+        for row, (rank, title) in enumerate(zip(snapshot.ranks, snapshot.titles)):
+            k = key(title)
+            entry = merged.get(k)
+            if entry is None:
+                # [得分, 优先级, 原排名, 快照, 行号, 来源]
+                entry = merged[k] = [0.0, priority, rank, snapshot, row, {}]
+            entry[0] += 1 / (RRF_K + rank)
+            entry[5].setdefault(name, rank)
+
+    ranked = sorted(merged.values(), key=lambda e: (-e[0], e[1], e[2]))[:limit]
+    items = []
+    for rank, (_, _, _, snapshot, row, sources) in enumerate(ranked, 1):
+        item = snapshot[row]
+        item.rank = rank
+        item["sources"] = sources
+        items.append(item)
+    return HotSnapshot.from_items(items)
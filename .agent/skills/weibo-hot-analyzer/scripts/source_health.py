@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+数据源健康记录与熔断
+按数据源持久化最近 HEALTH_WINDOW 次请求的结果（耗时、是否成功）和最近一次成功时间；
+连续失败 BREAKER_THRESHOLD 次后熔断，冷却期内直接跳过该数据源，
+冷却结束后放行一次探测请求（半开），成功则恢复，失败则冷却时间翻倍（不超过 BREAKER_MAX_COOLDOWN）。
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+HEALTH_WINDOW = 20
+BREAKER_THRESHOLD = max(int(os.environ.get("WEIBO_BREAKER_THRESHOLD", "3")), 1)
+BREAKER_COOLDOWN = float(os.environ.get("WEIBO_BREAKER_COOLDOWN", "900"))  # 首次熔断的冷却时间（秒）
+BREAKER_MAX_COOLDOWN = float(os.environ.get("WEIBO_BREAKER_MAX_COOLDOWN", "21600"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _new_record() -> dict:
+    return {
+        "state": CLOSED,
+        "failures": 0,        # 连续失败次数
+        "trips": 0,           # 连续熔断次数，决定冷却时间
+        "opened_at": None,
+        "last_success": None,
+        "last_error": None,
+        "recent": [],         # [[时间戳, 是否成功, 耗时]]，最新的在后
+    }
+
+
+class SourceHealth:
+    """
+    各数据源的健康记录，path 为空时只在内存中保存（守护进程各轮之间仍然有效）
+
+    对冲模式下多个请求线程同时记录结果，所有读写都加锁。
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self.records = {}
+        if self.path is not None:
+            try:
+                self.records = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+
+    def _record(self, name: str) -> dict:
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = _new_record()
+        return record
+
+    def cooldown(self, name: str) -> float:
+        """当前熔断的冷却时间：每连续熔断一次翻倍"""
+        trips = self._record(name)["trips"]
+        return min(BREAKER_COOLDOWN * 2 ** max(trips - 1, 0), BREAKER_MAX_COOLDOWN)
+
+    def _reopen_at(self, name: str) -> float:
+        record = self._record(name)
+        if record["state"] == CLOSED:
+            return 0.0
+        return (record["opened_at"] or 0.0) + self.cooldown(name)
+
+    def available(self, names, now: float = None) -> tuple:
+        """
+        按顺序筛选可以请求的数据源；冷却结束的熔断数据源转为半开，放行一次探测
+
+        全部处于冷却期时仍放行最早结束冷却的一个，避免整轮无数据源可用。
+
+        Returns:
+            tuple: (可请求的数据源列表, 被跳过的数据源列表)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            allowed, skipped = [], []
+            for name in names:
+                record = self._record(name)
+                if record["state"] == OPEN and now >= self._reopen_at(name):
+                    record["state"] = HALF_OPEN
+                (skipped if record["state"] == OPEN else allowed).append(name)
+            if not allowed and skipped:
+                probe = min(skipped, key=self._reopen_at)
+                self.records[probe]["state"] = HALF_OPEN
+                skipped.remove(probe)
+                allowed.append(probe)
+        return allowed, skipped
+
+    def _append(self, record: dict, ok: bool, elapsed: float, now: float):
+        record["recent"] = (record["recent"] + [[round(now, 3), ok, round(elapsed, 3)]])[-HEALTH_WINDOW:]
+
+    def record_success(self, name: str, elapsed: float, now: float = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            record = self._record(name)
+            self._append(record, True, elapsed, now)
+            record.update(state=CLOSED, failures=0, trips=0, opened_at=None, last_success=round(now, 3))
+
+    def record_failure(self, name: str, elapsed: float, error: str, now: float = None):
+        """记录一次失败；半开探测失败或连续失败达到阈值时熔断"""
+        now = time.time() if now is None else now
+        with self._lock:
+            record = self._record(name)
+            self._append(record, False, elapsed, now)
+            record["failures"] += 1
+            record["last_error"] = error
+            if record["state"] == HALF_OPEN or record["failures"] >= BREAKER_THRESHOLD:
+                record["state"] = OPEN
+                record["trips"] += 1
+                record["opened_at"] = round(now, 3)
+
+    def summary(self, name: str) -> dict:
+        """最近窗口内的错误率、耗时中位数、熔断状态和最近一次成功时间"""
+        with self._lock:
+            record = self._record(name)
+            recent = record["recent"]
+            latencies = sorted(elapsed for _, ok, elapsed in recent if ok)
+            return {
+                "state": record["state"],
+                "requests": len(recent),
+                "error_rate": round(sum(not ok for _, ok, _ in recent) / len(recent), 3) if recent else 0.0,
+                "median_latency": latencies[len(latencies) // 2] if latencies else None,
+                "last_success": record["last_success"],
+                "last_error": record["last_error"],
+                "reopen_at": self._reopen_at(name) or None,
+            }
+
+    def save(self):
+        """原子写回 path；写入失败只打印警告"""
+        if self.path is None:
+            return
+        with self._lock:
+            content = json.dumps(self.records, ensure_ascii=False, sort_keys=True)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(content, encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ 数据源健康记录保存失败: {e}")
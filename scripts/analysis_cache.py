@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Claude 分析结果缓存
+按归一化标题的哈希存储单条分析，支持 TTL 过期和按条目数淘汰
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# 标题归一化与获取脚本共用
+sys.path.insert(0, str(Path(__file__).parent.parent / ".agent" / "skills" / "weibo-hot-analyzer" / "scripts"))
+
+from hot_items import normalize_title
+
+# 缓存中不保存 rank，命中时使用本次热搜的排名
+CACHED_FIELDS = ("title", "category", "summary", "key_points", "commercial")
+
+
+def title_key(title: str) -> str:
+    """标题的内容寻址键"""
+    return hashlib.sha256(normalize_title(title).encode("utf-8")).hexdigest()
+
+
+def topics_key(titles: list) -> str:
+    """一组标题（与顺序无关）的键，用于缓存整体的趋势洞察"""
+    joined = "\n".join(sorted(normalize_title(t) for t in titles))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    磁盘分析缓存，每条分析一个 JSON 文件：{cache_dir}/{key[:2]}/{key}.json
+
+    整体的 trend_insight / commercial_summary 按话题集合缓存在 summary/ 下。
+    """
+
+    def __init__(self, cache_dir: Path, ttl_seconds: float, max_entries: int):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _item_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _summary_path(self, key: str) -> Path:
+        return self.cache_dir / "summary" / f"{key}.json"
+
+    def _read(self, path: Path):
+        """读取未过期的缓存条目，过期或损坏的直接删除"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("cached_at", 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        # 更新 mtime，作为淘汰时的最近使用时间
+        os.utime(path)
+        return entry
+
+    def _write(self, path: Path, entry: dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get(self, title: str):
+        """返回缓存的分析条目（不含 rank），未命中返回 None"""
+        entry = self._read(self._item_path(title_key(title)))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["item"]
+
+    def put(self, title: str, item: dict):
+        """缓存单条分析"""
+        self._write(self._item_path(title_key(title)), {
+            "title": title,
+            "cached_at": time.time(),
+            "item": {k: item[k] for k in CACHED_FIELDS if k in item},
+        })
+
+    def partition(self, topics: list):
+        """
+        把话题分为命中和未命中两部分
+
+        Returns:
+            tuple: ({rank: 分析条目}, [未命中的话题])
+        """
+        cached, missing = {}, []
+        for t in topics:
+            item = self.get(t["title"])
+            if item is None:
+                missing.append(t)
+            else:
+                cached[t["rank"]] = {"rank": t["rank"], **item}
+        return cached, missing
+
+    def get_summary(self, titles: list):
+        """按话题集合读取整体洞察，返回 {"trend_insight", "commercial_summary"} 或 None"""
+        entry = self._read(self._summary_path(topics_key(titles)))
+        return entry["summary"] if entry else None
+
+    def put_summary(self, titles: list, analysis: dict):
+        self._write(self._summary_path(topics_key(titles)), {
+            "cached_at": time.time(),
+            "summary": {
+                "trend_insight": analysis.get("trend_insight", ""),
+                "commercial_summary": analysis.get("commercial_summary", ""),
+            },
+        })
+
+    def evict(self) -> int:
+        """删除过期条目，并按最近使用时间淘汰超出 max_entries 的条目，返回删除数量"""
+        if not self.cache_dir.exists():
+            return 0
+        now = time.time()
+        removed = 0
+        live = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                mtime = path.stat().st_mtime
+                with open(path, "r", encoding="utf-8") as f:
+                    cached_at = json.load(f).get("cached_at", 0)
+            except (OSError, ValueError):
+                cached_at = 0
+                mtime = 0
+            if now - cached_at > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            elif path.parent.name != "summary":
+                live.append((mtime, path))
+
+        live.sort()
+        for _, path in live[:max(len(live) - self.max_entries, 0)]:
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
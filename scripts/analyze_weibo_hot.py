@@ -2,96 +2,122 @@
 """
 微博热搜分析主脚本
 使用 Claude Agent SDK 进行深度分析
+
+各阶段可以单独运行，每个子命令只导入自己用到的模块（anthropic SDK 只在调用 Claude 时导入）:
+    python scripts/analyze_weibo_hot.py                    # 完整流程：获取 -> 入库 -> 分析 -> 生成报告
+    python scripts/analyze_weibo_hot.py fetch              # 只获取热搜并保存快照
+    python scripts/analyze_weibo_hot.py analyze [--snapshot ID]   # 分析已保存的快照并生成报告
+    python scripts/analyze_weibo_hot.py render [--report NAME]    # 用已保存的分析重新渲染报告，不调用 Claude
+    python scripts/analyze_weibo_hot.py notify [MD_FILE]   # 推送最新（或指定）Markdown 报告到飞书
 """
 
+import argparse
 import json
 import os
+import random
+import re
+import signal
 import sys
+import threading
+import time
 from datetime import datetime
+from html import escape
 from pathlib import Path
 
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent.parent / ".agent" / "skills" / "weibo-hot-analyzer" / "scripts"))
 
-from anthropic import Anthropic
-from fetch_weibo_hot import fetch_weibo_hot_search, format_hot_value
+from fetch_weibo_hot import (
+    enable_keepalive, fetch_weibo_hot_search, format_health, format_hot_value, format_timings, topics_fingerprint,
+)
+from hot_items import HotItem, as_snapshot
+from analysis_cache import AnalysisCache, normalize_title
+from snapshot_store import SnapshotStore, TIME_FORMAT
+from token_budget import TOKEN_BUDGET_STATE, TokenBudget
+from report_index import OUTPUT_DIR, ReportManifest, report_entry, write_index_pages
+from report_template import TEMPLATE_PATH, load_site_template
+from search_index import update_search_index
+from static_site import collapse_line_breaks, write_if_changed, write_static
+import metrics
+from json_stream import AnalysisStreamParser
+from hot_trend import fastest_risers, load_trends
+from rank_diff import diff_snapshots, format_rank_delta, summarize_movers
+from topic_cluster import cluster_topics
 
 # 配置
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
 ANTHROPIC_BASE_URL = os.environ.get("ANTHROPIC_BASE_URL", "")  # 第三方 API 地址
 ANTHROPIC_MODEL = os.environ.get("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")  # 模型名称
+ANTHROPIC_STREAM = os.environ.get("ANTHROPIC_STREAM", "false").lower() == "true"  # 流式接收并增量解析
+# 提示缓存：静态说明作为 system 前缀并标记 cache_control（前缀达到服务端的最小缓存长度后生效）；
+# 第三方 API 可能不接受 cache_control，设置了 ANTHROPIC_BASE_URL 时默认关闭（说明仍放在 system 前缀）
+ANTHROPIC_PROMPT_CACHE = os.environ.get(
+    "ANTHROPIC_PROMPT_CACHE", "false" if ANTHROPIC_BASE_URL else "true"
+).lower() == "true"
 DEBUG = os.environ.get("DEBUG", "false").lower() == "true"
-OUTPUT_DIR = Path("docs")
-
-
-def update_index_html(output_dir: Path):
-    """更新 index.html，列出所有报告"""
-    # 获取所有 HTML 报告文件
-    reports = []
-    for f in sorted(output_dir.glob("weibo-hot-*.html"), reverse=True):
-        name = f.stem
-        # 从文件名提取日期时间
-        date_str = name.replace("weibo-hot-", "")
-        # 格式化日期
-        try:
-            dt = datetime.strptime(date_str, "%Y-%m-%d-%H-%M")
-            date_formatted = dt.strftime("%Y年%m月%d日 %H:%M")
-        except:
-            date_formatted = date_str
-        reports.append({
-            "url": f.name,
-            "name": f"📊 {date_formatted} 微博热搜报告",
-            "date": date_formatted
-        })
-
-    # 生成 index.html
-    index_html = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>微博热搜分析报告</title>
-    <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px; background: #f5f5f5; }}
-        h1 {{ color: #333; text-align: center; }}
-        .subtitle {{ text-align: center; color: #666; margin-bottom: 30px; }}
-        .report-list {{ list-style: none; padding: 0; }}
-        .report-item {{ background: white; margin: 10px 0; padding: 15px 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-        .report-item a {{ color: #0066cc; text-decoration: none; font-size: 18px; }}
-        .report-item a:hover {{ text-decoration: underline; }}
-        .report-date {{ color: #666; font-size: 14px; margin-top: 5px; }}
-        .refresh-btn {{ display: block; width: 200px; margin: 30px auto; padding: 10px 20px; background: #0066cc; color: white; text-align: center; border-radius: 8px; text-decoration: none; }}
-        .refresh-btn:hover {{ background: #0055aa; }}
-    </style>
-</head>
-<body>
-    <h1>📊 微博热搜分析报告</h1>
-    <p class="subtitle">自动生成 · 每日更新</p>
-    <ul class="report-list">
-{"".join([f'        <li class="report-item"><a href="{r["url"]}">{r["name"]}</a></li>' for r in reports])}
-    </ul>
-    <a href="./" class="refresh-btn">🔄 刷新列表</a>
-</body>
-</html>'''
-
-    index_path = output_dir / "index.html"
-    with open(index_path, "w", encoding="utf-8") as f:
-        f.write(index_html)
-    print(f"✅ 更新 index.html: {index_path}")
+# 分组并发分析：每组 ANALYSIS_GROUP_SIZE 个话题，最多 ANALYSIS_CONCURRENCY 个请求同时进行
+ANALYSIS_FANOUT = os.environ.get("ANALYSIS_FANOUT", "false").lower() == "true"
+ANALYSIS_GROUP_SIZE = max(int(os.environ.get("ANALYSIS_GROUP_SIZE", "2")), 1)
+ANALYSIS_CONCURRENCY = max(int(os.environ.get("ANALYSIS_CONCURRENCY", "4")), 1)
+ANALYSIS_TIMEOUT = float(os.environ.get("ANALYSIS_TIMEOUT", "60"))  # 单个请求超时（秒）
+TOPIC_CLUSTERING = os.environ.get("TOPIC_CLUSTERING", "true").lower() == "true"  # 合并近似重复的话题后再分析
+TOP_N = 10  # 分析和报告的热搜条数
+# 守护进程模式：轮询间隔（秒）和随机抖动比例
+DAEMON_INTERVAL = float(os.environ.get("DAEMON_INTERVAL", "300"))
+DAEMON_JITTER = float(os.environ.get("DAEMON_JITTER", "0.1"))
+# 上次生成报告时的 Top N 指纹，本轮指纹相同则跳过分析和报告
+LAST_REPORT_STATE = Path(os.environ.get("LAST_REPORT_STATE", ".cache/last-report.json"))
+DEFAULT_TREND_INSIGHT = "热搜涵盖社会、娱乐、国际等多个领域"
+DEFAULT_COMMERCIAL_SUMMARY = "多个话题具备商业化潜力"
+# 分析缓存：同一话题在 TTL 内不再重复请求 Claude
+ANALYSIS_CACHE_ENABLED = os.environ.get("ANALYSIS_CACHE", "true").lower() == "true"
+ANALYSIS_CACHE_DIR = Path(os.environ.get("ANALYSIS_CACHE_DIR", ".cache/analyses"))
+ANALYSIS_CACHE_TTL_HOURS = float(os.environ.get("ANALYSIS_CACHE_TTL_HOURS", "24"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", "2000"))
+# usage 中记录的 token 数：(方向, 字段)
+USAGE_FIELDS = (
+    ("input", "input_tokens"),
+    ("output", "output_tokens"),
+    ("cache_read", "cache_read_input_tokens"),
+    ("cache_write", "cache_creation_input_tokens"),
+)
+_USAGE_TOTALS = {}
+_TOKEN_BUDGET = None
 
 
-def get_claude_analysis(client, topics: list) -> str:
-    """调用 Claude 进行深度分析"""
-    # 构建话题列表
-    topics_text = "\n".join([
-        f"{t['rank']}. [{t['category']}] {t['title']} (热度: {format_hot_value(t['hot_value'])})"
-        for t in topics
-    ])
+def update_index_html(output_dir: Path, report_name: str = None):
+    """
+    更新报告索引（首页 + 按月分页）
+
+    清单缺失或过期时全量扫描重建；否则只追加 report_name 并重写其所在月份和首页。
+    """
+    manifest = ReportManifest(output_dir)
+    if not manifest.load():
+        changed_months = manifest.rebuild()
+        print(f"🔁 重建报告清单: {sum(manifest.state['months'].values())} 份报告")
+    elif report_name:
+        is_new_month = report_entry(report_name)["month"] not in manifest.state["months"]
+        month = manifest.add(report_name)
+        # 新月份出现时所有分页的月份导航都要更新
+        changed_months = manifest.months() if is_new_month else [month]
+    else:
+        changed_months = manifest.months()
+
+    write_index_pages(manifest, changed_months)
+    print(f"✅ 更新 index.html: {output_dir / 'index.html'}")
 
-    prompt = f"""请对以下微博热搜 Top 10 进行简要分析。
 
-## 热搜话题
-{topics_text}
+SUMMARY_SCHEMA = (
+    ',\n'
+    '    "trend_insight": "一句话趋势洞察",\n'
+    '    "commercial_summary": "一句话商业汇总"'
+)
+
+
+def analysis_instructions(with_summary: bool = True) -> str:
+    """分析请求的静态说明（不含话题），with_summary=False 时不要求输出整体洞察（分组并发时使用）"""
+    summary_schema = SUMMARY_SCHEMA if with_summary else ""
+    return f"""请对用户给出的微博热搜话题逐条进行简要分析。
 
 ## 输出要求（每条只输出3个要点）
 请以 JSON 格式输出：
@@ -105,18 +131,154 @@ def get_claude_analysis(client, topics: list) -> str:
             "key_points": ["要点1", "要点2", "要点3"],
             "commercial": "商业化机会或无"
         }}
-    ],
+    ]{summary_schema}
+}}
+只输出 JSON，不要有其他内容。"""
+
+
+SUMMARY_INSTRUCTIONS = """请根据用户给出的微博热搜给出整体洞察。
+
+请以 JSON 格式输出：
+{
     "trend_insight": "一句话趋势洞察",
     "commercial_summary": "一句话商业汇总"
-}}
+}
 只输出 JSON，不要有其他内容。"""
 
-    response = client.messages.create(
-        model=ANTHROPIC_MODEL,
-        max_tokens=8192,
-        messages=[{"role": "user", "content": prompt}],
-    )
+# 各类请求的静态说明，逐字节不变，作为 system 前缀（见 claude_request）
+INSTRUCTIONS = {
+    "analysis": analysis_instructions(),
+    "group": analysis_instructions(with_summary=False),
+    "summary": SUMMARY_INSTRUCTIONS,
+}
+
+
+def build_analysis_prompt(topics: list) -> str:
+    """构建分析请求的用户消息：只有本次的话题列表"""
+    topics_text = "\n".join([
+        f"{t['rank']}. [{t['category']}] {t['title']} (热度: {format_hot_value(t['hot_value'])})"
+        for t in topics
+    ])
+    return f"## 热搜话题\n{topics_text}"
+
+
+def build_summary_prompt(topics: list) -> str:
+    """构建整体洞察请求的用户消息"""
+    topics_text = "\n".join([f"{t['rank']}. [{t['category']}] {t['title']}" for t in topics])
+    return f"## 热搜话题\n{topics_text}"
+
+
+def system_prompt(instructions: str):
+    """静态说明作为 system 前缀；启用提示缓存时标记 cache_control，之后相同前缀的请求可以直接读取缓存"""
+    if not ANTHROPIC_PROMPT_CACHE:
+        return instructions
+    return [{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}]
 
+
+def claude_request(kind: str, topics: list) -> dict:
+    """
+    messages.create / messages.stream 的参数
+
+    静态说明在前（system），本次的话题列表在后（用户消息），重复运行时前缀不变；
+    max_tokens 按话题数和最近的输出长度计算（见 token_budget.py）。
+    kind: analysis 完整分析 / group 分组分析 / summary 整体洞察
+    """
+    prompt = build_summary_prompt(topics) if kind == "summary" else build_analysis_prompt(topics)
+    return {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": token_budget().max_tokens(kind, budget_units(kind, topics)),
+        "system": system_prompt(INSTRUCTIONS[kind]),
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def budget_units(kind: str, topics: list) -> int:
+    """token 预算按话题数计算，整体洞察的长度与话题数无关"""
+    return 1 if kind == "summary" else len(topics)
+
+
+def token_budget() -> TokenBudget:
+    global _TOKEN_BUDGET
+    if _TOKEN_BUDGET is None:
+        _TOKEN_BUDGET = TokenBudget(TOKEN_BUDGET_STATE or None)
+    return _TOKEN_BUDGET
+
+
+def anthropic_client_kwargs() -> dict:
+    client_kwargs = {"api_key": ANTHROPIC_API_KEY}
+    if ANTHROPIC_BASE_URL:
+        client_kwargs["base_url"] = ANTHROPIC_BASE_URL
+    return client_kwargs
+
+
+def create_client():
+    """同步 Claude 客户端；anthropic SDK 导入较慢，只在确实要调用 Claude 时才导入"""
+    from anthropic import Anthropic
+    return Anthropic(**anthropic_client_kwargs())
+
+
+def create_async_client():
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(**anthropic_client_kwargs())
+
+
+def record_usage(response, mode: str, kind: str = None, request: dict = None, topics: list = ()):
+    """
+    记录一次请求的输入 / 输出 / 缓存读取 / 缓存写入 token 数；
+    传入 kind 和 request（claude_request 的结果）时把输出长度计入该类请求的 token 预算
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for direction, field in USAGE_FIELDS:
+        count = getattr(usage, field, 0) or 0
+        _USAGE_TOTALS[direction] = _USAGE_TOTALS.get(direction, 0) + count
+        metrics.incr("claude_tokens", count, direction=direction, mode=mode)
+    if kind is not None:
+        truncated = getattr(response, "stop_reason", None) == "max_tokens"
+        if truncated:
+            print(f"⚠️ Claude 输出达到 max_tokens={request['max_tokens']} 被截断，下次提高预算")
+            metrics.incr("claude_truncated", mode=mode)
+        token_budget().observe(kind, budget_units(kind, topics), getattr(usage, "output_tokens", 0) or 0,
+                               request["max_tokens"], truncated)
+
+
+def format_usage_totals() -> str:
+    """本轮累计的 token 数（读取后清零），响应中没有 usage 时为空"""
+    totals = dict(_USAGE_TOTALS)
+    _USAGE_TOTALS.clear()
+    if not totals:
+        return ""
+    return (f"输入 {totals.get('input', 0):,}（缓存读取 {totals.get('cache_read', 0):,}，"
+            f"写入 {totals.get('cache_write', 0):,}） 输出 {totals.get('output', 0):,}")
+
+
+def get_claude_analysis(client, topics: list) -> str:
+    """调用 Claude 进行深度分析"""
+    request = claude_request("analysis", topics)
+    with metrics.span("claude_request", mode="single"):
+        response = client.messages.create(**request)
+    record_usage(response, "single", "analysis", request, topics)
+    return extract_response_text(response)
+
+
+def get_claude_summary(client, topics: list) -> dict:
+    """单独请求整体洞察（部分话题命中缓存时按全部 Top N 请求），无法解析时返回空 dict"""
+    request = claude_request("summary", topics)
+    with metrics.span("claude_request", mode="summary"):
+        response = client.messages.create(**request)
+    record_usage(response, "summary", "summary", request, topics)
+    return parse_summary_text(extract_response_text(response))
+
+
+def parse_summary_text(text: str) -> dict:
+    """解析整体洞察请求的回复（可能带 ```json 代码块）"""
+    text = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    return try_parse_json(text.strip()) or {}
+
+
+def extract_response_text(response) -> str:
+    """从响应中取出文本内容"""
     # 兼容 MiniMax 等第三方 API 的不同返回格式
     content = response.content
     if isinstance(content, list) and len(content) > 0:
@@ -140,55 +302,305 @@ def get_claude_analysis(client, topics: list) -> str:
     return str(content)
 
 
-def generate_html_report(topics: list, analysis: dict, timestamp: str) -> str:
-    """生成 HTML 报告"""
-    # 模板在 .agent/skills/weibo-hot-analyzer/assets/ 目录下
-    repo_root = Path(__file__).parent.parent
-    template_path = repo_root / ".agent" / "skills" / "weibo-hot-analyzer" / "assets" / "report-template.html"
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
+def stream_claude_analysis(client, topics: list, on_item=None) -> AnalysisStreamParser:
+    """
+    流式调用 Claude，边接收边解析
+
+    text_stream 只包含文本增量（thinking 块会被跳过），每个 analyses 条目
+    闭合时立即回调 on_item，响应被截断时已闭合的条目仍然保留。
+    """
+    parser = AnalysisStreamParser()
+    request = claude_request("analysis", topics)
+    with metrics.span("claude_request", mode="stream"), client.messages.stream(**request) as stream:
+        for text in stream.text_stream:
+            for item in parser.feed(text):
+                if on_item is not None:
+                    on_item(item)
+        if hasattr(stream, "get_final_message"):
+            record_usage(stream.get_final_message(), "stream", "analysis", request, topics)
+    return parser
+
 
-    # 生成表格行
-    table_rows = ""
-    for t in topics[:10]:
-        rank_class = f"rank-{t['rank']}" if t['rank'] <= 3 else "rank-other"
-        table_rows += f"""
+def try_parse_json(text):
+    """尝试多种方式解析 JSON"""
+    # 直接解析
+    try:
+        result = json.loads(text)
+        metrics.incr("analysis_parse", path="json")
+        return result
+    except:
+        pass
+
+    # 尝试补全缺失的括号
+    brackets = {'[': ']', '{': '}'}
+    stack = []
+    for char in text:
+        if char in brackets:
+            stack.append(brackets[char])
+        elif char in brackets.values():
+            if stack and stack[-1] == char:
+                stack.pop()
+
+    # 补全缺失的括号
+    fixed_text = text + ''.join(reversed(stack))
+    try:
+        result = json.loads(fixed_text)
+        metrics.incr("analysis_parse", path="bracket_repair")
+        return result
+    except:
+        pass
+
+    return None
+
+
+def extract_analyses_items(text):
+    """从文本中逐个提取 analyses 条目"""
+    items = []
+    # 匹配每个独立的分析对象 {...}
+    pattern = r'\{\s*"rank"\s*:\s*(\d+)[^}]*"title"\s*:\s*"([^"]*)"\s*[^}]*"category"\s*:\s*"([^"]*)"\s*[^}]*"summary"\s*:\s*"([^"]*)"\s*[^}]*"key_points"\s*:\s*\[([^\]]*)\][^}]*(?:"commercial"\s*:\s*"([^"]*)")?[^}]*\}'
+    for match in re.finditer(pattern, text, re.DOTALL):
+        try:
+            key_points_raw = match.group(5)
+            key_points = [p.strip().strip('"') for p in key_points_raw.split(',') if p.strip().strip('"')]
+            items.append({
+                "rank": int(match.group(1)),
+                "title": match.group(2),
+                "category": match.group(3),
+                "summary": match.group(4),
+                "key_points": key_points[:3] if key_points else ["详见微博"],
+                "commercial": match.group(6) if match.group(6) else "暂无商业化机会"
+            })
+        except:
+            continue
+    return items
+
+
+def placeholder_analyses(topics: list) -> list:
+    """完全无法提取时，使用原始热搜数据生成基本分析"""
+    return [{
+        "rank": t["rank"],
+        "title": t["title"],
+        "category": t["category"],
+        "summary": f"{t['title']}相关话题持续发酵",
+        "key_points": ["话题热度较高", "网友关注度持续", "详见微博热搜"],
+        "commercial": "暂无明显商业化机会"
+    } for t in topics]
+
+
+def parse_analysis_text(raw_analysis: str):
+    """
+    解析非流式响应：完整 JSON -> 补全括号 -> 增量解析器 -> 正则提取
+
+    Returns:
+        dict 或 None: 至少包含一条 analyses 时返回
+    """
+    # 解析 JSON
+    if raw_analysis.startswith("```json"):
+        raw_analysis = raw_analysis[7:-3]
+    elif raw_analysis.startswith("```"):
+        raw_analysis = raw_analysis[3:-3]
+
+    # 清理可能的额外字符
+    raw_analysis = raw_analysis.strip()
+
+    analysis = try_parse_json(raw_analysis)
+    if analysis and analysis.get("analyses"):
+        return analysis
+
+    print("⚠️ JSON 解析失败，尝试提取部分数据...")
+    # 截断的响应：保留所有已闭合的条目
+    parser = AnalysisStreamParser()
+    parser.feed(raw_analysis)
+    if parser.items:
+        metrics.incr("analysis_parse", path="stream_parser")
+        return parser.result()
+
+    # 尝试提取 analyses
+    analyses_items = extract_analyses_items(raw_analysis)
+    if not analyses_items:
+        metrics.incr("analysis_parse", path="failed")
+        return None
+    metrics.incr("analysis_parse", path="regex")
+
+    # 提取 trend_insight 和 commercial_summary
+    trend_match = re.search(r'"trend_insight"\s*:\s*"([^"]*)"', raw_analysis)
+    comm_match = re.search(r'"commercial_summary"\s*:\s*"([^"]*)"', raw_analysis)
+    analysis = {"analyses": analyses_items}
+    if trend_match:
+        analysis["trend_insight"] = trend_match.group(1)
+    if comm_match:
+        analysis["commercial_summary"] = comm_match.group(1)
+    return analysis
+
+
+def run_claude_analysis(client, topics: list):
+    """
+    调用 Claude 并解析结果，ANTHROPIC_STREAM=true 时使用流式接收
+
+    Returns:
+        tuple: (analysis, placeholder_ranks, summary_ok)，placeholder_ranks 为使用基本模板的排名，
+            summary_ok 为 False 时整体洞察是默认文案（两者都不应写入缓存）
+    """
+    if ANTHROPIC_STREAM:
+        def on_item(item):
+            print(f"   ✓ 第 {item.get('rank', '?')} 条: {item.get('title', '')}")
+
+        analysis = stream_claude_analysis(client, topics, on_item).result()
+        if not analysis["analyses"]:
+            analysis = None
+    else:
+        analysis = parse_analysis_text(get_claude_analysis(client, topics))
+
+    placeholder_ranks = set()
+    if analysis is None:
+        print("⚠️ 无法提取分析数据，使用基本模板...")
+        analysis = {"analyses": placeholder_analyses(topics)}
+        placeholder_ranks = {t["rank"] for t in topics}
+        metrics.incr("analysis_placeholders", len(topics))
+    else:
+        print(f"✅ 成功提取 {len(analysis['analyses'])} 条分析数据")
+
+    summary_ok = bool(analysis.get("trend_insight")) and not placeholder_ranks
+    analysis.setdefault("trend_insight", DEFAULT_TREND_INSIGHT)
+    analysis.setdefault("commercial_summary", DEFAULT_COMMERCIAL_SUMMARY)
+    return analysis, placeholder_ranks, summary_ok
+
+
+async def _request_async(client, semaphore, mode: str, topics: list):
+    """受 semaphore 限制并发、超过 ANALYSIS_TIMEOUT 取消的一次异步请求，mode 为 group / summary"""
+    import asyncio
+
+    request = claude_request(mode, topics)
+    async with semaphore:
+        with metrics.span("claude_request", mode=mode):
+            response = await asyncio.wait_for(client.messages.create(**request), timeout=ANALYSIS_TIMEOUT)
+    record_usage(response, mode, mode, request, topics)
+    return response
+
+
+async def _analyze_group_async(client, semaphore, group: list) -> list:
+    """分析一组话题，返回该组的 analyses 条目"""
+    response = await _request_async(client, semaphore, "group", group)
+    analysis = parse_analysis_text(extract_response_text(response))
+    return analysis["analyses"] if analysis else []
+
+
+async def _summarize_async(client, semaphore, topics: list) -> dict:
+    """单独请求整体洞察，与分组分析并发执行"""
+    response = await _request_async(client, semaphore, "summary", topics)
+    return parse_summary_text(extract_response_text(response))
+
+
+async def fan_out_claude_analysis(topics: list, client=None, summary_topics: list = None):
+    """
+    按 ANALYSIS_GROUP_SIZE 分组并发分析，最多 ANALYSIS_CONCURRENCY 个请求同时进行
+
+    单组失败或超时只影响该组（使用基本模板），结果按排名合并为与
+    run_claude_analysis 相同的结构。传入 client 时复用且不关闭（守护进程模式）。
+    整体洞察按 summary_topics（缺省为 topics）请求，部分话题命中缓存时传入全部 Top N。
+
+    Returns:
+        tuple: (analysis, placeholder_ranks, summary_ok)，同 run_claude_analysis
+    """
+    import asyncio
+
+    owns_client = client is None
+    if owns_client:
+        client = create_async_client()
+    semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+    groups = [topics[i:i + ANALYSIS_GROUP_SIZE] for i in range(0, len(topics), ANALYSIS_GROUP_SIZE)]
+    try:
+        results = await asyncio.gather(
+            _summarize_async(client, semaphore, summary_topics or topics),
+            *[_analyze_group_async(client, semaphore, group) for group in groups],
+            return_exceptions=True,
+        )
+    finally:
+        if owns_client:
+            await client.close()
+
+    summary, group_results = results[0], results[1:]
+    analyses, placeholder_ranks = [], set()
+    for group, items in zip(groups, group_results):
+        ranks = {t["rank"] for t in group}
+        if isinstance(items, BaseException):
+            print(f"⚠️ 第 {min(ranks)}-{max(ranks)} 名分析失败: {type(items).__name__} {items}")
+            items = []
+        # 按归一化标题对应（模型可能把组内话题重新从 1 编号）
+        returned = {normalize_title(item.get("title") or ""): item for item in items}
+        found = [(t, returned.get(normalize_title(t["title"]))) for t in group]
+        missing = [t for t, item in found if item is None]
+        analyses.extend({**item, "rank": t["rank"]} for t, item in found if item is not None)
+        if missing:
+            analyses.extend(placeholder_analyses(missing))
+            placeholder_ranks.update(t["rank"] for t in missing)
+            metrics.incr("analysis_placeholders", len(missing))
+
+    if isinstance(summary, BaseException):
+        print(f"⚠️ 整体洞察请求失败: {type(summary).__name__} {summary}")
+        summary = {}
+    summary_ok = bool(summary.get("trend_insight"))
+    print(f"✅ 并发分析完成：{len(groups)} 组，{len(analyses) - len(placeholder_ranks)} 条成功")
+
+    analyses.sort(key=lambda item: item["rank"])
+    return {
+        "analyses": analyses,
+        "trend_insight": summary.get("trend_insight") or DEFAULT_TREND_INSIGHT,
+        "commercial_summary": summary.get("commercial_summary") or DEFAULT_COMMERCIAL_SUMMARY,
+    }, placeholder_ranks, summary_ok
+
+
+NO_COMMERCIAL_VALUES = ("无明显商业化机会", "暂无商业化机会", "")
+CATEGORY_ICONS = {"娱乐": "🎭", "科技": "💻", "社会": "📢", "体育": "⚽", "财经": "💰", "自然灾害": "🌍", "其他": "🔍"}
+
+
+def _render_variants_label(t: HotItem) -> str:
+    """被合并的相似话题数，鼠标悬停显示标题"""
+    variants = t.get("variants")
+    if not variants:
+        return ""
+    return f'<span class="topic-label label-merged" title="{escape(" / ".join(variants))}">+{len(variants)} 相似</span>'
+
+
+def _render_table_row(t: HotItem) -> str:
+    rank_class = f"rank-{t.rank}" if t.rank <= 3 else "rank-other"
+    category = escape(t.category)
+    return f"""
         <tr>
-            <td><span class="rank-badge {rank_class}">{t['rank']}</span></td>
+            <td><span class="rank-badge {rank_class}">{t.rank}</span></td>
             <td>
-                <a href="{t['url']}" target="_blank" class="topic-title">{t['title']}</a>
-                {f'<span class="topic-label label-hot">热</span>' if t.get('is_hot') else ''}
-                {f'<span class="topic-label label-new">新</span>' if t.get('is_new') else ''}
-                {f'<span class="topic-label label-fei">沸</span>' if t.get('is_fei') else ''}
+                <a href="{escape(t.url)}" target="_blank" class="topic-title">{escape(t.title)}</a>
+                {'<span class="topic-label label-hot">热</span>' if t.is_hot else ''}
+                {'<span class="topic-label label-new">新</span>' if t.is_new else ''}
+                {'<span class="topic-label label-fei">沸</span>' if t.is_fei else ''}
+                {_render_variants_label(t)}
             </td>
-            <td><span class="category-tag cat-{t['category'].replace(' ', '-')}">{t['category']}</span></td>
-            <td class="hot-value">{format_hot_value(t['hot_value'])}</td>
+            <td><span class="category-tag cat-{category.replace(' ', '-')}">{category}</span></td>
+            <td class="hot-value">{format_hot_value(t.hot_value)}</td>
         </tr>
         """
 
-    # 生成分析卡片
-    analysis_cards = ""
-    for item in analysis["analyses"]:
-        points_html = "".join([f"<li>{p}</li>" for p in item["key_points"]])
-        is_commercial_empty = item["commercial"] in ["无明显商业化机会", "暂无商业化机会", ""]
-        commercial_class = "no-commercial" if is_commercial_empty else ""
 
-        analysis_cards += f"""
+def _render_analysis_card(item: dict) -> str:
+    points_html = "".join([f"<li>{escape(p)}</li>" for p in item["key_points"]])
+    commercial_class = "no-commercial" if item["commercial"] in NO_COMMERCIAL_VALUES else ""
+    category = escape(item['category'])
+    return f"""
         <div class="analysis-card">
             <div class="card-header">
                 <div class="card-rank">
                     <span class="rank-badge rank-{item['rank']}" style="width: 40px; height: 40px; font-size: 1rem;">{item['rank']}</span>
                 </div>
                 <div class="card-title-area">
-                    <div class="card-title">{item['title']}</div>
+                    <div class="card-title">{escape(item['title'])}</div>
                     <div class="card-meta">
-                        <span class="category-tag cat-{item['category'].replace(' ', '-')}">{item['category']}</span>
+                        <span class="category-tag cat-{category.replace(' ', '-')}">{category}</span>
                     </div>
                 </div>
             </div>
             <div class="card-section">
                 <div class="card-section-title">核心摘要</div>
-                <p class="summary-text">{item['summary']}</p>
+                <p class="summary-text">{escape(item['summary'])}</p>
             </div>
             <div class="card-section">
                 <div class="card-section-title">关键要点</div>
@@ -196,60 +608,204 @@ def generate_html_report(topics: list, analysis: dict, timestamp: str) -> str:
             </div>
             <div class="card-section">
                 <div class="card-section-title">💰 商业化洞察</div>
-                <div class="commercial-insight {commercial_class}">{item['commercial']}</div>
+                <div class="commercial-insight {commercial_class}">{escape(item['commercial'])}</div>
             </div>
         </div>
         """
 
-    # 生成商业化机会列表
-    opportunities = []
-    for item in analysis["analyses"]:
-        if item["commercial"] not in ["无明显商业化机会", "暂无商业化机会", ""]:
-            opportunities.append({
-                "title": item["title"],
-                "category": item["category"],
-                "insight": item["commercial"]
-            })
 
-    opportunities_html = ""
-    for i, opp in enumerate(opportunities[:5]):
-        icon_map = {"娱乐": "🎭", "科技": "💻", "社会": "📢", "体育": "⚽", "财经": "💰", "自然灾害": "🌍", "其他": "🔍"}
-        icon = icon_map.get(opp["category"], "🔍")
-        opportunities_html += f"""
+def _render_opportunity(item: dict) -> str:
+    icon = CATEGORY_ICONS.get(item["category"], "🔍")
+    return f"""
         <div class="opportunity-item">
             <div class="opportunity-icon">{icon}</div>
             <div class="opportunity-content">
-                <h4>{opp['title']}</h4>
-                <p>{opp['insight']}</p>
+                <h4>{escape(item['title'])}</h4>
+                <p>{escape(item['commercial'])}</p>
             </div>
         </div>
         """
 
+
+MOVER_GROUPS = (
+    ("entered", "🆕 新上榜"),
+    ("climbers", "📈 上升最快"),
+    ("fallers", "📉 下降最快"),
+    ("exited", "👋 跌出榜单"),
+)
+
+
+def _mover_delta(group: str, m: dict) -> tuple:
+    """返回 (展示文本, 样式类)"""
+    if group == "entered":
+        return f"#{m['rank']}", "mover-new"
+    if group == "exited":
+        return f"原#{m['previous_rank']}", "mover-down"
+    css = "mover-up" if m["rank_delta"] > 0 else "mover-down"
+    return f"{format_rank_delta(m['rank_delta'])} #{m['rank']}", css
+
+
+def _render_movers_section(movers: dict) -> str:
+    """排名变化区块，movers 为 None（无上一期数据）时不输出"""
+    if movers is None:
+        return ""
+    groups = []
+    for key, label in MOVER_GROUPS:
+        if not movers[key]:
+            continue
+        rows = []
+        for m in movers[key]:
+            text, css = _mover_delta(key, m)
+            rows.append(f'<li><span>{escape(m["title"])}</span><span class="mover-delta {css}">{text}</span></li>')
+        groups.append(f"""
+                <div class="movers-group">
+                    <h3>{label}</h3>
+                    <ul>{"".join(rows)}</ul>
+                </div>""")
+    body = "".join(groups) or "\n                <p style='color: var(--text-secondary);'>与上一期相比排名无变化</p>"
+    return f"""
+        <!-- 排名变化 -->
+        <section class="overview-card">
+            <h2 class="section-title">🔀 排名变化</h2>
+            <div class="movers-grid">{body}
+            </div>
+        </section>
+"""
+
+
+def _markdown_movers_section(movers: dict) -> str:
+    if movers is None:
+        return ""
+    rows = []
+    for key, label in MOVER_GROUPS:
+        for m in movers[key]:
+            text, _ = _mover_delta(key, m)
+            hot_delta = f"{m['hot_delta']:+,}" if "hot_delta" in m else "-"
+            rows.append(f"| {label} | {m['title']} | {text} | {hot_delta} |")
+    if not rows:
+        return "## 🔀 排名变化\n\n与上一期相比排名无变化\n"
+    table = "| 变化 | 热搜话题 | 排名 | 热度变化 |\n|------|----------|------|----------|\n" + "\n".join(rows)
+    return f"## 🔀 排名变化\n\n{table}\n"
+
+
+def _trend_label(acceleration) -> tuple:
+    """返回 (趋势文字, 样式类)"""
+    if acceleration is None:
+        return "-", "trend-decel"
+    if acceleration > 0:
+        return "↗ 加速", "trend-accel"
+    return "↘ 放缓", "trend-decel"
+
+
+def _format_velocity(velocity: float) -> str:
+    return f"+{format_hot_value(int(velocity))}/小时"
+
+
+def _render_risers_section(risers: list) -> str:
+    """热度飙升区块，没有上升中的话题时不输出"""
+    if not risers:
+        return ""
+    rows = []
+    for t in risers:
+        label, css = _trend_label(t["acceleration"])
+        rows.append(f"""
+                    <tr>
+                        <td>{escape(t["title"])}</td>
+                        <td class="hot-value">{format_hot_value(t["hot_value"])}</td>
+                        <td class="mover-delta mover-up">{_format_velocity(t["velocity"])}</td>
+                        <td class="{css}">{label}</td>
+                    </tr>""")
+    return f"""
+        <!-- 热度飙升 -->
+        <section class="overview-card">
+            <h2 class="section-title">🚀 热度飙升</h2>
+            <table class="hot-table">
+                <thead>
+                    <tr>
+                        <th>热搜话题</th>
+                        <th>当前热度</th>
+                        <th>上升速度</th>
+                        <th>趋势</th>
+                    </tr>
+                </thead>
+                <tbody>{"".join(rows)}
+                </tbody>
+            </table>
+        </section>
+"""
+
+
+def _markdown_risers_section(risers: list) -> str:
+    if not risers:
+        return ""
+    rows = [
+        f"| {t['title']} | {format_hot_value(t['hot_value'])} | {_format_velocity(t['velocity'])} | "
+        f"{_trend_label(t['acceleration'])[0]} |"
+        for t in risers
+    ]
+    table = "| 热搜话题 | 当前热度 | 上升速度 | 趋势 |\n|----------|----------|----------|------|\n" + "\n".join(rows)
+    return f"## 🚀 热度飙升\n\n{table}\n"
+
+
+def generate_html_report(topics: list, analysis: dict, timestamp: str, movers: dict = None,
+                         risers: list = None) -> str:
+    """
+    生成 HTML 报告（模板编译后进程内缓存，所有动态内容做 HTML 转义）
+
+    topics 可以直接传快照的 HotSnapshot，也可以是 dict / HotItem 列表（只转换用到的前 10 条）。
+
+    共用样式在 assets/ 下的独立样式表中（见 write_html_report）；模板静态部分编译时已压缩，
+    动态片段只压缩缩进空白。
+
+    movers 为 rank_diff.summarize_movers 的结果，None 时不显示排名变化区块；
+    risers 为 hot_trend.fastest_risers 的结果，为空时不显示热度飙升区块。
+    """
+    template, _, _ = load_site_template(TEMPLATE_PATH)
+
+    table_rows = "".join([_render_table_row(t) for t in as_snapshot(topics[:10])])
+    analysis_cards = "".join([_render_analysis_card(item) for item in analysis["analyses"]])
+
+    # 商业化机会列表（最多 5 条）
+    opportunities = [item for item in analysis["analyses"] if item["commercial"] not in NO_COMMERCIAL_VALUES]
+    opportunities_html = "".join([_render_opportunity(item) for item in opportunities[:5]])
     if not opportunities_html:
         opportunities_html = "<p style='color: var(--text-secondary);'>本期热搜暂无明显商业化机会</p>"
 
-    # 替换模板占位符
-    html = template.replace("{{DATE}}", timestamp.replace("_", " "))
-    html = html.replace("{{HOT_TABLE_ROWS}}", table_rows)
-    html = html.replace("{{ANALYSIS_CARDS}}", analysis_cards)
-    html = html.replace("{{TREND_INSIGHT}}", analysis["trend_insight"])
-    html = html.replace("{{COMMERCIAL_OPPORTUNITIES}}", opportunities_html)
+    values = {
+        "DATE": escape(timestamp.replace("_", " ")),
+        "HOT_TABLE_ROWS": table_rows,
+        "MOVERS_SECTION": _render_movers_section(movers),
+        "RISERS_SECTION": _render_risers_section(risers),
+        "ANALYSIS_CARDS": analysis_cards,
+        "TREND_INSIGHT": escape(analysis["trend_insight"]),
+        "COMMERCIAL_OPPORTUNITIES": opportunities_html,
+    }
+    return template.render({name: collapse_line_breaks(value) for name, value in values.items()})
+
 
-    return html
+def write_html_report(path: Path, content: str) -> bool:
+    """写入 HTML 报告及其 .gz / .br 副本，并确保同目录下有它引用的共享样式表；返回报告是否改写"""
+    _, css_path, css = load_site_template(TEMPLATE_PATH)
+    if css_path:
+        write_static(path.parent / css_path, css)
+    return write_static(path, content)
 
 
-def generate_markdown_report(topics: list, analysis: dict, timestamp: str) -> str:
-    """生成 Markdown 报告"""
+def generate_markdown_report(topics: list, analysis: dict, timestamp: str, movers: dict = None,
+                             risers: list = None) -> str:
+    """生成 Markdown 报告（topics 同 generate_html_report）"""
 
     # 概览表格
     overview = "| 排名 | 热搜话题 | 热度 | 分类 |\n|------|----------|------|------|\n"
-    for t in topics[:10]:
+    for t in as_snapshot(topics[:10]):
         labels = []
-        if t.get('is_hot'): labels.append("热")
-        if t.get('is_new'): labels.append("新")
-        if t.get('is_fei'): labels.append("沸")
+        if t.is_hot: labels.append("热")
+        if t.is_new: labels.append("新")
+        if t.is_fei: labels.append("沸")
         label_str = f" ({','.join(labels)})" if labels else ""
-        overview += f"| {t['rank']} | {t['title']}{label_str} | {format_hot_value(t['hot_value'])} | {t['category']} |\n"
+        variants = t.get('variants')
+        merged_str = f" (合并 {len(variants) + 1} 条)" if variants else ""
+        overview += f"| {t.rank} | {t.title}{label_str} | {format_hot_value(t.hot_value)}{merged_str} | {t.category} |\n"
 
     # 深度分析
     depth_analysis = ""
@@ -271,6 +827,9 @@ def generate_markdown_report(topics: list, analysis: dict, timestamp: str) -> st
 ---
 """
 
+    # 排名变化、热度飙升等可选区块，之间空一行
+    changes = "\n".join(filter(None, (_markdown_movers_section(movers), _markdown_risers_section(risers))))
+
     md = f"""# 微博热搜 Top 10 分析报告
 
 > 📅 报告生成时间：{timestamp.replace("_", " ")}
@@ -279,7 +838,7 @@ def generate_markdown_report(topics: list, analysis: dict, timestamp: str) -> st
 ## 📊 热搜总览
 
 {overview}
-
+{changes}
 ## 🔍 深度分析
 
 {depth_analysis}
@@ -299,16 +858,64 @@ def generate_markdown_report(topics: list, analysis: dict, timestamp: str) -> st
     return md
 
 
-def main():
-    print("=" * 60)
-    print("微博热搜分析")
-    print("=" * 60)
+class PipelineError(Exception):
+    """流水线中无法继续的错误（单次运行时退出，守护进程模式下跳过本轮）"""
 
-    if not ANTHROPIC_API_KEY:
-        print("❌ 错误: 未设置 ANTHROPIC_API_KEY 环境变量")
-        sys.exit(1)
 
-    # 1. 获取热搜数据
+class ClaudeClients:
+    """
+    Claude 客户端集合，按需创建
+
+    守护进程模式下跨轮次复用同一组客户端（连接池和 TLS 会话保持预热），
+    异步客户端绑定在一个长期存在的事件循环上。
+    """
+
+    def __init__(self):
+        self._client = None
+        self._async_client = None
+        self._runner = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = create_client()
+        return self._client
+
+    def run_fan_out(self, topics: list, summary_topics: list = None):
+        if self._runner is None:
+            import asyncio
+            self._runner = asyncio.Runner()
+        if self._async_client is None:
+            self._async_client = create_async_client()
+        return self._runner.run(fan_out_claude_analysis(topics, self._async_client, summary_topics))
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+        if self._runner is not None:
+            if self._async_client is not None:
+                self._runner.run(self._async_client.close())
+            self._runner.close()
+        self._client = self._async_client = self._runner = None
+
+
+def record_fetch_metrics(result: dict):
+    """数据源使用情况、各数据源请求状态、耗时和响应字节数"""
+    if not metrics.enabled():
+        return
+    metrics.incr("fetch_source_used", source=result.get("source") or "none")
+    for name, timing in result.get("timings", {}).items():
+        metrics.incr("fetch_requests", source=name, status=timing["status"])
+        metrics.gauge("fetch_source_seconds", timing["elapsed"], source=name)
+        if timing.get("bytes"):
+            metrics.incr("fetch_bytes", timing["bytes"], source=name)
+    for name, summary in result.get("health", {}).items():
+        metrics.gauge("fetch_source_open", int(summary["state"] == "open"), source=name)
+        metrics.gauge("fetch_source_error_rate", summary["error_rate"], source=name)
+
+
+def fetch_topics() -> dict:
+    """获取热搜数据（调试模式使用模拟数据），失败时抛出 PipelineError"""
     print("\n📡 正在获取微博热搜数据...")
     if DEBUG:
         print("🧪 调试模式：使用模拟数据")
@@ -319,152 +926,439 @@ def main():
             "data": generate_mock_data()
         }
     else:
-        result = fetch_weibo_hot_search()
+        with metrics.span("fetch") as fetch_span:
+            result = fetch_weibo_hot_search()
+            fetch_span.set(source=result.get("source"))
 
+    record_fetch_metrics(result)
+    for name, summary in result.get("health", {}).items():
+        if summary["state"] != "closed":
+            print(f"⚠️ {format_health(name, summary)}")
+    # 数据源回退的模拟数据（WEIBO_MOCK_FALLBACK）同样是失败，不生成报告；调试流程请用 DEBUG=true
     if not result["success"]:
-        print(f"❌ 获取失败: {result.get('error', '未知错误')}")
-        sys.exit(1)
+        raise PipelineError(f"获取失败: {result.get('error', '未知错误')}")
 
-    topics = result["data"]
-    print(f"✅ 获取成功！共 {len(topics)} 条热搜")
+    print(f"✅ 获取成功！共 {len(result['data'])} 条热搜")
+    if result.get("timings"):
+        print(f"   数据源: {result['source']}  耗时: {format_timings(result['timings'])}")
+    return result
 
-    # 2. 调用 Claude 分析
-    print("\n🤖 正在调用 Claude 进行深度分析...")
-    client_kwargs = {"api_key": ANTHROPIC_API_KEY}
-    if ANTHROPIC_BASE_URL:
-        client_kwargs["base_url"] = ANTHROPIC_BASE_URL
-    client = Anthropic(**client_kwargs)
 
-    try:
-        raw_analysis = get_claude_analysis(client, topics[:10])
-        # 解析 JSON
-        if raw_analysis.startswith("```json"):
-            raw_analysis = raw_analysis[7:-3]
-        elif raw_analysis.startswith("```"):
-            raw_analysis = raw_analysis[3:-3]
-        
-        # 清理可能的额外字符
-        raw_analysis = raw_analysis.strip()
-        
-        # 尝试修复截断的 JSON
-        import re
-        
-        def try_parse_json(text):
-            """尝试多种方式解析 JSON"""
-            # 直接解析
-            try:
-                return json.loads(text)
-            except:
-                pass
-            
-            # 尝试补全缺失的括号
-            brackets = {'[': ']', '{': '}'}
-            stack = []
-            for char in text:
-                if char in brackets:
-                    stack.append(brackets[char])
-                elif char in brackets.values():
-                    if stack and stack[-1] == char:
-                        stack.pop()
-            
-            # 补全缺失的括号
-            fixed_text = text + ''.join(reversed(stack))
-            try:
-                return json.loads(fixed_text)
-            except:
-                pass
-            
-            return None
-        
-        def extract_analyses_items(text):
-            """从文本中逐个提取 analyses 条目"""
-            items = []
-            # 匹配每个独立的分析对象 {...}
-            pattern = r'\{\s*"rank"\s*:\s*(\d+)[^}]*"title"\s*:\s*"([^"]*)"\s*[^}]*"category"\s*:\s*"([^"]*)"\s*[^}]*"summary"\s*:\s*"([^"]*)"\s*[^}]*"key_points"\s*:\s*\[([^\]]*)\][^}]*(?:"commercial"\s*:\s*"([^"]*)")?[^}]*\}'
-            for match in re.finditer(pattern, text, re.DOTALL):
-                try:
-                    key_points_raw = match.group(5)
-                    key_points = [p.strip().strip('"') for p in key_points_raw.split(',') if p.strip().strip('"')]
-                    items.append({
-                        "rank": int(match.group(1)),
-                        "title": match.group(2),
-                        "category": match.group(3),
-                        "summary": match.group(4),
-                        "key_points": key_points[:3] if key_points else ["详见微博"],
-                        "commercial": match.group(6) if match.group(6) else "暂无商业化机会"
-                    })
-                except:
-                    continue
-            return items
-        
-        analysis = try_parse_json(raw_analysis)
-        
-        if not analysis or "analyses" not in analysis or not analysis["analyses"]:
-            print("⚠️ JSON 解析失败，尝试提取部分数据...")
-            # 尝试提取 analyses
-            analyses_items = extract_analyses_items(raw_analysis)
-            
-            # 提取 trend_insight 和 commercial_summary
-            trend_match = re.search(r'"trend_insight"\s*:\s*"([^"]*)"', raw_analysis)
-            comm_match = re.search(r'"commercial_summary"\s*:\s*"([^"]*)"', raw_analysis)
-            
-            analysis = {
-                "analyses": analyses_items if analyses_items else [],
-                "trend_insight": trend_match.group(1) if trend_match else "热搜涵盖社会、娱乐、国际等多个领域",
-                "commercial_summary": comm_match.group(1) if comm_match else "多个话题具备商业化潜力"
-            }
-            
-            if not analysis["analyses"]:
-                # 如果完全无法提取，使用原始热搜数据生成基本分析
-                print("⚠️ 无法提取分析数据，使用基本模板...")
-                for t in topics[:10]:
-                    analysis["analyses"].append({
-                        "rank": t["rank"],
-                        "title": t["title"],
-                        "category": t["category"],
-                        "summary": f"{t['title']}相关话题持续发酵",
-                        "key_points": ["话题热度较高", "网友关注度持续", "详见微博热搜"],
-                        "commercial": "暂无明显商业化机会"
-                    })
-            
-            print(f"✅ 成功提取 {len(analysis['analyses'])} 条分析数据")
-        print("✅ Claude 分析完成")
-    except json.JSONDecodeError as e:
-        print(f"❌ Claude 返回格式错误: {e}")
-        print(f"原始输出:\n{raw_analysis[:800]}")
-        sys.exit(1)
+def analyze_topics(clients: ClaudeClients, top_topics: list) -> dict:
+    """调用 Claude 分析（命中缓存的话题不再重复请求），返回按排名排列的分析结果"""
+    top_titles = [t["title"] for t in top_topics]
+    cache = None
+    if ANALYSIS_CACHE_ENABLED:
+        cache = AnalysisCache(ANALYSIS_CACHE_DIR, ANALYSIS_CACHE_TTL_HOURS * 3600, ANALYSIS_CACHE_MAX_ENTRIES)
+        cached_items, missing = cache.partition(top_topics)
+        print(f"\n🗂️ 分析缓存命中 {len(cached_items)}/{len(top_topics)} 条")
+        metrics.incr("analysis_cache", len(cached_items), result="hit")
+        metrics.incr("analysis_cache", len(missing), result="miss")
+    else:
+        cached_items, missing = {}, top_topics
+
+    analysis = {"analyses": [], "trend_insight": "", "commercial_summary": ""}
+    placeholder_ranks, summary_ok = set(), False
+    if missing:
+        print(f"\n🤖 正在调用 Claude 进行深度分析（{len(missing)} 条）...")
+        _USAGE_TOTALS.clear()
+        with metrics.span("analyze", fanout=ANALYSIS_FANOUT):
+            if ANALYSIS_FANOUT:
+                analysis, placeholder_ranks, summary_ok = clients.run_fan_out(missing, top_topics)
+            else:
+                analysis, placeholder_ranks, summary_ok = run_claude_analysis(clients.client, missing)
+        usage = format_usage_totals()
+        print(f"✅ Claude 分析完成{f'  token: {usage}' if usage else ''}")
+        token_budget().save()
 
-    # 3. 生成报告
+    # 新分析按归一化标题对应到未命中的话题（模型回传的排名可能被重新编号），对应不上的话题使用基本模板
+    returned = {}
+    for item in analysis["analyses"]:
+        returned.setdefault(normalize_title(item.get("title") or ""), item)
+    fresh_items, unmatched = {}, []
+    for t in missing:
+        item = returned.get(normalize_title(t["title"]))
+        if item is None:
+            unmatched.append(t)
+            continue
+        fresh_items[t["rank"]] = {**item, "rank": t["rank"]}
+        if cache is not None and t["rank"] not in placeholder_ranks:
+            cache.put(t["title"], item)
+    if unmatched:
+        print(f"⚠️ {len(unmatched)} 条话题没有对应的分析，使用基本模板")
+        metrics.incr("analysis_placeholders", len(unmatched))
+        placeholder_ranks = placeholder_ranks | {t["rank"] for t in unmatched}
+        fresh_items.update((item["rank"], item) for item in placeholder_analyses(unmatched))
+    merged = {**cached_items, **fresh_items}
+    analysis["analyses"] = [merged[t["rank"]] for t in top_topics]
+
+    # 整体洞察必须覆盖全部 Top N：优先使用缓存；单次请求模式下部分命中时，
+    # 本轮回复只涉及未命中的话题，改为按全部 Top N 单独请求
+    summary = cache.get_summary(top_titles) if cache is not None else None
+    if summary is None and missing:
+        if ANALYSIS_FANOUT or len(missing) == len(top_topics):
+            summary = analysis if summary_ok else None
+        else:
+            summary = get_claude_summary(clients.client, top_topics)
+            token_budget().save()
+        if cache is not None and summary and summary.get("trend_insight"):
+            cache.put_summary(top_titles, summary)
+    summary = summary or {}
+    analysis["trend_insight"] = summary.get("trend_insight") or DEFAULT_TREND_INSIGHT
+    analysis["commercial_summary"] = summary.get("commercial_summary") or DEFAULT_COMMERCIAL_SUMMARY
+    if top_topics and not missing:
+        print("✅ 全部命中缓存，跳过 Claude 调用")
+
+    if cache is not None:
+        evicted = cache.evict()
+        if evicted:
+            print(f"🧹 清理过期/超量缓存 {evicted} 条")
+    return analysis
+
+
+def write_reports(topics: list, analysis: dict, snapshot_id: int = None, movers: dict = None,
+                  risers: list = None, timestamp: str = None) -> Path:
+    """生成 HTML / Markdown 报告并更新索引，返回 HTML 报告路径；timestamp 缺省为当前时间"""
     print("\n📝 正在生成报告...")
-    timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M")
+    timestamp = timestamp or datetime.now().strftime("%Y-%m-%d-%H-%M")
     OUTPUT_DIR.mkdir(exist_ok=True)
 
     # HTML 报告
-    html_content = generate_html_report(topics, analysis, timestamp)
+    with metrics.span("render", format="html"):
+        html_content = generate_html_report(topics, analysis, timestamp, movers, risers)
     html_path = OUTPUT_DIR / f"weibo-hot-{timestamp}.html"
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    with metrics.span("write_file", format="html"):
+        write_html_report(html_path, html_content)
     print(f"✅ HTML 报告: {html_path}")
 
     # Markdown 报告
-    md_content = generate_markdown_report(topics, analysis, timestamp)
+    with metrics.span("render", format="markdown"):
+        md_content = generate_markdown_report(topics, analysis, timestamp, movers, risers)
     md_path = OUTPUT_DIR / f"weibo-hot-{timestamp}.md"
-    with open(md_path, "w", encoding="utf-8") as f:
+    with metrics.span("write_file", format="markdown"), open(md_path, "w", encoding="utf-8") as f:
         f.write(md_content)
     print(f"✅ Markdown 报告: {md_path}")
 
+    # 记录本次分析，供 backfill_reports.py 重新渲染
+    if snapshot_id is not None:
+        with SnapshotStore() as store:
+            if not store.has_report(html_path.stem):
+                store.save_report(html_path.stem, snapshot_id, OUTPUT_DIR, analysis)
+
     # 更新 index.html
-    update_index_html(OUTPUT_DIR)
+    with metrics.span("index"):
+        update_index_html(OUTPUT_DIR, html_path.name)
+    with metrics.span("search_index"):
+        update_search_index(OUTPUT_DIR)
+    return html_path
+
+
+def load_last_fingerprint() -> str:
+    """上次生成报告时的 Top N 指纹，没有记录时返回 None"""
+    try:
+        return json.loads(LAST_REPORT_STATE.read_text(encoding="utf-8")).get("fingerprint")
+    except (OSError, ValueError):
+        return None
+
+
+def save_last_fingerprint(fingerprint: str, report_name: str):
+    LAST_REPORT_STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = LAST_REPORT_STATE.with_name(f".{LAST_REPORT_STATE.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"fingerprint": fingerprint, "report": report_name}), encoding="utf-8")
+    os.replace(tmp_path, LAST_REPORT_STATE)
+
+
+def run_pipeline(clients: ClaudeClients, previous_fingerprint: str = None):
+    """执行一轮并记录总耗时和是否生成了报告，见 _run_pipeline"""
+    with metrics.span("pipeline") as pipeline_span:
+        fingerprint, generated = _run_pipeline(clients, previous_fingerprint)
+        pipeline_span.set(generated=generated)
+    metrics.gauge("last_run_timestamp_seconds", round(time.time()))
+    metrics.gauge("report_generated", int(generated))
+    return fingerprint, generated
+
+
+def snapshot_context(store: SnapshotStore, snapshot_id: int, topics: list, verbose: bool = False) -> tuple:
+    """
+    快照对应的排名变化和热度上升最快的话题，只用该快照及之前的数据（重新渲染时与生成报告时一致）
 
-    # 4. 输出摘要
+    Returns:
+        tuple: (movers，没有上一次快照时为 None, risers)
+    """
+    risers = fastest_risers(load_trends(store, until_id=snapshot_id))
+    previous = store.previous(snapshot_id)
+    movers = None
+    if previous is not None:
+        diff = diff_snapshots(previous["data"], topics)
+        movers = summarize_movers(diff)
+        if verbose:
+            print(f"🔀 对比 {previous['fetch_time']}：新上榜 {len(diff['entered'])}，跌出 {len(diff['exited'])}")
+    return movers, risers
+
+
+def clustered_for_report(topics: list, analysis: dict) -> list:
+    """已保存的分析按合并后的列表生成时（分析条目都在合并后的 Top N 中），返回合并后的列表，否则原样返回"""
+    if not TOPIC_CLUSTERING:
+        return topics
+    clustered = cluster_topics(topics)
+    top_ranks = {t["rank"] for t in clustered[:TOP_N]}
+    if all(item["rank"] in top_ranks for item in analysis["analyses"]):
+        return clustered
+    return topics
+
+
+def fetch_and_store():
+    """
+    获取热搜并保存完整快照（模拟数据和数据源返回 304 时不入库），与上一次快照对比排名变化
+
+    Returns:
+        tuple: (获取结果, snapshot_id, movers, risers)，未入库时后三项为 None
+    """
+    result = fetch_topics()
+    if result.get("not_modified"):
+        print("ℹ️ 数据源未更新（304），沿用上次的热搜数据")
+        return result, None, None, None
+    if DEBUG or result.get("source") == "mock":
+        return result, None, None, None
+
+    with metrics.span("snapshot_store"), SnapshotStore() as store:
+        snapshot_id = store.append(result)
+        print(f"📦 快照已保存: #{snapshot_id}")
+        movers, risers = snapshot_context(store, snapshot_id, result["data"], verbose=True)
+    if risers:
+        print(f"🚀 热度上升最快: {risers[0]['title']}（{_format_velocity(risers[0]['velocity'])}）")
+    return result, snapshot_id, movers, risers
+
+
+def _run_pipeline(clients: ClaudeClients, previous_fingerprint: str = None):
+    """
+    执行一轮 获取 -> 入库 -> 分析 -> 生成报告
+
+    Args:
+        previous_fingerprint: 上次生成报告时的 Top N 指纹；与本轮相同时跳过分析和报告
+
+    Returns:
+        tuple: (本轮 Top N 指纹, 是否生成了报告)
+    """
+    result, snapshot_id, movers, risers = fetch_and_store()
+    return report_topics(clients, result["data"], snapshot_id, movers, risers, previous_fingerprint)
+
+
+def report_topics(clients: ClaudeClients, topics: list, snapshot_id: int = None, movers: dict = None,
+                  risers: list = None, previous_fingerprint: str = None, timestamp: str = None):
+    """
+    合并近似重复话题 -> 分析 -> 生成报告；Top N 指纹与 previous_fingerprint 相同时跳过
+
+    Returns:
+        tuple: (本轮 Top N 指纹, 是否生成了报告)
+    """
+    # 近似重复的话题合并为一条，每个簇只分析一次，报告中显示合并后的热度
+    if TOPIC_CLUSTERING:
+        topics = cluster_topics(topics)
+        merged = sum(len(t.get("variants", ())) for t in topics)
+        if merged:
+            print(f"🧩 合并近似重复话题 {merged} 条")
+    top_topics = topics[:TOP_N]
+    fingerprint = topics_fingerprint(top_topics, TOP_N)
+    if previous_fingerprint is not None and fingerprint == previous_fingerprint:
+        print(f"ℹ️ Top {TOP_N} 未变化（指纹 {fingerprint}），跳过分析和报告")
+        return fingerprint, False
+
+    analysis = analyze_topics(clients, top_topics)
+    html_path = write_reports(topics, analysis, snapshot_id, movers, risers, timestamp)
+    if not DEBUG:
+        save_last_fingerprint(fingerprint, html_path.name)
+
+    # 输出摘要
+    print_top_topics(topics)
+    print(f"\n✅ 分析完成！报告已保存到 {OUTPUT_DIR}/")
+    return fingerprint, True
+
+
+def print_top_topics(topics: list, n: int = 3):
     print("\n" + "=" * 60)
-    print("📊 热搜 Top 3 速览")
+    print(f"📊 热搜 Top {n} 速览")
     print("=" * 60)
-    for t in topics[:3]:
+    for t in topics[:n]:
         print(f"{t['rank']}. [{t['category']}] {t['title']}")
         print(f"   热度: {format_hot_value(t['hot_value'])}")
 
-    print(f"\n✅ 分析完成！报告已保存到 {OUTPUT_DIR}/")
+
+def run_daemon(interval: float, jitter: float):
+    """
+    守护进程模式：按 interval（±jitter 比例随机抖动）循环执行，收到 SIGTERM/SIGINT 后
+    完成当前一轮再退出。抓取连接和 Claude 客户端在各轮之间复用。
+    """
+    stop_event = threading.Event()
+
+    def request_stop(signum, _frame):
+        print(f"\n🛑 收到信号 {signal.Signals(signum).name}，当前一轮结束后退出")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    enable_keepalive()
+    clients = ClaudeClients()
+    previous_fingerprint = None if DEBUG else load_last_fingerprint()
+    rounds = 0
+    print(f"🕒 守护进程启动：间隔 {interval:.0f}s（抖动 ±{jitter:.0%}）")
+    try:
+        while not stop_event.is_set():
+            rounds += 1
+            print(f"\n{'=' * 60}\n第 {rounds} 轮 · {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            try:
+                previous_fingerprint, _ = run_pipeline(clients, previous_fingerprint)
+            except PipelineError as e:
+                print(f"❌ {e}")
+            except Exception as e:
+                # 守护进程不因单轮异常退出
+                print(f"❌ 本轮异常: {type(e).__name__}: {e}")
+            metrics.flush()
+
+            delay = interval * (1 + random.uniform(-jitter, jitter))
+            print(f"💤 {delay:.0f}s 后进行下一轮")
+            stop_event.wait(max(delay, 0))
+    finally:
+        clients.close()
+    print("👋 守护进程已退出")
+
+
+def write_github_output(generated: bool):
+    """GitHub Actions 中输出是否生成了新报告，供后续步骤判断"""
+    if os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"generated={'true' if generated else 'false'}\n")
+
+
+def require_api_key():
+    if not ANTHROPIC_API_KEY:
+        print("❌ 错误: 未设置 ANTHROPIC_API_KEY 环境变量")
+        sys.exit(1)
+
+
+def command_run(args):
+    """完整流程（默认命令），--daemon 时循环执行"""
+    require_api_key()
+    if args.daemon:
+        run_daemon(args.interval, args.jitter)
+        return
+
+    clients = ClaudeClients()
+    try:
+        previous_fingerprint = None if args.force or DEBUG else load_last_fingerprint()
+        _, generated = run_pipeline(clients, previous_fingerprint)
+        write_github_output(generated)
+    finally:
+        clients.close()
+
+
+def command_fetch(args):
+    """只获取并保存快照，不导入 anthropic"""
+    result, snapshot_id, _, _ = fetch_and_store()
+    print_top_topics(result["data"])
+    if snapshot_id is not None:
+        print(f"\n✅ 获取完成！之后运行 analyze 分析快照 #{snapshot_id}")
+
+
+def command_analyze(args):
+    """分析快照库中最新（或指定）的快照并生成报告，报告时间取快照的获取时间"""
+    require_api_key()
+    with SnapshotStore() as store:
+        snapshot = store.get(args.snapshot) if args.snapshot else store.latest()
+        if snapshot is None:
+            raise PipelineError(f"快照 #{args.snapshot} 不存在" if args.snapshot else "快照库为空，先运行 fetch")
+        print(f"📦 分析快照 #{snapshot['id']}（{snapshot['fetch_time']}，{len(snapshot['data'])} 条）")
+        movers, risers = snapshot_context(store, snapshot["id"], snapshot["data"], verbose=True)
+
+    timestamp = datetime.strptime(snapshot["fetch_time"], TIME_FORMAT).strftime("%Y-%m-%d-%H-%M")
+    clients = ClaudeClients()
+    try:
+        previous_fingerprint = None if args.force or DEBUG else load_last_fingerprint()
+        _, generated = report_topics(clients, snapshot["data"], snapshot["id"], movers, risers,
+                                     previous_fingerprint, timestamp)
+        write_github_output(generated)
+    finally:
+        clients.close()
+
+
+def command_render(args):
+    """用快照库中保存的分析重新渲染一份报告（默认最新一份），不调用 Claude、不更新索引"""
+    with SnapshotStore() as store:
+        report = store.get_report(args.report)
+        if report is None:
+            raise PipelineError(f"报告 {args.report} 不存在" if args.report else "快照库中没有报告")
+        movers, risers = snapshot_context(store, report["snapshot_id"], report["data"])
+
+    topics = clustered_for_report(report["data"], report["analysis"])
+    timestamp = report["name"].removeprefix("weibo-hot-")
+    output_dir = Path(report["output_dir"])
+    with metrics.span("render", format="html"):
+        html_content = generate_html_report(topics, report["analysis"], timestamp, movers, risers)
+    with metrics.span("render", format="markdown"):
+        md_content = generate_markdown_report(topics, report["analysis"], timestamp, movers, risers)
+
+    html_path = output_dir / f"{report['name']}.html"
+    md_path = output_dir / f"{report['name']}.md"
+    for path, changed in ((html_path, write_html_report(html_path, html_content)),
+                          (md_path, write_if_changed(md_path, md_content.encode("utf-8")))):
+        print(f"✅ 重新渲染: {path}" if changed else f"ℹ️ 内容未变: {path}")
+
+
+def command_notify(args):
+    """推送 Markdown 报告到飞书，默认取 docs/ 下最新一份"""
+    from notify_feishu import notify_report
+
+    webhook_url = os.environ.get("FEISHU_WEBHOOK_URL")
+    if not webhook_url:
+        raise PipelineError("未设置 FEISHU_WEBHOOK_URL 环境变量")
+    # 文件名中的时间戳按字典序即时间顺序
+    md_file = Path(args.md_file) if args.md_file else max(OUTPUT_DIR.glob("weibo-hot-*.md"), default=None)
+    if md_file is None or not md_file.exists():
+        raise PipelineError(f"未找到报告文件: {md_file or OUTPUT_DIR / 'weibo-hot-*.md'}")
+    if not notify_report(webhook_url, md_file):
+        raise PipelineError("飞书通知失败")
+
+
+COMMANDS = {
+    None: command_run,
+    "fetch": command_fetch,
+    "analyze": command_analyze,
+    "render": command_render,
+    "notify": command_notify,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微博热搜分析")
+    parser.add_argument("--daemon", action="store_true", help="守护进程模式，按间隔循环执行")
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL, help="守护进程轮询间隔（秒）")
+    parser.add_argument("--jitter", type=float, default=DAEMON_JITTER, help="间隔随机抖动比例，如 0.1 表示 ±10%%")
+    parser.add_argument("--force", action="store_true", help="Top N 未变化时也重新分析并生成报告")
+    subparsers = parser.add_subparsers(dest="command", title="子命令（省略时执行完整流程）")
+    subparsers.add_parser("fetch", help="只获取热搜并保存快照")
+    analyze_parser = subparsers.add_parser("analyze", help="分析已保存的快照并生成报告")
+    analyze_parser.add_argument("--snapshot", type=int, help="快照 id，默认最新一次")
+    # 默认值 SUPPRESS：不覆盖写在子命令之前的 --force
+    analyze_parser.add_argument("--force", action="store_true", default=argparse.SUPPRESS,
+                                help="Top N 未变化时也重新分析并生成报告")
+    render_parser = subparsers.add_parser("render", help="用已保存的分析重新渲染报告")
+    render_parser.add_argument("--report", help="报告名称，如 weibo-hot-2026-01-18-10-00，默认最新一份")
+    notify_parser = subparsers.add_parser("notify", help="推送 Markdown 报告到飞书")
+    notify_parser.add_argument("md_file", nargs="?", help="Markdown 报告路径，默认 docs/ 下最新一份")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("微博热搜分析")
+    print("=" * 60)
+
+    try:
+        COMMANDS[args.command](args)
+    except PipelineError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        metrics.flush()
 
 
 if __name__ == "__main__":
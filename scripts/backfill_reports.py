@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+批量重新渲染历史报告
+从快照库读取快照和 Claude 分析，用当前模板并行重新生成 HTML 和 Markdown
+
+用法:
+    python scripts/backfill_reports.py                          # 重新渲染全部报告
+    python scripts/backfill_reports.py --since 2026-01-18 --until 2026-01-20
+    python scripts/backfill_reports.py --import-md docs weibo-hot-reports   # 先导入旧的 Markdown 报告
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from analyze_weibo_hot import (
+    clustered_for_report, generate_html_report, generate_markdown_report, snapshot_context, update_index_html,
+    write_html_report,
+)
+from search_index import update_search_index
+from snapshot_store import IMPORT_SOURCE, SnapshotStore, TIME_FORMAT
+from static_site import write_if_changed
+
+REPORT_STEM_RE = re.compile(r"^weibo-hot-(\d{4}-\d{2}-\d{2}-\d{2}-\d{2})$")
+TABLE_ROW_RE = re.compile(r"^\|\s*(\d+)\s*\|(.+)\|(.+)\|(.+)\|\s*$")
+ANALYSIS_HEADING_RE = re.compile(r"^###\s.*?第\s*(\d+)\s*名[：:]\s*(.+?)\s*$")
+CATEGORY_RE = re.compile(r"\*\*分类\*\*[：:]\s*([^|*\n]+)")
+LABEL_SUFFIX_RE = re.compile(r"\s*\(([热新沸](?:,[热新沸])*)\)\s*$")
+EMOJI_LABELS = {"🔥": "is_fei", "🔴": "is_hot", "🆕": "is_new"}
+
+
+def render_report(job: dict) -> tuple:
+    """进程池任务：渲染一份报告，返回 (名称, 写入文件数, 跳过文件数)"""
+    output_dir = Path(job["output_dir"])
+    timestamp = REPORT_STEM_RE.match(job["name"]).group(1)
+    html_content = generate_html_report(job["data"], job["analysis"], timestamp, job.get("movers"), job.get("risers"))
+    md_content = generate_markdown_report(job["data"], job["analysis"], timestamp, job.get("movers"), job.get("risers"))
+    # HTML 连同 .gz / .br 副本写入，副本随 HTML 一起计数
+    results = (
+        write_html_report(output_dir / f"{job['name']}.html", html_content),
+        write_if_changed(output_dir / f"{job['name']}.md", md_content.encode("utf-8")),
+    )
+    written = sum(results)
+    return job["name"], written, len(results) - written
+
+
+def parse_hot_value(text: str) -> int:
+    """把 format_hot_value 的输出还原成整数（111.3万 -> 1113000），忽略其后的 (合并 N 条)"""
+    text = text.split("(")[0].strip()
+    for unit, scale in (("亿", 100000000), ("万", 10000)):
+        if text.endswith(unit):
+            try:
+                return round(float(text[:-1]) * scale)
+            except ValueError:
+                return 0
+    try:
+        return int(float(text))
+    except ValueError:
+        return 0
+
+
+def _section_text(lines: list) -> str:
+    """合并段落文本，遇到分隔线 --- 即结束（其后是条目分隔或页脚）"""
+    kept = []
+    for line in lines:
+        if line.startswith("---"):
+            break
+        if line.strip():
+            kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def parse_markdown_report(text: str) -> tuple:
+    """
+    从旧 Markdown 报告中还原热搜列表和分析结果
+
+    Returns:
+        tuple: (topics, analysis)，无法识别时 topics 为空
+    """
+    topics, analyses = [], []
+    sections = {}
+    current_section = None
+    current_item = None
+    current_field = None
+
+    for line in text.splitlines():
+        if line.startswith("## "):
+            current_section = line[3:].strip()
+            current_item = current_field = None
+            sections[current_section] = []
+            continue
+
+        if "热搜总览" in (current_section or ""):
+            match = TABLE_ROW_RE.match(line)
+            if match:
+                title = match.group(2).strip()
+                flags = {key: False for key in EMOJI_LABELS.values()}
+                label_match = LABEL_SUFFIX_RE.search(title)
+                if label_match:
+                    labels = label_match.group(1).split(",")
+                    flags.update(is_hot="热" in labels, is_new="新" in labels, is_fei="沸" in labels)
+                    title = title[:label_match.start()]
+                for emoji, key in EMOJI_LABELS.items():
+                    if title.startswith(emoji):
+                        flags[key] = True
+                        title = title[len(emoji):].strip()
+                topics.append({
+                    "rank": int(match.group(1)),
+                    "title": title,
+                    "hot_value": parse_hot_value(match.group(3)),
+                    "category": match.group(4).strip(),
+                    "url": f"https://s.weibo.com/weibo?q=%23{title}%23",
+                    "label": "",
+                    **flags,
+                })
+            continue
+
+        if "深度分析" in (current_section or ""):
+            heading = ANALYSIS_HEADING_RE.match(line)
+            if heading:
+                current_item = {"rank": int(heading.group(1)), "title": heading.group(2), "category": "",
+                                "summary": [], "key_points": [], "commercial": []}
+                analyses.append(current_item)
+                current_field = None
+                continue
+            if current_item is None:
+                continue
+            category = CATEGORY_RE.search(line)
+            if category:
+                current_item["category"] = category.group(1).strip()
+            elif line.startswith("#### "):
+                name = line[5:]
+                current_field = ("summary" if "摘要" in name else
+                                 "key_points" if "要点" in name else
+                                 "commercial" if "商业" in name else None)
+            elif current_field == "key_points" and line.startswith("- "):
+                current_item["key_points"].append(line[2:].strip())
+            elif current_field in ("summary", "commercial"):
+                current_item[current_field].append(line)
+            continue
+
+        if current_section is not None:
+            sections[current_section].append(line)
+
+    for item in analyses:
+        item["summary"] = _section_text(item["summary"])
+        item["commercial"] = _section_text(item["commercial"])
+
+    def find_section(keyword):
+        for name, lines in sections.items():
+            if keyword in name:
+                return _section_text(lines)
+        return ""
+
+    analysis = {
+        "analyses": analyses,
+        "trend_insight": find_section("趋势洞察"),
+        "commercial_summary": find_section("商业化机会汇总"),
+    }
+    return topics, analysis
+
+
+def import_markdown_reports(store: SnapshotStore, directories: list) -> int:
+    """把目录中尚未入库的 Markdown 报告导入快照库，返回导入数量"""
+    imported = 0
+    for directory in directories:
+        for path in sorted(Path(directory).glob("weibo-hot-*.md")):
+            match = REPORT_STEM_RE.match(path.stem)
+            if not match or store.has_report(path.stem):
+                continue
+            topics, analysis = parse_markdown_report(path.read_text(encoding="utf-8"))
+            if not topics:
+                print(f"⚠️ 无法解析，跳过: {path}")
+                continue
+            fetch_time = datetime.strptime(match.group(1), "%Y-%m-%d-%H-%M").strftime(TIME_FORMAT)
+            snapshot_id = store.append({"fetch_time": fetch_time, "source": IMPORT_SOURCE, "data": topics})
+            store.save_report(path.stem, snapshot_id, directory, analysis)
+            imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量重新渲染历史报告")
+    parser.add_argument("--since", help="起始日期（含），如 2026-01-18")
+    parser.add_argument("--until", help="结束日期（不含），如 2026-01-20")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数，默认 CPU 核数")
+    parser.add_argument("--output-dir", help="输出目录，默认写回报告原来的目录")
+    parser.add_argument("--import-md", nargs="+", metavar="DIR", help="先导入目录中的旧 Markdown 报告")
+    args = parser.parse_args()
+
+    with SnapshotStore() as store:
+        if args.import_md:
+            imported = import_markdown_reports(store, args.import_md)
+            print(f"📥 导入旧 Markdown 报告 {imported} 份")
+        jobs = list(store.iter_reports(args.since, args.until))
+        # 排名变化和热度趋势与生成报告时一致：只用该快照及之前的数据
+        for job in jobs:
+            job["movers"], job["risers"] = snapshot_context(store, job["snapshot_id"], job["data"])
+            # 生成时做过话题合并的报告按合并后的列表渲染
+            job["data"] = clustered_for_report(job["data"], job["analysis"])
+
+    if args.output_dir:
+        for job in jobs:
+            job["output_dir"] = args.output_dir
+    if not jobs:
+        print("ℹ️ 指定范围内没有可重新渲染的报告")
+        return
+
+    print(f"🔁 重新渲染 {len(jobs)} 份报告（{args.workers} 个进程）...")
+    start = time.perf_counter()
+    written = skipped = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunksize = max(1, len(jobs) // (args.workers * 4))
+        for _, w, s in pool.map(render_report, jobs, chunksize=chunksize):
+            written += w
+            skipped += s
+    elapsed = time.perf_counter() - start
+
+    # 只更新已有首页的目录（docs/），weibo-hot-reports/ 不生成索引；导入的旧报告同时进入检索索引
+    for output_dir in sorted({job["output_dir"] for job in jobs}):
+        if (Path(output_dir) / "index.html").exists():
+            update_index_html(Path(output_dir))
+            update_search_index(Path(output_dir))
+
+    print(f"✅ 完成：写入 {written} 个文件，内容未变跳过 {skipped} 个")
+    print(f"⏱️ 耗时 {elapsed:.2f}s，{len(jobs) / elapsed:.1f} 份报告/秒")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+流水线基准测试
+用合成数据分别计时 抓取 -> 分类 -> 解析 Claude 输出 -> 渲染报告 -> 更新索引 各阶段，
+Claude 用固定响应的桩客户端代替，抓取请求发往本地 HTTP 服务，不访问外部网络
+
+规模:
+    50     50 条热搜，10 条分析，50 份历史报告
+    5k     5000 条热搜，500 条分析，2000 份历史报告
+    500k   500000 条热搜，5000 条分析，20000 份历史报告
+
+用法:
+    python scripts/benchmark.py                              # 全部规模，结果写入 .cache/bench/
+    python scripts/benchmark.py --scales 50,5k --repeat 5
+    python scripts/benchmark.py --compare .cache/bench/bench-20260118-100000.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import analyze_weibo_hot as pipeline
+import fetch_weibo_hot
+
+SCALES = {
+    "50": {"topics": 50, "analyses": 10, "reports": 50},
+    "5k": {"topics": 5000, "analyses": 500, "reports": 2000},
+    "500k": {"topics": 500000, "analyses": 5000, "reports": 20000},
+}
+BENCH_DIR = Path(".cache/bench")
+REGRESSION_RATIO = 1.1  # 对比时中位数变慢超过 10% 视为回退
+
+# 合成标题的词表：前一部分带分类关键词，保证分类器各条路径都被覆盖
+SUBJECTS = ["某明星", "华为", "国足", "A股", "台风", "AI", "NBA", "某电影", "高考", "比特币",
+            "小区业主", "外卖员", "博物馆", "大熊猫", "地铁", "网友"]
+EVENTS = ["官宣恋情", "发布新品", "世预赛", "大涨", "预警", "大模型发布", "总决赛", "票房破10亿", "成绩公布",
+          "价格回落", "回应", "走红", "开馆", "出生", "延长运营", "热议"]
+SUFFIXES = ["", "", "", "最新进展", "现场视频", "后续", "官方回应", "引发热议"]
+
+
+def synthetic_topics(n: int, seed: int = 0) -> list:
+    """生成 n 条与 fetch_weibo_hot_search 返回格式一致的热搜"""
+    rng = random.Random(seed)
+    topics = []
+    hot = 10_000_000
+    for rank in range(1, n + 1):
+        title = f"{rng.choice(SUBJECTS)}{rng.choice(EVENTS)}{rng.choice(SUFFIXES)}"
+        if n > len(SUBJECTS) * len(EVENTS):
+            title += f"{rank}"
+        hot = max(hot - rng.randint(0, 20000), 1)
+        topics.append({
+            "rank": rank,
+            "title": title,
+            "hot_value": hot,
+            "category": "",
+            "url": f"https://s.weibo.com/weibo?q=%23{title}%23",
+            "label": "",
+            "is_hot": rank <= 3,
+            "is_new": rank % 7 == 0,
+            "is_fei": rank == 1,
+        })
+    for topic, category in zip(topics, fetch_weibo_hot.categorize_topics([t["title"] for t in topics])):
+        topic["category"] = category
+    return topics
+
+
+def synthetic_primary_payload(topics: list) -> bytes:
+    """微博官方 API 格式的响应体"""
+    realtime = [
+        {"word": t["title"], "num": t["hot_value"], "label_name": "热" if t["is_hot"] else "",
+         "is_hot": int(t["is_hot"]), "is_new": int(t["is_new"]), "is_fei": int(t["is_fei"])}
+        for t in topics
+    ]
+    return json.dumps({"ok": 1, "data": {"realtime": realtime}}, ensure_ascii=False).encode("utf-8")
+
+
+def synthetic_backup_payload(topics: list) -> bytes:
+    """备用 API 格式的响应体，名次与主 API 错开，用于联合模式合并"""
+    shuffled = topics[1::2] + topics[::2]
+    data = [{"name": t["title"], "hot": t["hot_value"] // 3} for t in shuffled]
+    return json.dumps({"code": 200, "data": data}, ensure_ascii=False).encode("utf-8")
+
+
+def synthetic_analysis(topics: list) -> dict:
+    return {
+        "analyses": [
+            {
+                "rank": t["rank"],
+                "title": t["title"],
+                "category": t["category"],
+                "summary": f"{t['title']}引发广泛关注，相关讨论持续升温，多方回应。",
+                "key_points": ["事件起因", "各方回应", "后续进展"],
+                "commercial": "无明显商业化机会" if t["rank"] % 3 else "品牌可结合话题进行内容营销",
+            }
+            for t in topics
+        ],
+        "trend_insight": "娱乐与科技话题占据主导。",
+        "commercial_summary": "科技类话题商业化潜力较高。",
+    }
+
+
+def synthetic_claude_text(topics: list, mode: str) -> str:
+    """
+    模拟 Claude 的文本输出
+
+    mode: clean 纯 JSON / fenced 包在 ```json 中 / truncated 在最后一条分析中间截断
+    """
+    text = json.dumps(synthetic_analysis(topics), ensure_ascii=False, indent=2)
+    if mode == "fenced":
+        return f"```json\n{text}\n```"
+    if mode == "truncated":
+        cut = text.rfind('"summary"')
+        return text[:cut + 20]
+    return text
+
+
+class StubClaude:
+    """只实现 messages.create 的桩客户端，固定返回给定文本"""
+
+    def __init__(self, text: str):
+        block = SimpleNamespace(type="text", text=text)
+        response = SimpleNamespace(content=[block], stop_reason="end_turn")
+        self.messages = SimpleNamespace(create=lambda **kwargs: response)
+
+
+class StandInServer:
+    """本地 HTTP 服务，代替微博 API 返回固定响应体（支持长连接）"""
+
+    def __init__(self, body: bytes):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # 否则长连接上的小响应会被延迟确认拖慢约 40ms
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ajax/side/hotSearch"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def build_docs_tree(root: Path, reports: int) -> list:
+    """生成 reports 份空的历史报告文件（每 30 分钟一份），返回文件名列表"""
+    root.mkdir(parents=True, exist_ok=True)
+    start = datetime(2024, 1, 1)
+    names = []
+    for i in range(reports):
+        name = f"weibo-hot-{(start + timedelta(minutes=30 * i)).strftime('%Y-%m-%d-%H-%M')}.html"
+        (root / name).touch()
+        names.append(name)
+    return names
+
+
+def measure(fn, repeat: int, budget: float) -> tuple:
+    """执行 fn 至多 repeat 次（至少 1 次，总耗时超过 budget 秒后停止），返回 (每次耗时, 最后一次的返回值)"""
+    runs = []
+    total_start = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = fn()
+        runs.append(time.perf_counter() - start)
+        if time.perf_counter() - total_start > budget:
+            break
+    return runs, output
+
+
+def summarize(scale: str, stage: str, items: int, runs: list) -> dict:
+    median = statistics.median(runs)
+    return {
+        "scale": scale,
+        "stage": stage,
+        "items": items,
+        "runs": len(runs),
+        "min": round(min(runs), 6),
+        "median": round(median, 6),
+        "mean": round(statistics.fmean(runs), 6),
+        "items_per_sec": round(items / median, 1) if median > 0 else None,
+    }
+
+
+def bench_scale(scale: str, sizes: dict, repeat: int, budget: float, workdir: Path) -> list:
+    """跑完一个规模下的全部阶段"""
+    topics = synthetic_topics(sizes["topics"])
+    analysed = topics[:sizes["analyses"]]
+    titles = [t["title"] for t in topics]
+    analysis = synthetic_analysis(analysed)
+    results = []
+
+    def run(stage, items, fn):
+        """items 为条数，或按 fn 的返回值计算实际处理条数的函数"""
+        runs, output = measure(fn, repeat, budget)
+        result = summarize(scale, stage, items(output) if callable(items) else items, runs)
+        print(f"  {stage:<22s} {result['median'] * 1000:>10.2f} ms  {result['items_per_sec'] or 0:>14,.0f} 条/秒")
+        results.append(result)
+
+    # 抓取：请求本地服务并解析、分类（解析阶段只保留前 50 条，吞吐量按实际得到的条数计算）
+    server = StandInServer(synthetic_primary_payload(topics))
+    backup_server = StandInServer(synthetic_backup_payload(topics))
+    fetch_weibo_hot.SOURCES["primary"].url = server.url
+    fetch_weibo_hot.SOURCES["backup"].url = backup_server.url
+    fetch_weibo_hot.FETCH_STATE_FILE = ""
+    # 熔断状态只保存在内存中，不读取本地 .cache/ 下的健康记录
+    fetch_weibo_hot.SOURCE_HEALTH_FILE = ""
+    fetch_weibo_hot._SOURCE_HEALTH = None
+    def fetched(result):
+        return len(result["data"])
+
+    try:
+        fetch_weibo_hot._KEEPALIVE_POOL = None
+        run("fetch", fetched, lambda: fetch_weibo_hot.fetch_weibo_hot_search(federate=False))
+        fetch_weibo_hot.enable_keepalive()
+        run("fetch_keepalive", fetched, lambda: fetch_weibo_hot.fetch_weibo_hot_search(federate=False))
+        # 联合模式：两个数据源并发请求并按标题合并
+        run("fetch_federated", fetched, lambda: fetch_weibo_hot.fetch_weibo_hot_search(federate=True))
+    finally:
+        if fetch_weibo_hot._KEEPALIVE_POOL is not None:
+            fetch_weibo_hot._KEEPALIVE_POOL.close()
+            fetch_weibo_hot._KEEPALIVE_POOL = None
+        server.close()
+        backup_server.close()
+
+    # 解码：原始响应字节按列解析为 HotSnapshot（只保留前 50 条）
+    payload = synthetic_primary_payload(topics)
+    run("decode", len, lambda: fetch_weibo_hot.SOURCES["primary"].decode(payload))
+
+    # 分类
+    run("categorize_topic", len(titles), lambda: [fetch_weibo_hot.categorize_topic(t) for t in titles])
+    run("categorize_topics", len(titles), lambda: fetch_weibo_hot.categorize_topics(titles))
+
+    # Claude 输出解析：桩客户端 + run_claude_analysis（JSON 解析、补全括号、截断恢复）
+    pipeline.ANTHROPIC_STREAM = False
+    for mode in ("clean", "fenced", "truncated"):
+        client = StubClaude(synthetic_claude_text(analysed, mode))
+        run(f"parse_{mode}", len(analysed), lambda: pipeline.run_claude_analysis(client, analysed))
+
+    # 报告渲染（与流水线一样传入按列保存的快照）
+    timestamp = "2026-01-18-10-00"
+    snapshot = pipeline.as_snapshot(topics)
+    run("render_html", len(analysed), lambda: pipeline.generate_html_report(snapshot, analysis, timestamp))
+    run("render_markdown", len(analysed), lambda: pipeline.generate_markdown_report(snapshot, analysis, timestamp))
+
+    # 索引：清单缺失时全量重建，之后每次新增一份报告
+    docs = workdir / f"docs-{scale}"
+    names = build_docs_tree(docs, sizes["reports"])
+    manifest_dir = docs / "manifest"
+
+    def index_rebuild():
+        shutil.rmtree(manifest_dir, ignore_errors=True)
+        pipeline.update_index_html(docs)
+
+    run("index_rebuild", len(names), index_rebuild)
+
+    next_time = datetime(2024, 1, 1) + timedelta(minutes=30 * len(names))
+
+    def index_incremental():
+        nonlocal next_time
+        name = f"weibo-hot-{next_time.strftime('%Y-%m-%d-%H-%M')}.html"
+        next_time += timedelta(minutes=30)
+        (docs / name).touch()
+        pipeline.update_index_html(docs, name)
+
+    run("index_incremental", 1, index_incremental)
+    shutil.rmtree(docs, ignore_errors=True)
+    return results
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": _numpy_version(),
+    }
+
+
+def _numpy_version():
+    try:
+        import numpy
+        return numpy.__version__
+    except ImportError:
+        return None
+
+
+def compare(current: list, baseline_path: Path):
+    """按 (规模, 阶段) 对比中位数耗时"""
+    baseline = {(r["scale"], r["stage"]): r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    print(f"\n📊 与基线对比: {baseline_path}")
+    regressions = 0
+    for r in current:
+        base = baseline.get((r["scale"], r["stage"]))
+        if base is None or not base["median"]:
+            continue
+        ratio = r["median"] / base["median"]
+        flag = "⚠️" if ratio > REGRESSION_RATIO else "  "
+        regressions += ratio > REGRESSION_RATIO
+        print(f"{flag} {r['scale']:>5s} {r['stage']:<22s} {base['median'] * 1000:>10.2f} -> "
+              f"{r['median'] * 1000:>10.2f} ms  x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线基准测试")
+    parser.add_argument("--scales", default=",".join(SCALES), help=f"逗号分隔，可选 {', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段最多重复次数")
+    parser.add_argument("--budget", type=float, default=10.0, help="每个阶段的时间预算（秒），超出后不再重复")
+    parser.add_argument("--output", help="结果 JSON 路径，默认 .cache/bench/bench-<时间>.json")
+    parser.add_argument("--compare", help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"未知规模: {', '.join(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="weibo-bench-") as workdir:
+        for scale in scales:
+            print(f"\n⏱️ 规模 {scale}: {SCALES[scale]}")
+            results.extend(bench_scale(scale, SCALES[scale], args.repeat, args.budget, Path(workdir)))
+
+    output = Path(args.output) if args.output else BENCH_DIR / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"environment": environment_info(), "results": results},
+                                 ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n✅ 结果已保存: {output}")
+
+    if args.compare:
+        regressions = compare(results, Path(args.compare))
+        if regressions:
+            print(f"\n⚠️ {regressions} 个阶段变慢超过 {REGRESSION_RATIO - 1:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+飞书发送器检查
+在本机启动一个模拟飞书 webhook 的 HTTP 服务（http.server），按脚本返回成功、429、5xx、限流错误码或超时，
+检查 notify_feishu 的章节拆分、重试、Retry-After、发送间隔和超时不重发，不需要真实的机器人地址
+
+用法:
+    python scripts/check_feishu.py            # 全部检查通过时退出码为 0
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from notify_feishu import FeishuSender, build_card, format_for_feishu, send_to_feishu, split_for_cards
+
+OK_BODY = {"code": 0, "msg": "success"}
+TIMING_TOLERANCE = 0.02  # 计时误差（秒）
+
+
+class StandInWebhook(ThreadingHTTPServer):
+    """
+    模拟飞书 webhook：依次按 script 中的 (状态码, 响应 JSON, 响应头, 延迟秒数) 应答，用完后一律返回成功
+
+    requests 记录每个请求到达的 (time.monotonic(), 请求 JSON)，ports 记录各请求所用连接的客户端端口
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.script = []
+        self.requests = []
+        self.ports = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/open-apis/bot/v2/hook/check"
+
+    def reset(self, script: list = ()):
+        with self.lock:
+            self.script = list(script)
+            self.requests = []
+            self.ports = []
+
+    def handle_error(self, request, client_address):
+        # 客户端超时后断开，写回响应失败是预期的
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append((time.monotonic(), payload))
+            server.ports.append(self.client_address[1])
+            status, body, headers, delay = server.script.pop(0) if server.script else (200, OK_BODY, {}, 0)
+        if delay:
+            time.sleep(delay)
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def sample_report(sections: int = 4, subsections: int = 3, lines: int = 6) -> str:
+    """结构与热搜报告相同（## 章节、### 小节）的 Markdown"""
+    parts = ["# 微博热搜 Top 10 分析报告\n"]
+    for i in range(1, sections + 1):
+        parts.append(f"\n## 第 {i} 部分\n")
+        for j in range(1, subsections + 1):
+            parts.append(f"\n### 🥇 第 {j} 名：话题 {i}-{j}\n\n")
+            parts.extend(f"- 要点 {k}：{'热度持续上升，网友讨论集中在事件进展。' * 2}\n" for k in range(lines))
+    return "".join(parts)
+
+
+def _gaps(server: StandInWebhook) -> list:
+    times = [t for t, _ in server.requests]
+    return [b - a for a, b in zip(times, times[1:])]
+
+
+def check_chunking(server: StandInWebhook) -> list:
+    """超长报告按章节拆成多张卡片，依次发送且内容完整"""
+    max_length = 900
+    md = sample_report()
+    chunks = split_for_cards(format_for_feishu(md), max_length)
+    server.reset()
+    ok = send_to_feishu(server.url, "检查", md, max_length=max_length)
+    cards = [payload["card"] for _, payload in server.requests]
+    contents = [card["elements"][0]["text"]["content"] for card in cards]
+    titles = [card["header"]["title"]["content"] for card in cards]
+    return [
+        ("全部卡片发送成功", ok),
+        (f"拆分为多张卡片（{len(chunks)} 张）", len(chunks) > 1 and contents == chunks),
+        ("每张卡片不超过长度限制", all(len(c) <= max_length for c in contents)),
+        ("卡片按章节边界切分", all(c.startswith(("#", "-")) for c in contents)),
+        ("拼接后与原文一致（忽略空白）",
+         "".join(contents).replace("\n", "") == format_for_feishu(md).replace("\n", "")),
+        ("标题带序号", titles == [f"检查 ({i}/{len(chunks)})" for i in range(1, len(chunks) + 1)]),
+    ]
+
+
+def check_retry_after(server: StandInWebhook) -> list:
+    """HTTP 429 按 Retry-After 等待后重试，5xx 按退避重试，业务错误不重试"""
+    server.reset([(429, {"msg": "too many requests"}, {"Retry-After": "0.3"}, 0)])
+    sender = FeishuSender(server.url, backoff=0.05, min_interval=0)
+    outcome = sender.send(build_card("检查", "429"))
+    gap = _gaps(server)
+    checks = [
+        ("429 后重试成功", outcome["ok"] and outcome["attempts"] == 2),
+        ("按 Retry-After 等待", bool(gap) and gap[0] >= 0.3 - TIMING_TOLERANCE),
+    ]
+
+    server.reset([(503, {"msg": "busy"}, {}, 0), (200, {"code": 9499, "msg": "rate limited"}, {}, 0)])
+    outcome = sender.send(build_card("检查", "5xx"))
+    checks.append(("5xx 和限流错误码重试后成功", outcome["ok"] and outcome["attempts"] == 3))
+
+    server.reset([(200, {"code": 19021, "msg": "sign match fail"}, {}, 0)])
+    outcome = sender.send(build_card("检查", "sign"))
+    checks.append(("业务错误不重试", not outcome["ok"] and outcome["attempts"] == 1 and len(server.requests) == 1))
+    sender.close()
+    return checks
+
+
+def check_pacing(server: StandInWebhook) -> list:
+    """连续发送时相邻请求至少间隔 min_interval，且复用同一条连接"""
+    min_interval = 0.2
+    server.reset()
+    sender = FeishuSender(server.url, min_interval=min_interval)
+    outcomes = [sender.send(build_card("检查", f"第 {i} 张")) for i in range(5)]
+    sender.close()
+    gaps = _gaps(server)
+    return [
+        ("5 张卡片全部成功", all(o["ok"] for o in outcomes)),
+        (f"相邻请求间隔不小于 {min_interval}s（最小 {min(gaps):.3f}s）", min(gaps) >= min_interval - TIMING_TOLERANCE),
+        ("复用同一条连接", len(set(server.ports)) == 1),
+    ]
+
+
+def check_timeout(server: StandInWebhook) -> list:
+    """请求发出后等待响应超时不重试（飞书可能已经发出卡片）"""
+    server.reset([(200, OK_BODY, {}, 1.0)])
+    sender = FeishuSender(server.url, timeout=0.3, backoff=0.05, min_interval=0)
+    outcome = sender.send(build_card("检查", "timeout"))
+    sender.close()
+    return [
+        ("超时报告失败", not outcome["ok"]),
+        ("只发出一次请求", outcome["attempts"] == 1 and len(server.requests) == 1),
+    ]
+
+
+CHECKS = (check_chunking, check_retry_after, check_pacing, check_timeout)
+
+
+def main() -> int:
+    server = StandInWebhook()
+    failed = 0
+    try:
+        for check in CHECKS:
+            print(f"\n🔍 {check.__doc__.strip()}")
+            for name, passed in check(server):
+                print(f"   {'✅' if passed else '❌'} {name}")
+                failed += not passed
+    finally:
+        server.shutdown()
+    print(f"\n{'✅ 全部检查通过' if not failed else f'❌ {failed} 项检查失败'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
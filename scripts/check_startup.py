@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+启动耗时回归检查
+用 python -X importtime 在子进程中导入各入口模块：重量级依赖（anthropic、NumPy、requests 等）
+只应在用到它们的阶段按需导入，出现在启动阶段即视为回归；同时统计导入耗时的中位数
+
+用法:
+    python scripts/check_startup.py                              # 检查并打印各入口导入耗时，结果写入 .cache/bench/
+    python scripts/check_startup.py --budget-ms 150              # 任一入口导入耗时超过 150ms 视为回归
+    python scripts/check_startup.py --compare .cache/bench/startup-20260118-100000.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+SKILL_SCRIPTS_DIR = SCRIPTS_DIR.parent / ".agent" / "skills" / "weibo-hot-analyzer" / "scripts"
+BENCH_DIR = Path(".cache/bench")
+REGRESSION_RATIO = 1.5  # 启动耗时受磁盘缓存影响较大，对比时中位数变慢超过 50% 才视为回退
+
+# 入口模块 -> 启动时不允许导入的模块（fetch / render / notify 子命令只导入入口模块本身）
+ENTRIES = {
+    "analyze_weibo_hot": ("anthropic", "httpx", "numpy", "requests", "asyncio"),
+    "fetch_weibo_hot": ("anthropic", "httpx", "numpy", "requests", "asyncio"),
+    "notify_feishu": ("anthropic", "httpx", "numpy", "requests", "asyncio"),
+    "backfill_reports": ("anthropic", "httpx", "requests", "asyncio"),
+}
+
+
+def import_profile(module: str) -> list:
+    """
+    在新的解释器中导入 module，解析 -X importtime 输出中属于它的导入树（不含解释器启动时 site 等的导入）
+
+    Returns:
+        list: [(模块名, 层级, 自身耗时 us, 累计耗时 us)]，最后一项为 module 本身
+    """
+    paths = [str(SCRIPTS_DIR), str(SKILL_SCRIPTS_DIR), os.environ.get("PYTHONPATH", "")]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in paths if p))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, timeout=60)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+
+    tree = []
+    for line in proc.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 表头或其他输出
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        tree.append((name.strip(), depth, int(fields[0]), int(fields[1])))
+        if depth == 0:
+            if name.strip() == module:
+                return tree
+            tree = []  # 子进程启动时的其他顶层导入
+    raise RuntimeError(f"importtime 输出中没有 {module}")
+
+
+def check_entry(module: str, forbidden: tuple, repeat: int) -> dict:
+    profiles = [import_profile(module) for _ in range(repeat)]
+    cumulative = [p[-1][3] / 1000 for p in profiles]
+    tree = profiles[0]
+    # 子模块（如 anthropic._client）也算
+    leaked = {name.split(".")[0] for name, *_ in tree} & set(forbidden)
+    children = sorted((entry for entry in tree if entry[1] == 1), key=lambda entry: -entry[3])[:5]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(cumulative), 2),
+        "min_ms": round(min(cumulative), 2),
+        "modules": len(tree),
+        "leaked": sorted(leaked),
+        "slowest": [(name, round(cum / 1000, 2)) for name, _, _, cum in children],
+    }
+
+
+def compare(current: list, baseline_path: Path) -> int:
+    baseline = {r["module"]: r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    print(f"\n📊 与基线对比: {baseline_path}")
+    regressions = 0
+    for r in current:
+        base = baseline.get(r["module"])
+        if base is None or not base["median_ms"]:
+            continue
+        ratio = r["median_ms"] / base["median_ms"]
+        flag = "⚠️" if ratio > REGRESSION_RATIO else "  "
+        regressions += ratio > REGRESSION_RATIO
+        print(f"{flag} {r['module']:<20s} {base['median_ms']:>8.1f} -> {r['median_ms']:>8.1f} ms  x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时回归检查")
+    parser.add_argument("--repeat", type=int, default=5, help="每个入口导入次数，取中位数")
+    parser.add_argument("--budget-ms", type=float, help="单个入口导入耗时上限（毫秒）")
+    parser.add_argument("--output", help="结果 JSON 路径，默认 .cache/bench/startup-<时间>.json")
+    parser.add_argument("--compare", help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    failures = 0
+    results = []
+    for module, forbidden in ENTRIES.items():
+        r = check_entry(module, forbidden, args.repeat)
+        results.append(r)
+        slowest = "  ".join(f"{name} {ms:.1f}" for name, ms in r["slowest"])
+        print(f"⏱️ {module:<20s} {r['median_ms']:>8.1f} ms（{r['modules']} 个模块）  最慢: {slowest}")
+        if r["leaked"]:
+            failures += 1
+            print(f"   ❌ 启动时导入了应按需导入的模块: {', '.join(r['leaked'])}")
+        if args.budget_ms and r["median_ms"] > args.budget_ms:
+            failures += 1
+            print(f"   ❌ 超出预算 {args.budget_ms:.0f} ms")
+
+    output = Path(args.output) if args.output else BENCH_DIR / f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"python": sys.version.split()[0], "results": results},
+                                 ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n✅ 结果已保存: {output}")
+
+    if args.compare:
+        failures += compare(results, Path(args.compare))
+    if failures:
+        print(f"\n⚠️ {failures} 项启动检查未通过")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+报告归档压缩
+把较早的单次报告（HTML + Markdown）按天或按月合并为归档包，docs/ 不再随运行次数无限增长
+
+每个归档包包括:
+    docs/archive-2026-01.html       # 共享外壳：列出包内报告，地址带 #<报告文件名> 时在浏览器中解压数据并显示该报告
+    docs/archive/2026-01.json.gz    # gzip 压缩的报告数据：与当前模板一致的报告只保存各占位符的值，
+                                    # 模板静态片段整包只存一份；旧模板的报告和 Markdown 按行去重，只保存行号
+
+原文件名到「外壳#报告文件名」的对应关系记在 docs/archive/redirects.json，docs/404.html 按它跳转，
+原来的报告地址继续可用；报告清单和索引页直接链接到归档包。
+只归档整个周期都已超出保留期的报告，且从不归档最新一份，归档包写入后一般不会再改写
+（按月打包时每天改写一次当月的包，git 历史反而增长得更快）。
+写入前会解压归档数据逐份还原、与原文件逐字节比对，不一致的报告保留原文件。
+
+用法:
+    python scripts/compact_archive.py                        # 归档 docs/ 中超出保留期（默认 30 天）的报告，按月打包
+    python scripts/compact_archive.py docs --period day --keep-days 7
+    python scripts/compact_archive.py --dry-run              # 只统计能节省多少字节，不改动文件
+    python scripts/compact_archive.py --show weibo-hot-2026-01-18-14-41.md   # 从归档包还原一份报告到标准输出
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from report_index import (
+    ARCHIVE_DIR, OUTPUT_DIR, REDIRECTS_FILE, ReportManifest, load_redirects, month_label, report_entry,
+    write_index_pages,
+)
+from report_template import TEMPLATE_PATH, load_site_template
+from static_site import (
+    PRECOMPRESS_MIN_BYTES, PRECOMPRESSED_SUFFIXES, gzip_bytes, minify_html, precompressed, write_if_changed,
+    write_static,
+)
+
+ARCHIVE_VERSION = 1
+ARCHIVE_KEEP_DAYS = int(os.environ.get("ARCHIVE_KEEP_DAYS", "30"))
+ARCHIVE_PERIOD = os.environ.get("ARCHIVE_PERIOD", "month")
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+REPORT_STEM_RE = re.compile(r"^weibo-hot-(\d{4}-\d{2}-\d{2}-\d{2}-\d{2})$")
+REPORT_SUFFIXES = (".html", ".md")
+
+
+# 外壳脚本：按 #报告文件名 解压并显示报告，没有或找不到时显示包内报告列表
+SHELL_SCRIPT = """
+(() => {
+    const frame = document.getElementById("report");
+    const archive = document.getElementById("archive");
+    const status = document.getElementById("archive-status");
+    const title = document.title;
+    let bundle, blobUrl;
+    // 服务器可能已按 Content-Encoding 解压，仍是 gzip 数据（1f 8b 开头）时才在浏览器中解压
+    const load = () => bundle || (bundle = fetch(archive.dataset.bundle).then(async (r) => {
+        if (!r.ok) throw new Error(r.status);
+        const bytes = new Uint8Array(await r.arrayBuffer());
+        const text = bytes[0] === 0x1f && bytes[1] === 0x8b
+            ? await new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"))).text()
+            : new TextDecoder().decode(bytes);
+        return JSON.parse(text);
+    }));
+    const expand = (data, doc) => doc.slots
+        ? data.template.reduce((out, part, i) => out + (i ? doc.slots[i - 1] : "") + part, "")
+        : doc.lines.map((i) => data.lines[i]).join("\\n");
+
+    function showList(message) {
+        frame.hidden = true;
+        archive.hidden = false;
+        status.textContent = message;
+        document.title = title;
+    }
+
+    async function show() {
+        const name = decodeURIComponent(location.hash.slice(1));
+        if (!name) return showList("");
+        let data;
+        try {
+            data = await load();
+        } catch (e) {
+            bundle = null;
+            return showList("归档数据加载失败，请稍后刷新重试");
+        }
+        const doc = data.reports[name];
+        if (!doc) return showList(`归档中没有 ${name}`);
+        const text = expand(data, doc);
+        if (blobUrl) URL.revokeObjectURL(blobUrl);
+        blobUrl = null;
+        if (name.endsWith(".md")) {
+            frame.removeAttribute("srcdoc");
+            frame.src = blobUrl = URL.createObjectURL(new Blob([text], {type: "text/plain;charset=utf-8"}));
+        } else {
+            // 报告中的相对链接在整个窗口中打开
+            frame.srcdoc = text.replace(/<head>/i, '<head><base target="_top">');
+        }
+        archive.hidden = true;
+        frame.hidden = false;
+    }
+
+    frame.addEventListener("load", () => {
+        document.title = (frame.contentDocument && frame.contentDocument.title) || title;
+    });
+    window.addEventListener("hashchange", show);
+    show();
+})();
+"""
+
+# GitHub Pages 对不存在的路径返回 404.html：按重定向清单跳转到归档包中的报告
+NOT_FOUND_SCRIPT = """
+(async () => {
+    const path = location.pathname;
+    const dir = path.slice(0, path.lastIndexOf("/") + 1);
+    const name = decodeURIComponent(path.slice(dir.length));
+    try {
+        const redirects = await (await fetch(dir + "%s")).json();
+        if (redirects[name]) return location.replace(dir + redirects[name]);
+    } catch (e) {}
+    const link = document.createElement("a");
+    link.href = dir + "index.html";
+    link.textContent = "返回报告列表";
+    document.getElementById("status").replaceChildren("页面不存在，", link);
+})();
+""" % f"{ARCHIVE_DIR}/{REDIRECTS_FILE}"
+
+
+def period_key(stem: str, period: str):
+    """报告所属周期（2026-01 或 2026-01-18），文件名不是报告格式时返回 None"""
+    match = REPORT_STEM_RE.match(stem)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y-%m-%d-%H-%M").strftime(PERIOD_FORMATS[period])
+
+
+def period_end(key: str, period: str) -> datetime:
+    """周期结束（下一周期开始）的时间"""
+    start = datetime.strptime(key, PERIOD_FORMATS[period])
+    if period == "day":
+        return start + timedelta(days=1)
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def period_label(key: str, period: str) -> str:
+    if period == "day":
+        return datetime.strptime(key, PERIOD_FORMATS[period]).strftime("%Y年%m月%d日")
+    return month_label(key)
+
+
+def shell_name(key: str) -> str:
+    return f"archive-{key}.html"
+
+
+def split_template(text: str, parts: list):
+    """按模板静态片段切出各占位符的值，与模板结构不一致时返回 None"""
+    if len(parts) == 1:
+        return [] if text == parts[0] else None
+    head, tail = parts[0], parts[-1]
+    end = len(text) - len(tail)
+    if end < len(head) or not text.startswith(head) or not text.endswith(tail):
+        return None
+    values, pos = [], len(head)
+    for part in parts[1:-1]:
+        i = text.find(part, pos, end)
+        if i < 0:
+            return None
+        values.append(text[pos:i])
+        pos = i + len(part)
+    values.append(text[pos:end])
+    return values
+
+
+class Bundle:
+    """
+    一个归档包的报告数据
+
+    reports 为 {报告文件名: {"slots": [占位符的值]} 或 {"lines": [行号]}}，
+    slots 与 template（当前模板的静态片段）交替拼接、lines 对应 lines 行表中的行用换行连接即为原文。
+    """
+
+    def __init__(self, template: list = None):
+        self.template = template
+        self.lines = []
+        self.reports = {}
+        self._line_ids = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Bundle":
+        obj = json.loads(gzip.decompress(data).decode("utf-8"))
+        bundle = cls(obj.get("template"))
+        bundle.lines = obj["lines"]
+        bundle.reports = obj["reports"]
+        return bundle
+
+    def add(self, name: str, text: str):
+        values = split_template(text, self.template) if self.template and name.endswith(".html") else None
+        if values is not None:
+            self.reports[name] = {"slots": values}
+            return
+        line_ids = self._line_ids
+        ids = []
+        for line in text.split("\n"):
+            i = line_ids.get(line)
+            if i is None:
+                i = line_ids[line] = len(self.lines)
+                self.lines.append(line)
+            ids.append(i)
+        self.reports[name] = {"lines": ids}
+
+    def text(self, name: str) -> str:
+        doc = self.reports[name]
+        if "slots" in doc:
+            values = [""] + doc["slots"]
+            return "".join(value + part for value, part in zip(values, self.template))
+        return "\n".join(self.lines[i] for i in doc["lines"])
+
+    def to_bytes(self) -> bytes:
+        uses_template = any("slots" in doc for doc in self.reports.values())
+        obj = {
+            "version": ARCHIVE_VERSION,
+            "template": self.template if uses_template else None,
+            "lines": self.lines,
+            "reports": dict(sorted(self.reports.items())),
+        }
+        return gzip_bytes(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def render_shell(key: str, period: str, names: list) -> str:
+    """归档包外壳页：包内报告列表（最新的在前）+ 显示报告的 iframe"""
+    label = period_label(key, period)
+    items = "".join(
+        f'        <li class="report-item"><a href="#{name}">{report_entry(name)["name"]}</a></li>\n'
+        for name in sorted((n for n in names if n.endswith(".html")), reverse=True)
+    )
+    return f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>微博热搜报告归档 - {label}</title>
+    <style>
+        html, body {{ height: 100%; margin: 0; }}
+        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; background: #f5f5f5; }}
+        [hidden] {{ display: none !important; }}
+        #report {{ display: block; width: 100%; height: 100%; border: 0; background: white; }}
+        .archive {{ max-width: 800px; margin: 0 auto; padding: 50px 20px; }}
+        h1 {{ color: #333; text-align: center; }}
+        .report-list {{ list-style: none; padding: 0; }}
+        .report-item {{ background: white; margin: 10px 0; padding: 15px 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+        .report-item a {{ color: #0066cc; text-decoration: none; font-size: 18px; }}
+        .report-item a:hover {{ text-decoration: underline; }}
+        .report-date {{ color: #666; font-size: 14px; text-align: center; }}
+        .refresh-btn {{ display: block; width: 200px; margin: 30px auto; padding: 10px 20px; background: #0066cc; color: white; text-align: center; border-radius: 8px; text-decoration: none; }}
+    </style>
+</head>
+<body>
+    <iframe id="report" title="归档报告" hidden></iframe>
+    <main id="archive" class="archive" data-bundle="{ARCHIVE_DIR}/{key}.json.gz">
+        <h1>🗄️ {label} 报告归档</h1>
+        <p id="archive-status" class="report-date"></p>
+        <ul class="report-list">
+{items}        </ul>
+        <a href="index.html" class="refresh-btn">📊 全部报告</a>
+    </main>
+    <script>{SHELL_SCRIPT}</script>
+</body>
+</html>'''
+
+
+def render_not_found() -> str:
+    return f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="robots" content="noindex">
+    <title>页面不存在 - 微博热搜分析报告</title>
+</head>
+<body>
+    <p id="status">正在查找归档的报告…</p>
+    <script>{NOT_FOUND_SCRIPT}</script>
+</body>
+</html>'''
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _with_siblings(path: Path) -> list:
+    return [path] + [path.with_name(path.name + suffix) for suffix in PRECOMPRESSED_SUFFIXES]
+
+
+def _static_size(data: bytes) -> int:
+    """write_static 写入 data 后文件及其 .gz / .br 副本的总字节"""
+    if len(data) < PRECOMPRESS_MIN_BYTES:
+        return len(data)
+    return len(data) + sum(len(v) for v in precompressed(data).values())
+
+
+def plan_compaction(output_dir: Path, keep_days: int, period: str, now: datetime = None) -> dict:
+    """
+    需要归档的报告，按周期分组
+
+    Returns:
+        dict: {周期: [报告文件名 stem]}，只包含整个周期都早于 now - keep_days 的周期，且不含最新报告所在的周期
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=keep_days)
+    by_period = {}
+    for path in output_dir.glob("weibo-hot-*.html"):
+        key = period_key(path.stem, period)
+        if key is not None:
+            by_period.setdefault(key, []).append(path.stem)
+    if not by_period:
+        return {}
+    latest = max(stem for stems in by_period.values() for stem in stems)
+    return {
+        key: sorted(stems) for key, stems in sorted(by_period.items())
+        if latest not in stems and period_end(key, period) <= cutoff
+    }
+
+
+def compact(output_dir: Path, keep_days: int = ARCHIVE_KEEP_DAYS, period: str = ARCHIVE_PERIOD,
+            dry_run: bool = False, now: datetime = None) -> dict:
+    """
+    把超出保留期的报告合并进归档包，删除原文件及其 .gz / .br 副本，更新重定向清单和索引页
+
+    Returns:
+        dict: {"reports": 归档的报告数, "bundles": 写入的归档包数, "removed": 删除的字节, "added": 新增的字节}
+    """
+    output_dir = Path(output_dir)
+    result = {"reports": 0, "bundles": 0, "removed": 0, "added": 0}
+    plan = plan_compaction(output_dir, keep_days, period, now)
+    if not plan:
+        return result
+
+    template_parts = load_site_template(TEMPLATE_PATH)[0].static_parts
+    redirects = load_redirects(output_dir)
+    archive_dir = output_dir / ARCHIVE_DIR
+    redirects_path = archive_dir / REDIRECTS_FILE
+    not_found_path = output_dir / "404.html"
+    before_extra = sum(_file_size(p) for p in _with_siblings(redirects_path) + _with_siblings(not_found_path))
+
+    writes, removals = [], []
+    for key, stems in plan.items():
+        data_path = archive_dir / f"{key}.json.gz"
+        shell_path = output_dir / shell_name(key)
+        bundle = Bundle(template_parts)
+        # 同一周期已有归档包时（保留期调短或补生成了旧报告）合并进去，旧包按当前模板重新编码
+        if data_path.exists():
+            old = Bundle.from_bytes(data_path.read_bytes())
+            for name in old.reports:
+                bundle.add(name, old.text(name))
+
+        originals = {}
+        for stem in stems:
+            for suffix in REPORT_SUFFIXES:
+                path = output_dir / f"{stem}{suffix}"
+                if not path.exists():
+                    continue
+                raw = path.read_bytes()
+                try:
+                    bundle.add(path.name, raw.decode("utf-8"))
+                except UnicodeDecodeError:
+                    print(f"⚠️ {path.name} 不是 UTF-8 文本，保留原文件")
+                    continue
+                originals[path.name] = raw
+
+        data = bundle.to_bytes()
+        restored = Bundle.from_bytes(data)
+        mismatched = [name for name, raw in originals.items() if restored.text(name).encode("utf-8") != raw]
+        if mismatched:
+            print(f"⚠️ {key}: {len(mismatched)} 份报告无法从归档包还原，本周期跳过: {', '.join(mismatched[:3])}")
+            continue
+
+        shell = minify_html(render_shell(key, period, list(bundle.reports))).encode("utf-8")
+        removed = sum(_file_size(p) for name in originals for p in _with_siblings(output_dir / name))
+        removed += _file_size(data_path) + sum(_file_size(p) for p in _with_siblings(shell_path))
+        added = len(data) + _static_size(shell)
+        print(f"🗄️ {shell_name(key)}: {len([n for n in originals if n.endswith('.html')])} 份报告，"
+              f"{removed / 1024:,.1f} KB -> {added / 1024:,.1f} KB")
+
+        for name in originals:
+            redirects[name] = f"{shell_name(key)}#{name}"
+            removals.extend(_with_siblings(output_dir / name))
+        writes.append((data_path, data, False))
+        writes.append((shell_path, shell, True))
+        result["reports"] += len([n for n in originals if n.endswith(".html")])
+        result["bundles"] += 1
+        result["removed"] += removed
+        result["added"] += added
+
+    if not result["bundles"]:
+        return result
+    redirects_json = json.dumps(dict(sorted(redirects.items())), ensure_ascii=False, indent=0).encode("utf-8")
+    not_found = minify_html(render_not_found()).encode("utf-8")
+    result["removed"] += before_extra
+    result["added"] += _static_size(redirects_json) + _static_size(not_found)
+    if dry_run:
+        return result
+
+    for path, data, static in writes + [(redirects_path, redirects_json, True), (not_found_path, not_found, True)]:
+        if static:
+            write_static(path, data)
+        else:
+            write_if_changed(path, data)
+    for path in removals:
+        if path.exists():
+            path.unlink()
+
+    manifest = ReportManifest(output_dir)
+    manifest.rebuild()
+    write_index_pages(manifest, manifest.months())
+    return result
+
+
+def show_report(output_dir: Path, name: str) -> str:
+    """从归档包还原一份已归档的报告"""
+    target = load_redirects(output_dir).get(name)
+    if target is None:
+        raise KeyError(name)
+    key = target.split("#", 1)[0].removeprefix("archive-").removesuffix(".html")
+    bundle = Bundle.from_bytes((Path(output_dir) / ARCHIVE_DIR / f"{key}.json.gz").read_bytes())
+    return bundle.text(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把较早的报告合并为归档包")
+    parser.add_argument("output_dir", nargs="?", default=str(OUTPUT_DIR), help="报告目录（默认 docs）")
+    parser.add_argument("--keep-days", type=int, default=ARCHIVE_KEEP_DAYS,
+                        help=f"最近多少天的报告保留为单独文件（默认 {ARCHIVE_KEEP_DAYS}）")
+    parser.add_argument("--period", choices=sorted(PERIOD_FORMATS), default=ARCHIVE_PERIOD,
+                        help=f"按天或按月打包（默认 {ARCHIVE_PERIOD}）")
+    parser.add_argument("--dry-run", action="store_true", help="只统计能节省多少字节，不改动文件")
+    parser.add_argument("--show", metavar="NAME", help="从归档包还原一份报告（如 weibo-hot-2026-01-18-14-41.md）到标准输出")
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir)
+
+    if args.show:
+        try:
+            sys.stdout.write(show_report(output_dir, args.show))
+        except (KeyError, OSError) as e:
+            print(f"❌ 归档中没有 {args.show}: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    result = compact(output_dir, args.keep_days, args.period, args.dry_run)
+    if not result["bundles"]:
+        print(f"ℹ️ 没有需要归档的报告（保留最近 {args.keep_days} 天，按{'天' if args.period == 'day' else '月'}打包）")
+        return
+    saved = result["removed"] - result["added"]
+    ratio = saved / result["removed"] * 100 if result["removed"] else 0
+    print(f"{'📏 预计' if args.dry_run else '✅ 已'}归档 {result['reports']} 份报告到 {result['bundles']} 个归档包: "
+          f"删除 {result['removed'] / 1024:,.1f} KB，新增 {result['added'] / 1024:,.1f} KB，"
+          f"节省 {saved / 1024:,.1f} KB ({ratio:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
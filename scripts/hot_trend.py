@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+热度趋势
+基于快照库中最近若干次快照，计算每个话题热度的变化速度（/小时）和加速度（/小时²）
+
+窗口较大且安装了 NumPy 时整张窗口矩阵向量化计算，否则逐行用纯 Python 计算，结果一致。
+NumPy 导入本身约需 0.1s，只在窗口足够大、确实要用时才导入。
+
+用法:
+    python scripts/hot_trend.py          # 最近 TREND_WINDOW 次快照中热度上升最快的话题
+    python scripts/hot_trend.py 12       # 指定窗口大小
+"""
+
+import math
+import os
+import sys
+from array import array
+from datetime import datetime
+
+from analysis_cache import normalize_title
+from snapshot_store import SnapshotStore, TIME_FORMAT
+
+# 滑动窗口包含的快照数，至少 3 次才能算出加速度
+TREND_WINDOW = int(os.environ.get("TREND_WINDOW", "6"))
+# 窗口单元格（话题数 × 快照数）达到该数量才使用 NumPy，更小的窗口纯 Python 比导入 NumPy 还快
+NUMPY_MIN_CELLS = int(os.environ.get("TREND_NUMPY_MIN_CELLS", "20000"))
+
+NAN = float("nan")
+
+_np = None
+_np_checked = False
+
+
+def _numpy():
+    """按需导入 NumPy（可选依赖），未安装时返回 None"""
+    global _np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            pass
+    return _np
+
+
+class TrendWindow:
+    """
+    窗口内的热度序列：times 为各次快照时间（小时），values 为 话题数 × 快照数 的扁平 array('d')
+
+    话题未出现在某次快照中（或热度为 0）时对应位置为 NaN；
+    有 NumPy 时 matrix() 直接在同一块内存上构造二维视图，不复制数据。
+    """
+
+    def __init__(self, times: array, keys: list, titles: list, values: array):
+        self.times = times
+        self.keys = keys
+        self.titles = titles
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, rows) -> "TrendWindow":
+        """由 SnapshotStore.hot_value_window 的结果构建"""
+        columns = {}
+        times = array("d")
+        cells = []
+        for snapshot_id, fetch_time, title, hot_value in rows:
+            column = columns.get(snapshot_id)
+            if column is None:
+                column = columns[snapshot_id] = len(times)
+                epoch = datetime.strptime(fetch_time, TIME_FORMAT).timestamp()
+                times.append(epoch / 3600)
+            cells.append((column, title, hot_value))
+
+        width = len(times)
+        index, keys, titles = {}, [], []
+        values = array("d")
+        for column, title, hot_value in cells:
+            key = normalize_title(title)
+            row = index.get(key)
+            if row is None:
+                row = index[key] = len(keys)
+                keys.append(key)
+                titles.append(title)
+                values.extend([NAN] * width)
+            # 同一快照内归一化后重复的标题只取排名靠前的一条（rows 已按排名排序）
+            position = row * width + column
+            if math.isnan(values[position]) and hot_value and hot_value > 0:
+                values[position] = hot_value
+                titles[row] = title  # 展示最近一次出现时的标题
+        return cls(times, keys, titles, values)
+
+    @property
+    def width(self) -> int:
+        return len(self.times)
+
+    def series(self, row: int) -> array:
+        width = self.width
+        return self.values[row * width:(row + 1) * width]
+
+    def matrix(self):
+        np = _numpy()
+        return np.frombuffer(self.values, dtype=np.float64).reshape(len(self.keys), self.width)
+
+
+def _slope(xs: list, ys: list) -> float:
+    """最小二乘斜率，少于 2 个点时返回 NaN"""
+    n = len(xs)
+    if n < 2:
+        return NAN
+    xm = sum(xs) / n
+    ym = sum(ys) / n
+    sxx = sum((x - xm) ** 2 for x in xs)
+    if sxx == 0:
+        return NAN
+    return sum((x - xm) * (y - ym) for x, y in zip(xs, ys)) / sxx
+
+
+def _rates_python(window: TrendWindow) -> tuple:
+    times = window.times
+    dts = [b - a if b > a else NAN for a, b in zip(times, times[1:])]
+    mids = [(a + b) / 2 for a, b in zip(times, times[1:])]
+    velocity, acceleration = [], []
+    for row in range(len(window.keys)):
+        values = window.series(row)
+        rates = [(b - a) / dt for a, b, dt in zip(values, values[1:], dts)]
+        velocity.append(rates[-1] if rates else NAN)
+        valid = [(x, r) for x, r in zip(mids, rates) if not math.isnan(r)]
+        acceleration.append(_slope([x for x, _ in valid], [r for _, r in valid]))
+    return velocity, acceleration
+
+
+def _rates_numpy(window: TrendWindow) -> tuple:
+    np = _numpy()
+    rows = len(window.keys)
+    if window.width < 2:
+        return [NAN] * rows, [NAN] * rows
+    times = np.frombuffer(window.times, dtype=np.float64)
+    matrix = window.matrix()
+    dt = np.diff(times)
+    dt[dt <= 0] = np.nan
+    mids = (times[:-1] + times[1:]) / 2
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = np.diff(matrix, axis=1) / dt
+        # 对每一行有效的速度点做最小二乘，得到速度随时间的斜率
+        mask = ~np.isnan(rates)
+        n = mask.sum(axis=1)
+        x = np.where(mask, mids, 0.0)
+        y = np.where(mask, rates, 0.0)
+        xm = x.sum(axis=1) / n
+        ym = y.sum(axis=1) / n
+        dx = np.where(mask, mids - xm[:, None], 0.0)
+        dy = np.where(mask, rates - ym[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        acceleration = np.where((n >= 2) & (sxx > 0), (dx * dy).sum(axis=1) / sxx, np.nan)
+    return rates[:, -1].tolist(), acceleration.tolist()
+
+
+def compute_trends(window: TrendWindow) -> list:
+    """
+    计算窗口内每个话题的热度变化
+
+    velocity 为最近两次快照之间的热度变化速度，acceleration 为窗口内速度序列的最小二乘斜率；
+    数据不足时为 None。
+
+    Returns:
+        list: [{"title", "hot_value", "velocity", "acceleration", "samples"}]
+    """
+    if not window.keys:
+        return []
+    use_numpy = len(window.values) >= NUMPY_MIN_CELLS and _numpy() is not None
+    velocity, acceleration = (_rates_numpy if use_numpy else _rates_python)(window)
+
+    def clean(value):
+        return None if math.isnan(value) else value
+
+    trends = []
+    for row, title in enumerate(window.titles):
+        values = window.series(row)
+        present = [v for v in values if not math.isnan(v)]
+        latest = values[-1]
+        trends.append({
+            "title": title,
+            "hot_value": None if math.isnan(latest) else int(latest),
+            "velocity": clean(velocity[row]),
+            "acceleration": clean(acceleration[row]),
+            "samples": len(present),
+        })
+    return trends
+
+
+def fastest_risers(trends: list, limit: int = 5) -> list:
+    """热度上升速度最快的话题（速度为正），速度相同按当前热度排序"""
+    rising = [t for t in trends if t["velocity"] is not None and t["velocity"] > 0]
+    rising.sort(key=lambda t: (-t["velocity"], -(t["hot_value"] or 0)))
+    return rising[:limit]
+
+
+def load_trends(store: SnapshotStore, size: int = TREND_WINDOW, until_id: int = None) -> list:
+    """从快照库读取窗口并计算趋势"""
+    return compute_trends(TrendWindow.from_rows(store.hot_value_window(size, until_id)))
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else TREND_WINDOW
+    with SnapshotStore() as store:
+        trends = load_trends(store, size)
+
+    print(f"📈 最近 {size} 次快照，共 {len(trends)} 个话题\n")
+    for t in fastest_risers(trends, limit=20):
+        acceleration = "-" if t["acceleration"] is None else f"{t['acceleration']:+,.0f}/h²"
+        print(f"{t['velocity']:>+14,.0f}/h  {acceleration:>14s}  {t['hot_value']:>12,}  {t['title']}")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+增量 JSON 解析
+逐块喂入 Claude 的输出，analyses 数组中每个对象一闭合就立即解析返回
+"""
+
+import json
+
+# 顶层需要收集的字符串字段
+SUMMARY_FIELDS = ("trend_insight", "commercial_summary")
+
+
+class AnalysisStreamParser:
+    """
+    面向 {"analyses": [{...}, ...], "trend_insight": "...", ...} 的流式解析器
+
+    只跟踪括号深度和字符串状态，不构建完整语法树；响应被截断时，
+    已经闭合的条目仍然保留。第一个 { 之前的内容（如 ```json）会被忽略。
+    缓冲区只保留尚未闭合的条目或顶层字符串，已处理的文本随即丢弃，总开销与输出长度成线性。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self.items = []
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._pending_key = None
+        self._key = None
+        self._in_analyses = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list:
+        """喂入一段文本，返回本次新闭合的 analyses 条目"""
+        self._buffer += chunk
+        text = self._buffer
+        new_items = []
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_top_level_string(self._string_start, i + 1)
+                continue
+
+            if self._depth == 0:
+                # 等待顶层对象开始
+                if c == "{":
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == "{" or c == "[":
+                self._depth += 1
+                if self._depth == 2 and c == "[" and self._key == "analyses":
+                    self._in_analyses = True
+                elif self._in_analyses and self._depth == 3 and c == "{":
+                    self._item_start = i
+            elif c == "}" or c == "]":
+                if self._in_analyses and self._depth == 3 and c == "}" and self._item_start is not None:
+                    item = self._decode(self._item_start, i + 1)
+                    self._item_start = None
+                    if isinstance(item, dict):
+                        self.items.append(item)
+                        new_items.append(item)
+                self._depth -= 1
+                if self._depth == 1:
+                    self._in_analyses = False
+            elif self._depth == 1:
+                if c == ":":
+                    self._key = self._pending_key
+                    self._expect_key = False
+                elif c == ",":
+                    self._key = None
+                    self._expect_key = True
+
+        self._pos = len(text)
+        self._trim()
+        return new_items
+
+    def _trim(self):
+        """丢掉已处理的文本，保留未闭合条目或字符串的开头，位置随之平移"""
+        keep = self._pos
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._pos -= keep
+            self._string_start -= keep
+            if self._item_start is not None:
+                self._item_start -= keep
+
+    def _decode(self, start: int, end: int):
+        try:
+            return json.loads(self._buffer[start:end])
+        except ValueError:
+            return None
+
+    def _end_top_level_string(self, start: int, end: int):
+        value = self._decode(start, end)
+        if self._expect_key:
+            self._pending_key = value
+        elif self._key in SUMMARY_FIELDS:
+            self.fields[self._key] = value
+
+    def result(self) -> dict:
+        """已解析出的内容，缺失的字段不填充"""
+        analysis = {"analyses": list(self.items)}
+        analysis.update(self.fields)
+        return analysis
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+运行指标
+各阶段耗时（span）和计数（counter / gauge），导出为 JSONL 事件日志和 Prometheus 文本格式
+
+默认关闭，WEIBO_METRICS=true 时启用；关闭时 span() 返回共享的空上下文管理器，
+incr() / gauge() 直接返回，几乎没有开销。
+
+用法:
+    with metrics.span("render", format="html"):
+        ...
+    metrics.incr("claude_tokens", usage.input_tokens, direction="input")
+    metrics.flush()   # 追加 JSONL 并重写 .prom 文件
+
+    python scripts/metrics.py            # 汇总 JSONL 日志中各阶段耗时
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+METRICS_ENABLED = os.environ.get("WEIBO_METRICS", "false").lower() == "true"
+METRICS_DIR = Path(os.environ.get("WEIBO_METRICS_DIR", ".cache/metrics"))
+METRICS_PREFIX = "weibo_hot"
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+_events = []      # 尚未写入 JSONL 的事件
+_counters = {}    # (name, labels) -> 累计值
+_gauges = {}      # (name, labels) -> 当前值
+_spans = {}       # (name, labels) -> [次数, 总耗时, 最近一次耗时]
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.labels["error"] = exc_type.__name__
+        key = (self.name, _label_key(self.labels))
+        with _lock:
+            stat = _spans.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = elapsed
+            _events.append({"ts": round(time.time(), 3), "type": "span", "name": self.name,
+                            "seconds": round(elapsed, 6), "labels": self.labels})
+        return False
+
+    def set(self, **labels):
+        """在 span 结束前补充标签（例如实际使用的数据源）"""
+        self.labels.update(labels)
+
+
+def _label_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, _label_value(v)) for k, v in labels.items()))
+
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = flag
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **labels):
+    """计时上下文管理器，退出时记录耗时；异常退出时附加 error 标签"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, labels)
+
+
+def incr(name: str, value: float = 1, **labels):
+    """累加计数器"""
+    if not _enabled:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+        _events.append({"ts": round(time.time(), 3), "type": "counter", "name": name,
+                        "value": value, "labels": labels})
+
+
+def gauge(name: str, value: float, **labels):
+    """设置当前值"""
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[(name, _label_key(labels))] = value
+        _events.append({"ts": round(time.time(), 3), "type": "gauge", "name": name,
+                        "value": value, "labels": labels})
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """当前进程内累计的指标，Prometheus 文本格式（适用于 node_exporter textfile 采集）"""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        spans = sorted(_spans.items())
+
+    typed = set()
+    for (name, labels), value in counters:
+        metric = f"{METRICS_PREFIX}_{name}_total"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    for (name, labels), value in gauges:
+        metric = f"{METRICS_PREFIX}_{name}"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    if spans:
+        metric = f"{METRICS_PREFIX}_stage_seconds"
+        lines.append(f"# HELP {metric} 各阶段耗时")
+        lines.append(f"# TYPE {metric} summary")
+        for (name, labels), (count, total, _) in spans:
+            stage = (("stage", name),)
+            lines.append(f"{metric}_sum{_format_labels(stage, labels)} {total:.6f}")
+            lines.append(f"{metric}_count{_format_labels(stage, labels)} {count}")
+        metric = f"{METRICS_PREFIX}_stage_last_seconds"
+        lines.append(f"# TYPE {metric} gauge")
+        for (name, labels), (_, _, last) in spans:
+            lines.append(f"{metric}{_format_labels((('stage', name),), labels)} {last:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def flush(metrics_dir: Path = None):
+    """把新事件追加到 metrics.jsonl，并原子重写 weibo_hot.prom；未启用时什么都不做"""
+    if not _enabled:
+        return
+    metrics_dir = Path(metrics_dir or METRICS_DIR)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        events = _events[:]
+        _events.clear()
+    if events:
+        with open(metrics_dir / "metrics.jsonl", "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events))
+
+    prom_path = metrics_dir / f"{METRICS_PREFIX}.prom"
+    tmp_path = prom_path.with_name(f".{prom_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(render_prometheus(), encoding="utf-8")
+    os.replace(tmp_path, prom_path)
+
+
+if __name__ == "__main__":
+    import statistics
+
+    log_path = Path(sys.argv[1]) if len(sys.argv) > 1 else METRICS_DIR / "metrics.jsonl"
+    if not log_path.exists():
+        print(f"❌ 日志不存在: {log_path}（设置 WEIBO_METRICS=true 后运行一次）")
+        sys.exit(1)
+
+    durations, totals = {}, {}
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event["type"] == "span":
+                durations.setdefault(event["name"], []).append(event["seconds"])
+            elif event["type"] == "counter":
+                key = event["name"] + _format_labels(_label_key(event["labels"]))
+                totals[key] = totals.get(key, 0) + event["value"]
+
+    print(f"⏱️ 各阶段耗时（{log_path}）")
+    for name, values in sorted(durations.items()):
+        print(f"  {name:<20s} {len(values):>5d} 次  中位数 {statistics.median(values):8.3f}s  最大 {max(values):8.3f}s")
+    print("\n🔢 计数")
+    for key, value in sorted(totals.items()):
+        print(f"  {key:<50s} {value:g}")
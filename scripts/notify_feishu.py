@@ -2,40 +2,105 @@
 """
 飞书群机器人通知脚本 - 完整 Top 10 报告内嵌显示
 无需外部网页链接，所有内容直接在飞书卡片中展示
+
+报告超过单张卡片长度限制时，按章节拆分为多张卡片依次发送；
+复用同一条 HTTP 连接，失败自动重试（指数退避），并控制发送频率不超过机器人限流。
+只用标准库 http.client 发送，不再为几次 POST 导入 requests。
 """
 
+import http.client
 import json
 import os
+import random
 import re
 import sys
+import time
 from pathlib import Path
+from urllib.parse import urlsplit
+
+# 单张卡片正文最大长度（飞书卡片限制约 30000 字符）
+FEISHU_CARD_MAX_LENGTH = int(os.environ.get("FEISHU_CARD_MAX_LENGTH", "28000"))
+FEISHU_TIMEOUT = float(os.environ.get("FEISHU_TIMEOUT", "30"))
+FEISHU_MAX_RETRIES = int(os.environ.get("FEISHU_MAX_RETRIES", "3"))
+FEISHU_BACKOFF = float(os.environ.get("FEISHU_BACKOFF", "1.0"))  # 首次重试等待（秒），之后翻倍
+# 自定义机器人限流 5 次/秒，两张卡片之间至少间隔这么久
+FEISHU_MIN_INTERVAL = float(os.environ.get("FEISHU_MIN_INTERVAL", "0.25"))
+
+# 飞书返回的限流错误码，可以重试
+RATE_LIMIT_CODES = {9499, 11232}
+
+SECTION_RE = re.compile(r"(?m)^(?=## )")
+SUBSECTION_RE = re.compile(r"(?m)^(?=### )")
+
+
+class ResponseTimeout(Exception):
+    """请求已完整发出但等待响应超时：飞书可能已经收到并发出卡片，重试会重复发送"""
 
 
 def format_for_feishu(md_content: str) -> str:
     """将 Markdown 内容格式化为飞书支持的格式"""
     # 移除标题中的 emoji 可能导致的问题
     content = md_content
-    
+
     # 简化一些格式
     content = content.replace('---\n*由 Claude Agent SDK 自动生成*', '')
     content = content.replace('---', '───────')
-    
-    # 限制最大长度（飞书卡片限制约 30000 字符）
-    max_length = 28000
-    if len(content) > max_length:
-        content = content[:max_length] + "\n\n...（内容已截断）"
-    
+
     return content.strip()
 
 
-def send_to_feishu(webhook_url: str, title: str, md_content: str):
-    """发送完整报告到飞书，无外部链接"""
-    import requests
+def _split_lines(block: str, max_length: int) -> list:
+    """按行拆分超长的块，单行仍超长时硬切"""
+    pieces = []
+    for line in block.splitlines(keepends=True):
+        while len(line) > max_length:
+            pieces.append(line[:max_length])
+            line = line[max_length:]
+        pieces.append(line)
+    return pieces
+
+
+def _pack(pieces: list, max_length: int) -> list:
+    """把片段按顺序装入尽量少的块，每块不超过 max_length"""
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_length:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
 
-    formatted_content = format_for_feishu(md_content)
 
-    # 飞书卡片结构 - 纯内容展示，无按钮
-    payload = {
+def split_for_cards(content: str, max_length: int = FEISHU_CARD_MAX_LENGTH) -> list:
+    """
+    按章节边界拆分内容：优先在 "## " 处切分，单个章节超长时在 "### " 处切分，再不行按行切分
+
+    Returns:
+        list: 每张卡片的正文，均不超过 max_length
+    """
+    pieces = []
+    for section in SECTION_RE.split(content):
+        if len(section) <= max_length:
+            pieces.append(section)
+            continue
+        subsections = SUBSECTION_RE.split(section)
+        # 章节标题和第一个小节放在一起，避免标题单独落在上一张卡片末尾
+        if len(subsections) > 1 and len(subsections[0]) + len(subsections[1]) <= max_length:
+            subsections[:2] = [subsections[0] + subsections[1]]
+        for subsection in subsections:
+            if len(subsection) <= max_length:
+                pieces.append(subsection)
+            else:
+                pieces.extend(_split_lines(subsection, max_length))
+    chunks = [chunk.strip() for chunk in _pack([p for p in pieces if p], max_length)]
+    return [chunk for chunk in chunks if chunk]
+
+
+def build_card(title: str, content: str) -> dict:
+    """飞书卡片结构 - 纯内容展示，无按钮"""
+    return {
         "msg_type": "interactive",
         "card": {
             "config": {"wide_screen_mode": True},
@@ -46,26 +111,184 @@ def send_to_feishu(webhook_url: str, title: str, md_content: str):
             "elements": [
                 {
                     "tag": "div",
-                    "text": {"tag": "lark_md", "content": formatted_content}
+                    "text": {"tag": "lark_md", "content": content}
                 }
             ]
         }
     }
 
+
+class FeishuSender:
+    """
+    复用连接的 webhook 发送器（单条 keep-alive 连接）
+
+    每张卡片最多重试 max_retries 次：网络错误、HTTP 429/5xx 和飞书限流错误码会重试，
+    其他业务错误（如签名校验失败）直接失败；请求发出后等待响应超时不重试，避免重复发送。
+    相邻两次请求至少间隔 min_interval 秒。
+
+    Raises:
+        ValueError: webhook_url 不是 http(s) 地址或缺少主机名
+    """
+
+    def __init__(self, webhook_url: str, timeout: float = FEISHU_TIMEOUT, max_retries: int = FEISHU_MAX_RETRIES,
+                 backoff: float = FEISHU_BACKOFF, min_interval: float = FEISHU_MIN_INTERVAL):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.min_interval = min_interval
+        parts = urlsplit(webhook_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            # 地址中含有机器人令牌，不输出到日志
+            raise ValueError("webhook 地址无效，需要 http(s)://主机/路径 格式")
+        self._conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._host, self._port = parts.hostname, parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._conn = None
+        self._last_sent = None
+
+    def _throttle(self):
+        if self._last_sent is not None:
+            wait = self.min_interval - (time.monotonic() - self._last_sent)
+            if wait > 0:
+                time.sleep(wait)
+        self._last_sent = time.monotonic()
+
+    def _retry_delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * (1 + random.random() * 0.1)
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _post(self, body: bytes) -> tuple:
+        """
+        在复用的连接上 POST，返回 (status, headers, body)；空闲连接已被服务端关闭时换新连接重发一次
+
+        Raises:
+            ResponseTimeout: 请求已发出、等待响应超时
+        """
+        reused = self._conn is not None
+        while True:
+            if self._conn is None:
+                self._conn = self._conn_class(self._host, self._port, timeout=self.timeout)
+            sent = False
+            try:
+                self._conn.request("POST", self._path, body=body,
+                                   headers={"Content-Type": "application/json; charset=utf-8"})
+                sent = True
+                response = self._conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._drop_connection()
+                if not reused:
+                    raise
+                reused = False
+                continue
+            except TimeoutError as e:
+                self._drop_connection()
+                if sent:
+                    raise ResponseTimeout(f"等待响应超时（{self.timeout:g}s），卡片可能已发送，不再重试") from e
+                raise
+            except BaseException:
+                self._drop_connection()
+                raise
+            if response.will_close:
+                self._drop_connection()
+            return response.status, response.headers, data
+
+    def send(self, payload: dict) -> dict:
+        """
+        发送一张卡片
+
+        Returns:
+            dict: {"ok", "latency"（最后一次请求耗时，秒）, "attempts", "result"/"error"}
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        attempt = 0
+        while True:
+            self._throttle()
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                status, headers, data = self._post(body)
+                latency = time.perf_counter() - start
+                if status == 429 or status >= 500:
+                    retry_after = headers.get("Retry-After")
+                    outcome = {"ok": False, "error": f"HTTP {status}", "retryable": True}
+                else:
+                    result = json.loads(data)
+                    code = result.get("code", result.get("StatusCode"))
+                    outcome = {"ok": code == 0, "result": result, "retryable": code in RATE_LIMIT_CODES}
+            except ResponseTimeout as e:
+                latency = time.perf_counter() - start
+                outcome = {"ok": False, "error": str(e), "retryable": False}
+            except (OSError, http.client.HTTPException) as e:
+                latency = time.perf_counter() - start
+                outcome = {"ok": False, "error": str(e), "retryable": True}
+            except ValueError as e:
+                latency = time.perf_counter() - start
+                outcome = {"ok": False, "error": f"响应不是 JSON: {e}", "retryable": False}
+
+            attempt += 1
+            retryable = outcome.pop("retryable")
+            outcome.update(latency=latency, attempts=attempt)
+            if outcome["ok"] or not retryable or attempt > self.max_retries:
+                return outcome
+            delay = self._retry_delay(attempt - 1, retry_after)
+            print(f"⏳ 第 {attempt} 次发送失败（{outcome.get('error') or outcome.get('result')}），{delay:.1f}s 后重试")
+            time.sleep(delay)
+
+    def close(self):
+        self._drop_connection()
+
+
+def send_to_feishu(webhook_url: str, title: str, md_content: str, max_length: int = FEISHU_CARD_MAX_LENGTH) -> bool:
+    """发送完整报告到飞书，无外部链接；内容超过 max_length 时拆分为多张卡片，全部成功返回 True"""
+    formatted_content = format_for_feishu(md_content)
+    chunks = split_for_cards(formatted_content, max_length)
+    total = len(chunks)
+
     try:
-        response = requests.post(webhook_url, json=payload, timeout=30)
-        result = response.json()
-        if result.get("code") == 0:
-            print("✅ 飞书通知发送成功")
-            print(f"📄 内容长度: {len(formatted_content)} 字符")
-            return True
-        else:
-            print(f"❌ 飞书通知失败: {result}")
-            print(f"响应详情: {json.dumps(result, ensure_ascii=False)}")
-            return False
-    except Exception as e:
-        print(f"❌ 飞书通知异常: {e}")
+        sender = FeishuSender(webhook_url)
+    except ValueError as e:
+        print(f"❌ 飞书通知失败: {e}")
         return False
+    try:
+        for index, chunk in enumerate(chunks, start=1):
+            card_title = title if total == 1 else f"{title} ({index}/{total})"
+            outcome = sender.send(build_card(card_title, chunk))
+            retry_info = f"，重试 {outcome['attempts'] - 1} 次" if outcome["attempts"] > 1 else ""
+            if not outcome["ok"]:
+                print(f"❌ 飞书通知失败（卡片 {index}/{total}{retry_info}）: "
+                      f"{outcome.get('error') or json.dumps(outcome.get('result'), ensure_ascii=False)}")
+                if index < total:
+                    print(f"⚠️ 剩余 {total - index} 张卡片未发送")
+                return False
+            print(f"✅ 卡片 {index}/{total} 发送成功：{len(chunk)} 字符，"
+                  f"耗时 {outcome['latency'] * 1000:.0f}ms{retry_info}")
+    finally:
+        sender.close()
+
+    print(f"✅ 飞书通知发送成功（共 {total} 张卡片）")
+    print(f"📄 内容长度: {len(formatted_content)} 字符")
+    return True
+
+
+def notify_report(webhook_url: str, md_file: Path, timestamp: str = None) -> bool:
+    """推送一份 Markdown 报告，timestamp 缺省时取文件名中的时间（weibo-hot-2026-01-18-10-00.md）"""
+    md_content = Path(md_file).read_text(encoding="utf-8")
+    print(f"📄 原始内容长度: {len(md_content)} 字符")
+
+    timestamp = timestamp or Path(md_file).stem.replace("weibo-hot-", "")
+    title = f"📊 微博热搜 Top 10 分析 - {timestamp.replace('-', '/')}"
+    return send_to_feishu(webhook_url, title, md_content)
 
 
 if __name__ == "__main__":
@@ -86,13 +309,4 @@ if __name__ == "__main__":
         print(f"❌ 文件不存在: {md_file}")
         sys.exit(1)
 
-    # 读取完整 Markdown 内容
-    with open(md_file, "r", encoding="utf-8") as f:
-        md_content = f.read()
-
-    print(f"📄 原始内容长度: {len(md_content)} 字符")
-
-    title = f"📊 微博热搜 Top 10 分析 - {timestamp.replace('-', '/')}"
-
-    send_to_feishu(webhook_url, title, md_content)
-
+    notify_report(webhook_url, md_file, timestamp)
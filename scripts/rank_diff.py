@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+热搜排名变化
+对比两次快照（按归一化标题匹配），计算新上榜、跌出榜单、排名和热度变化
+
+用法:
+    python scripts/rank_diff.py                 # 对比快照库中最近两次快照
+    python scripts/rank_diff.py <旧快照id> <新快照id>
+"""
+
+import sys
+
+from analysis_cache import normalize_title
+from snapshot_store import SnapshotStore
+
+
+def _hot(item: dict) -> int:
+    try:
+        return int(item["hot_value"] or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def diff_snapshots(previous: list, current: list) -> dict:
+    """
+    对比两次快照的热搜列表，O(n) 时间
+
+    rank_delta 为正表示排名上升（数字变小），hot_delta 为热度增量。
+
+    Returns:
+        dict: {
+            "entered": [{"title", "rank", "hot_value"}],
+            "exited": [{"title", "previous_rank", "hot_value"}],
+            "moved": [{"title", "rank", "previous_rank", "rank_delta", "hot_value", "hot_delta"}],
+        }
+    """
+    previous_by_key = {}
+    for item in previous:
+        previous_by_key.setdefault(normalize_title(item["title"]), item)
+
+    entered, moved = [], []
+    seen = set()
+    for item in current:
+        key = normalize_title(item["title"])
+        if key in seen:
+            continue
+        seen.add(key)
+        old = previous_by_key.get(key)
+        if old is None:
+            entered.append({"title": item["title"], "rank": item["rank"], "hot_value": item["hot_value"]})
+            continue
+        moved.append({
+            "title": item["title"],
+            "rank": item["rank"],
+            "previous_rank": old["rank"],
+            "rank_delta": old["rank"] - item["rank"],
+            "hot_value": item["hot_value"],
+            "hot_delta": _hot(item) - _hot(old),
+        })
+
+    exited = [
+        {"title": item["title"], "previous_rank": item["rank"], "hot_value": item["hot_value"]}
+        for key, item in previous_by_key.items() if key not in seen
+    ]
+    return {"entered": entered, "exited": exited, "moved": moved}
+
+
+def summarize_movers(diff: dict, limit: int = 5) -> dict:
+    """
+    挑出报告中展示的变化：新上榜、上升最多、下降最多、跌出榜单（各最多 limit 条）
+    """
+    moved = diff["moved"]
+    climbers = sorted((m for m in moved if m["rank_delta"] > 0), key=lambda m: (-m["rank_delta"], m["rank"]))
+    fallers = sorted((m for m in moved if m["rank_delta"] < 0), key=lambda m: (m["rank_delta"], m["rank"]))
+    return {
+        "entered": sorted(diff["entered"], key=lambda m: m["rank"])[:limit],
+        "climbers": climbers[:limit],
+        "fallers": fallers[:limit],
+        "exited": sorted(diff["exited"], key=lambda m: m["previous_rank"])[:limit],
+    }
+
+
+def format_rank_delta(delta: int) -> str:
+    if delta > 0:
+        return f"↑{delta}"
+    if delta < 0:
+        return f"↓{-delta}"
+    return "-"
+
+
+if __name__ == "__main__":
+    with SnapshotStore() as store:
+        if len(sys.argv) == 3:
+            old, new = store.get(int(sys.argv[1])), store.get(int(sys.argv[2]))
+        elif len(sys.argv) == 1:
+            recent = store.recent(2)
+            new, old = (recent + [None, None])[:2]
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if old is None or new is None:
+        print("❌ 快照不足或不存在，无法对比")
+        sys.exit(1)
+
+    diff = diff_snapshots(old["data"], new["data"])
+    print(f"🔀 {old['fetch_time']} (#{old['id']}) → {new['fetch_time']} (#{new['id']})")
+    print(f"   新上榜 {len(diff['entered'])} · 跌出 {len(diff['exited'])} · "
+          f"上升 {sum(m['rank_delta'] > 0 for m in diff['moved'])} · 下降 {sum(m['rank_delta'] < 0 for m in diff['moved'])}\n")
+
+    for item in diff["entered"]:
+        print(f"🆕 #{item['rank']:<3d} {item['title']}")
+    for item in sorted(diff["moved"], key=lambda m: m["rank"]):
+        if item["rank_delta"]:
+            print(f"{format_rank_delta(item['rank_delta']):>4s} #{item['rank']:<3d} {item['title']}  热度 {item['hot_delta']:+d}")
+    for item in diff["exited"]:
+        print(f"👋 原#{item['previous_rank']:<3d} {item['title']}")
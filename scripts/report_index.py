@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+报告索引清单
+按月份记录已生成的报告，新增报告时只追加一行清单并重写当月分页和首页
+
+目录结构:
+    docs/manifest/state.json      # 版本、最新报告、每月报告数
+    docs/manifest/2026-01.jsonl   # 当月报告清单，每行一条
+    docs/index.html               # 首页：月份导航 + 最新一个月
+    docs/index-2026-01.html       # 月份分页
+    docs/archive/redirects.json   # 已归档报告的原文件名 -> 归档包地址（compact_archive.py 生成）
+
+索引页和报告一样去掉多余空白并生成 .gz / .br 副本，内容不变时不改写。
+已归档的报告仍按原文件名记在清单中，链接指向归档包。
+页面顶部的搜索框读取 docs/search/ 下的静态分片（search_index.py 导出），在浏览器中按标题检索全部历史热搜。
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from static_site import minify_html, write_static
+
+OUTPUT_DIR = Path("docs")  # 报告和索引页所在目录
+MANIFEST_VERSION = 2
+REPORT_NAME_RE = re.compile(r"^weibo-hot-(\d{4}-\d{2})-\d{2}-\d{2}-\d{2}$")
+OTHER_MONTH = "other"
+ARCHIVE_DIR = "archive"
+REDIRECTS_FILE = "redirects.json"
+# 索引页每轮都会重写且随报告数增长，brotli 用较低级别（11 级压缩 2000 条的分页约需 0.3s，9 级只需几毫秒）
+INDEX_BROTLI_QUALITY = 9
+
+
+# 搜索框脚本：与 search_index.py 相同的归一化和 bigram 分片算法，候选标题在标题分片中逐条确认
+SEARCH_SCRIPT = """
+(() => {
+    const input = document.getElementById("search-input");
+    const status = document.getElementById("search-status");
+    const list = document.getElementById("search-results");
+    const MAX_CANDIDATES = 200, MAX_RESULTS = 50;
+    const files = {};
+    const load = (name) => files[name] || (files[name] = fetch("search/" + name, {cache: "no-cache"})
+        .then((r) => r.ok ? r.json() : {}).catch(() => ({})));
+    const normalize = (s) => s.normalize("NFKC").replace(/[#\\s]+/g, "").toLowerCase();
+    const bigrams = (text) => {
+        const chars = Array.from(text), grams = new Set();
+        for (let i = 0; i + 1 < chars.length; i++) grams.add(chars[i] + chars[i + 1]);
+        return [...grams];
+    };
+    const shard = (gram, meta) => {
+        const [a, b] = Array.from(gram);
+        return "grams-" + String((a.codePointAt(0) * 31 + b.codePointAt(0)) % meta.shards).padStart(2, "0") + ".json";
+    };
+
+    async function search(text) {
+        const meta = await load("meta.json");
+        if (!meta.shards) return {error: "搜索索引尚未生成"};
+        const grams = bigrams(text);
+        if (!grams.length) return {error: "请至少输入两个字"};
+        const head = await load("grams-head.json");
+        const lists = await Promise.all(grams.map((g) => load(shard(g, meta)).then((s) => (s[g] || []).concat(head[g] || []))));
+        // 各列表 id 升序；id 越大越晚首次上榜，候选过多时保留最新的
+        let ids = lists.reduce((acc, l) => { const set = new Set(l); return acc.filter((id) => set.has(id)); });
+        ids = ids.slice(-MAX_CANDIDATES);
+        const blocks = [...new Set(ids.map((id) => Math.floor(id / meta.block)))];
+        const records = Object.assign({}, ...await Promise.all(blocks.map((b) => load("titles-" + b + ".json"))));
+        const rows = ids.map((id) => records[id]).filter((r) => r && normalize(r[0]).includes(text));
+        rows.sort((x, y) => y[1].localeCompare(x[1]));
+        return {rows: rows.slice(0, MAX_RESULTS)};
+    }
+
+    function render(rows) {
+        list.textContent = "";
+        for (const [title, last, first, count, best, report] of rows) {
+            const item = document.createElement("li");
+            item.className = "report-item";
+            const link = document.createElement(report ? "a" : "span");
+            if (report) link.href = report;
+            link.textContent = title;
+            const info = document.createElement("div");
+            info.className = "report-date";
+            info.textContent = `最近上榜 ${last} · 首次 ${first} · 共 ${count} 次 · 最高第 ${best} 名`;
+            item.append(link, info);
+            list.append(item);
+        }
+    }
+
+    let timer;
+    input.addEventListener("input", () => {
+        clearTimeout(timer);
+        timer = setTimeout(async () => {
+            const text = normalize(input.value);
+            if (!text) { list.textContent = ""; status.textContent = ""; return; }
+            const result = await search(text);
+            if (normalize(input.value) !== text) return;
+            render(result.rows || []);
+            status.textContent = result.error || (result.rows.length ? `找到 ${result.rows.length} 个话题` : "没有找到相关热搜");
+        }, 200);
+    });
+})();
+"""
+
+
+def _atomic_write(path: Path, content: str):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def load_redirects(output_dir: Path) -> dict:
+    """已归档报告的 {原文件名: 归档包地址}，还没有归档时为空"""
+    try:
+        with open(Path(output_dir) / ARCHIVE_DIR / REDIRECTS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def report_entry(filename: str, url: str = None) -> dict:
+    """根据报告文件名生成清单条目，url 为空时链接到报告文件本身（已归档的报告传入归档包地址）"""
+    stem = Path(filename).stem
+    date_str = stem.replace("weibo-hot-", "")
+    try:
+        dt = datetime.strptime(date_str, "%Y-%m-%d-%H-%M")
+        date_formatted = dt.strftime("%Y年%m月%d日 %H:%M")
+    except ValueError:
+        date_formatted = date_str
+    match = REPORT_NAME_RE.match(stem)
+    return {
+        "file": f"{stem}.html",
+        "url": url or f"{stem}.html",
+        "name": f"📊 {date_formatted} 微博热搜报告",
+        "date": date_formatted,
+        "month": match.group(1) if match else OTHER_MONTH,
+    }
+
+
+def month_label(month: str) -> str:
+    if month == OTHER_MONTH:
+        return "其他"
+    year, mon = month.split("-")
+    return f"{year}年{mon}月"
+
+
+def month_page(month: str) -> str:
+    return f"index-{month}.html"
+
+
+class ReportManifest:
+    """docs/manifest 下的报告清单"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.dir = self.output_dir / "manifest"
+        self.state_path = self.dir / "state.json"
+        self.state = None
+
+    def _month_path(self, month: str) -> Path:
+        return self.dir / f"{month}.jsonl"
+
+    def load(self) -> bool:
+        """读取状态文件，缺失、版本不符或最新报告已不存在时视为过期，返回是否可用"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("version") != MANIFEST_VERSION:
+            return False
+        latest = state.get("latest")
+        if latest and not (self.output_dir / latest).exists():
+            return False
+        self.state = state
+        return True
+
+    def save(self):
+        _atomic_write(self.state_path, json.dumps(self.state, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def rebuild(self):
+        """全量扫描 output_dir 和归档重定向清单重建清单（仅在清单缺失、过期或归档后调用）"""
+        files = {f.name for f in self.output_dir.glob("weibo-hot-*.html")}
+        # 归档后又重新生成的报告以单独的文件为准
+        archived = {name: url for name, url in load_redirects(self.output_dir).items()
+                    if name.endswith(".html") and name not in files}
+        by_month = {}
+        for name in sorted(files | archived.keys()):
+            entry = report_entry(name, archived.get(name))
+            by_month.setdefault(entry["month"], []).append(entry)
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.dir.glob("*.jsonl"):
+            if stale.stem not in by_month:
+                stale.unlink()
+        for month, entries in by_month.items():
+            _atomic_write(self._month_path(month), "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+
+        latest = max((e["file"] for entries in by_month.values() for e in entries), default=None)
+        self.state = {
+            "version": MANIFEST_VERSION,
+            "latest": latest,
+            "months": {month: len(entries) for month, entries in by_month.items()},
+        }
+        self.save()
+        return list(by_month)
+
+    def month_entries(self, month: str) -> list:
+        """读取某个月的清单，按时间倒序"""
+        try:
+            with open(self._month_path(month), "r", encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            return []
+        return sorted(entries, key=lambda e: e["file"], reverse=True)
+
+    def add(self, filename: str) -> str:
+        """追加一条报告，已存在时不重复添加，返回所属月份"""
+        entry = report_entry(filename)
+        month = entry["month"]
+        if any(e["file"] == entry["file"] for e in self.month_entries(month)):
+            return month
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self._month_path(month), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        months = self.state["months"]
+        months[month] = months.get(month, 0) + 1
+        if self.state.get("latest") is None or entry["file"] > self.state["latest"]:
+            self.state["latest"] = entry["file"]
+        self.save()
+        return month
+
+    def months(self) -> list:
+        """所有月份，最新的在前"""
+        return sorted(self.state["months"], key=lambda m: (m != OTHER_MONTH, m), reverse=True)
+
+
+def render_index_page(entries: list, months: list, current: str, counts: dict) -> str:
+    """生成索引页 HTML：月份导航 + 当前月份的报告列表"""
+    nav = "".join(
+        f'<a href="{month_page(m)}" class="month-link{" active" if m == current else ""}">'
+        f'{month_label(m)} ({counts.get(m, 0)})</a>'
+        for m in months
+    )
+    items = "".join(
+        f'        <li class="report-item"><a href="{r["url"]}">{r["name"]}</a></li>\n'
+        for r in entries
+    )
+    return f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>微博热搜分析报告 - {month_label(current) if current else "暂无报告"}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px; background: #f5f5f5; }}
+        h1 {{ color: #333; text-align: center; }}
+        h2 {{ color: #555; font-size: 18px; }}
+        .subtitle {{ text-align: center; color: #666; margin-bottom: 30px; }}
+        .month-nav {{ display: flex; flex-wrap: wrap; gap: 8px; justify-content: center; margin-bottom: 20px; }}
+        .month-link {{ padding: 6px 12px; border-radius: 16px; background: white; color: #0066cc; text-decoration: none; font-size: 14px; box-shadow: 0 1px 2px rgba(0,0,0,0.1); }}
+        .month-link.active {{ background: #0066cc; color: white; }}
+        .report-list {{ list-style: none; padding: 0; }}
+        .report-item {{ background: white; margin: 10px 0; padding: 15px 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+        .report-item a {{ color: #0066cc; text-decoration: none; font-size: 18px; }}
+        .report-item a:hover {{ text-decoration: underline; }}
+        .report-date {{ color: #666; font-size: 14px; margin-top: 5px; }}
+        .refresh-btn {{ display: block; width: 200px; margin: 30px auto; padding: 10px 20px; background: #0066cc; color: white; text-align: center; border-radius: 8px; text-decoration: none; }}
+        .refresh-btn:hover {{ background: #0055aa; }}
+        .search-box input {{ box-sizing: border-box; width: 100%; padding: 10px 16px; border: 1px solid #ddd; border-radius: 8px; font-size: 16px; }}
+    </style>
+</head>
+<body>
+    <h1>📊 微博热搜分析报告</h1>
+    <p class="subtitle">自动生成 · 每日更新</p>
+    <form class="search-box" role="search" onsubmit="return false">
+        <input id="search-input" type="search" placeholder="搜索历史热搜：人名、品牌、事件" autocomplete="off">
+    </form>
+    <p id="search-status" class="report-date"></p>
+    <ul id="search-results" class="report-list"></ul>
+    <nav class="month-nav">{nav}</nav>
+    <h2>{month_label(current) if current else "暂无报告"}</h2>
+    <ul class="report-list">
+{items}    </ul>
+    <a href="./" class="refresh-btn">🔄 刷新列表</a>
+    <script>{SEARCH_SCRIPT}</script>
+</body>
+</html>'''
+
+
+def write_index_pages(manifest: ReportManifest, changed_months: list):
+    """重写指定月份的分页，并用最新月份重写首页"""
+    months = manifest.months()
+    counts = manifest.state["months"]
+    output_dir = manifest.output_dir
+    latest_month = months[0] if months else None
+
+    for month in changed_months:
+        html = render_index_page(manifest.month_entries(month), months, month, counts)
+        write_static(output_dir / month_page(month), minify_html(html), INDEX_BROTLI_QUALITY)
+
+    # 月份导航会随新月份变化，首页始终重写
+    entries = manifest.month_entries(latest_month) if latest_month else []
+    html = minify_html(render_index_page(entries, months, latest_month, counts))
+    write_static(output_dir / "index.html", html, INDEX_BROTLI_QUALITY)
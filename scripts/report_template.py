@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+报告模板引擎
+模板只解析一次：拆成静态片段和 {{SLOT}} 占位符，渲染时一次 join 完成替换
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from static_site import extract_stylesheet, minify_html
+
+SLOT_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+# 报告模板在 .agent/skills/weibo-hot-analyzer/assets/ 目录下
+TEMPLATE_PATH = Path(__file__).parent.parent / ".agent" / "skills" / "weibo-hot-analyzer" / "assets" / "report-template.html"
+
+
+class CompiledTemplate:
+    """
+    预编译模板
+
+    _parts 为 [静态片段, 占位符, 静态片段, ...]，_slots 记录占位符在 _parts 中的位置，
+    同名占位符可以出现多次。
+    """
+
+    def __init__(self, text: str):
+        self._parts = []
+        self._slots = []
+        pos = 0
+        for match in SLOT_RE.finditer(text):
+            self._parts.append(text[pos:match.start()])
+            self._slots.append((len(self._parts), match.group(1)))
+            self._parts.append("")
+            pos = match.end()
+        self._parts.append(text[pos:])
+
+    @property
+    def slot_names(self) -> set:
+        return {name for _, name in self._slots}
+
+    @property
+    def static_parts(self) -> list:
+        """各占位符之间的静态片段（比占位符多一个），按顺序与占位符的值交替拼接即为渲染结果"""
+        return self._parts[0::2]
+
+    def render(self, values: dict) -> str:
+        """
+        填充占位符（values 中的内容需调用方自行转义）
+
+        Raises:
+            KeyError: 缺少某个占位符的值
+        """
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            parts[index] = values[name]
+        return "".join(parts)
+
+
+@lru_cache(maxsize=None)
+def load_template(path: Path) -> CompiledTemplate:
+    """读取并编译模板，进程内按路径缓存"""
+    with open(path, "r", encoding="utf-8") as f:
+        return CompiledTemplate(f.read())
+
+
+@lru_cache(maxsize=None)
+def load_site_template(path: Path) -> tuple:
+    """
+    读取模板，内联样式抽为共享样式表、静态部分去掉多余空白后编译，进程内按路径缓存
+
+    Returns:
+        tuple: (CompiledTemplate, 样式表相对路径, 样式表内容)，样式表以模板文件名去掉 -template 命名
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    text, css_path, css = extract_stylesheet(text, Path(path).stem.removesuffix("-template"))
+    return CompiledTemplate(minify_html(text)), css_path, css
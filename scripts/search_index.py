@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+热搜全文检索
+按归一化标题的字符二元组（bigram）建立倒排索引，中文标题不需要分词；报告中 Claude 分析的摘要、
+要点和商业价值也一并索引。索引从快照库增量生成（记录已处理到的快照和报告），
+保存在 .cache/search.db，丢失后下一次更新会从快照库自动重建。
+
+同时导出静态 JSON 分片，供 index.html 在浏览器中按标题检索:
+    docs/search/meta.json          # 分片参数
+    docs/search/grams-00.json      # 已封存标题的倒排表，按 bigram 哈希分为 GRAM_SHARDS 片
+    docs/search/grams-head.json    # 之后新增标题的倒排表，超过 HEAD_LIMIT 个时并入哈希分片
+    docs/search/titles-0.json      # 标题记录，每 TITLE_BLOCK 个 id 一片
+新标题只改写 grams-head.json 和所在的标题分片，哈希分片很少变化。
+
+用法:
+    python scripts/search_index.py update            # 增量更新索引并导出分片
+    python scripts/search_index.py rebuild           # 删除索引后全量重建
+    python scripts/search_index.py query 某明星      # 某个人名/品牌的上榜记录，最近的在前
+    python scripts/search_index.py stats
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from analysis_cache import normalize_title
+from report_index import INDEX_BROTLI_QUALITY
+from snapshot_store import SnapshotStore
+from static_site import write_static
+
+SEARCH_DB = Path(os.environ.get("SEARCH_DB", ".cache/search.db"))
+SEARCH_DIR = "search"
+SEARCH_VERSION = 1
+GRAM_SHARDS = 64
+TITLE_BLOCK = 512
+HEAD_LIMIT = 2048  # grams-head.json 中的标题数上限
+ANALYSIS_FIELDS = ("summary", "key_points", "commercial")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_titles (
+    id INTEGER PRIMARY KEY,
+    norm TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    appearances INTEGER NOT NULL,
+    best_rank INTEGER NOT NULL,
+    peak_hot INTEGER NOT NULL,
+    report TEXT,
+    report_time TEXT,
+    summary TEXT,
+    analysis TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS search_postings (
+    gram TEXT NOT NULL,
+    title_id INTEGER NOT NULL REFERENCES search_titles (id),
+    in_title INTEGER NOT NULL,
+    PRIMARY KEY (gram, title_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS search_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def bigrams(text: str) -> set:
+    """已归一化文本的字符二元组，多行文本不跨行"""
+    return {line[i:i + 2] for line in text.split("\n") for i in range(len(line) - 1)}
+
+
+def gram_shard(gram: str) -> int:
+    """bigram 所在的哈希分片（index.html 中的脚本用同样的算法）"""
+    return (ord(gram[0]) * 31 + ord(gram[1])) % GRAM_SHARDS
+
+
+def analysis_text(item: dict) -> str:
+    """单条分析中可检索的文本，每个字段归一化后一行"""
+    parts = []
+    for field in ANALYSIS_FIELDS:
+        value = item.get(field)
+        parts.extend(value if isinstance(value, list) else [value])
+    return "\n".join(filter(None, (normalize_title(str(p)) for p in parts if p)))
+
+
+def _json_text(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+class _TitleIds(dict):
+    """归一化标题 -> id，按需从库中查询（增量更新时不必载入全部标题）"""
+
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+
+    def __missing__(self, norm):
+        row = self.conn.execute("SELECT id FROM search_titles WHERE norm = ?", (norm,)).fetchone()
+        if row is None:
+            raise KeyError(norm)
+        self[norm] = row[0]
+        return row[0]
+
+    def get(self, norm, default=None):
+        try:
+            return self[norm]
+        except KeyError:
+            return default
+
+
+class SearchIndex:
+    """
+    标题倒排索引
+
+    search_titles 每个归一化标题一行，记录首次/最近上榜时间、上榜次数、最高排名和最近一份报告；
+    search_postings 为 bigram -> 标题 id，in_title 区分标题和分析文本中的 bigram。
+    """
+
+    def __init__(self, path: Path = SEARCH_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _state(self, key: str) -> int:
+        row = self.conn.execute("SELECT value FROM search_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def update(self, store: SnapshotStore) -> dict:
+        """
+        索引快照库中上次更新之后新增的快照和报告
+
+        Returns:
+            dict: {"snapshots": 新快照数, "reports": 新报告数, "titles": 新标题数, "touched": 有改动的标题 id 集合}
+        """
+        ids = _TitleIds(self.conn)
+        (first_new_id,) = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM search_titles").fetchone()
+        norms = {}  # 新标题 id -> 归一化标题
+        seen = {}   # id -> [标题, 首次, 最近, 次数, 最高排名, 最高热度]，本轮新增的部分
+        last_snapshot = self._state("snapshot")
+        snapshots = 0
+        for snapshot_id, fetch_time, rank, title, hot_value in store.iter_items_after(last_snapshot):
+            if snapshot_id != last_snapshot:
+                last_snapshot = snapshot_id
+                snapshots += 1
+            norm = normalize_title(title)
+            if not norm:
+                continue
+            title_id = ids.get(norm)
+            if title_id is None:
+                title_id = ids[norm] = first_new_id + len(norms)
+                norms[title_id] = norm
+            stat = seen.get(title_id)
+            if stat is None:
+                seen[title_id] = [title, fetch_time, fetch_time, 1, rank, hot_value]
+                continue
+            if fetch_time >= stat[2]:
+                stat[0], stat[2] = title, fetch_time
+            stat[1] = min(stat[1], fetch_time)
+            stat[3] += 1
+            stat[4] = min(stat[4], rank)
+            stat[5] = max(stat[5], hot_value)
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO search_titles (id, norm, title, first_seen, last_seen, appearances, best_rank, peak_hot) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(title_id, norm, *seen[title_id]) for title_id, norm in norms.items()],
+            )
+            # UPDATE 中的表达式都取更新前的值
+            self.conn.executemany(
+                "UPDATE search_titles SET title = CASE WHEN ? >= last_seen THEN ? ELSE title END, "
+                "first_seen = MIN(first_seen, ?), last_seen = MAX(last_seen, ?), appearances = appearances + ?, "
+                "best_rank = MIN(best_rank, ?), peak_hot = MAX(peak_hot, ?) WHERE id = ?",
+                [(last, title, first, last, count, best, peak, title_id)
+                 for title_id, (title, first, last, count, best, peak) in seen.items() if title_id not in norms],
+            )
+            # 按主键顺序插入，重建时比随机顺序快得多
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO search_postings VALUES (?, ?, 1)",
+                sorted((gram, title_id) for title_id, norm in norms.items() for gram in bigrams(norm)),
+            )
+
+            touched = set(seen)
+            last_report = self._state("report")
+            reports = 0
+            for seq, report in store.iter_reports_after(last_report):
+                touched |= self._add_report(report, ids)
+                last_report = seq
+                reports += 1
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO search_state VALUES (?, ?)",
+                [("snapshot", last_snapshot), ("report", last_report)],
+            )
+        return {"snapshots": snapshots, "reports": reports, "titles": len(norms), "touched": touched}
+
+    def _add_report(self, report: dict, ids: "_TitleIds") -> set:
+        """把报告关联到其快照中的标题，并索引报告中的分析文本，返回关联到的标题 id"""
+        fetch_time = report["fetch_time"]
+        path = str(Path(report["output_dir"]) / f"{report['name']}.html")
+        members = {ids.get(normalize_title(title)) for title in report["data"].titles} - {None}
+        self.conn.executemany(
+            "UPDATE search_titles SET report = ?, report_time = ? "
+            "WHERE id = ? AND (report_time IS NULL OR report_time <= ?)",
+            [(path, fetch_time, title_id, fetch_time) for title_id in members],
+        )
+
+        for item in report["analysis"].get("analyses", []):
+            title_id = ids.get(normalize_title(item.get("title") or ""))
+            text = analysis_text(item)
+            if title_id is None or not text:
+                continue
+            (existing,) = self.conn.execute("SELECT analysis FROM search_titles WHERE id = ?", (title_id,)).fetchone()
+            # 同一话题的分析常被缓存复用，内容相同时不重复累加
+            if text not in existing:
+                self.conn.execute(
+                    "UPDATE search_titles SET analysis = ?, summary = ? WHERE id = ?",
+                    (f"{existing}\n{text}" if existing else text, item.get("summary"), title_id),
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO search_postings VALUES (?, ?, 0)",
+                    [(gram, title_id) for gram in bigrams(text)],
+                )
+        return members
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        检索标题或分析中包含 query（归一化后）的话题
+
+        Returns:
+            list: [{"title", "first_seen", "last_seen", "appearances", "best_rank", "peak_hot",
+                    "report", "summary", "in_title"}]，标题命中的在前，各自按最近上榜时间倒序
+        """
+        text = normalize_title(query)
+        if not text:
+            return []
+        # 倒排表取各 bigram 的交集作为候选（单字没有 bigram，扫描全部标题），
+        # bigram 都命中不代表连续出现，再用 instr 逐条确认
+        grams = sorted(bigrams(text))
+        candidates = ""
+        if grams:
+            candidates = "id IN (" + " INTERSECT ".join(["SELECT title_id FROM search_postings WHERE gram = ?"] * len(grams)) + ") AND "
+        rows = self.conn.execute(
+            "SELECT title, first_seen, last_seen, appearances, best_rank, peak_hot, report, summary, "
+            f"instr(norm, ?) > 0 AS in_title FROM search_titles WHERE {candidates}"
+            "(instr(norm, ?) > 0 OR instr(analysis, ?) > 0) ORDER BY in_title DESC, last_seen DESC LIMIT ?",
+            (text, *grams, text, text, limit),
+        )
+        return [
+            {
+                "title": title,
+                "first_seen": first,
+                "last_seen": last,
+                "appearances": count,
+                "best_rank": best,
+                "peak_hot": peak,
+                "report": report,
+                "summary": summary,
+                "in_title": bool(in_title),
+            }
+            for title, first, last, count, best, peak, report, summary, in_title in rows
+        ]
+
+    def export(self, output_dir: Path, touched: set = None) -> int:
+        """
+        导出静态分片到 output_dir/search/，返回改写的文件数
+
+        Args:
+            touched: 本轮有改动的标题 id，只重写它们所在的标题分片；None 时全部重写。
+                     未封存的标题超过 HEAD_LIMIT 个或分片参数变化时全部重写
+        """
+        output_dir = Path(output_dir)
+        search_dir = output_dir / SEARCH_DIR
+        (total,) = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM search_titles").fetchone()
+        try:
+            meta = json.loads((search_dir / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        full = (
+            touched is None
+            or (meta.get("version"), meta.get("shards"), meta.get("block")) != (SEARCH_VERSION, GRAM_SHARDS, TITLE_BLOCK)
+            or not 0 <= total - meta.get("sealed", 0) <= HEAD_LIMIT
+        )
+        sealed = total if full else meta["sealed"]
+        written = 0
+
+        if full:
+            shards = [{} for _ in range(GRAM_SHARDS)]
+            for title_id, norm in self.conn.execute("SELECT id, norm FROM search_titles ORDER BY id"):
+                for gram in bigrams(norm):
+                    shards[gram_shard(gram)].setdefault(gram, []).append(title_id)
+            for k, postings in enumerate(shards):
+                written += self._write(search_dir / f"grams-{k:02d}.json", postings)
+            blocks = range(total // TITLE_BLOCK + 1)
+        else:
+            blocks = sorted({title_id // TITLE_BLOCK for title_id in touched})
+
+        head = {}
+        for title_id, norm in self.conn.execute("SELECT id, norm FROM search_titles WHERE id > ? ORDER BY id", (sealed,)):
+            for gram in bigrams(norm):
+                head.setdefault(gram, []).append(title_id)
+        written += self._write(search_dir / "grams-head.json", head)
+
+        for block in blocks:
+            records = {}
+            for title_id, title, first, last, count, best, report in self.conn.execute(
+                "SELECT id, title, first_seen, last_seen, appearances, best_rank, report FROM search_titles "
+                "WHERE id >= ? AND id < ?", (block * TITLE_BLOCK, (block + 1) * TITLE_BLOCK),
+            ):
+                # 只链接到与索引页同目录的报告
+                link = Path(report).name if report and Path(report).parent == output_dir else None
+                records[title_id] = [title, last[:16], first[:16], count, best, link]
+            written += self._write(search_dir / f"titles-{block}.json", records)
+
+        meta = {"version": SEARCH_VERSION, "shards": GRAM_SHARDS, "block": TITLE_BLOCK, "sealed": sealed, "titles": total}
+        written += self._write(search_dir / "meta.json", meta)
+        return written
+
+    @staticmethod
+    def _write(path: Path, obj) -> bool:
+        return write_static(path, _json_text(obj), INDEX_BROTLI_QUALITY)
+
+    def stats(self) -> dict:
+        (titles,) = self.conn.execute("SELECT COUNT(*) FROM search_titles").fetchone()
+        (postings,) = self.conn.execute("SELECT COUNT(*) FROM search_postings").fetchone()
+        return {"titles": titles, "postings": postings,
+                "snapshot": self._state("snapshot"), "report": self._state("report")}
+
+
+def update_search_index(output_dir: Path):
+    """增量更新检索索引并导出 output_dir/search/ 分片"""
+    with SnapshotStore() as store, SearchIndex() as index:
+        result = index.update(store)
+        written = index.export(output_dir, result["touched"])
+    print(f"🔎 更新检索索引: 新快照 {result['snapshots']}，新报告 {result['reports']}，"
+          f"新话题 {result['titles']}，改写分片 {written} 个")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "update":
+        update_search_index(Path("docs"))
+    elif command == "rebuild":
+        SEARCH_DB.unlink(missing_ok=True)
+        with SnapshotStore() as store, SearchIndex() as index:
+            result = index.update(store)
+            written = index.export(Path("docs"))
+        print(f"🔁 重建检索索引: {result['snapshots']} 个快照，{result['titles']} 个话题，写入分片 {written} 个")
+    elif command == "query" and len(sys.argv) > 2:
+        query = " ".join(sys.argv[2:])
+        with SearchIndex() as index:
+            start = time.perf_counter()
+            results = index.search(query)
+            elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔎 {query}: {len(results)} 个话题（{elapsed:.1f} ms）")
+        for r in results:
+            where = "" if r["in_title"] else "  [分析中提及]"
+            print(f"{r['last_seen']}  最高 #{r['best_rank']:<3d} 上榜 {r['appearances']:>4d} 次  {r['title']}{where}")
+            if r["report"]:
+                print(f"{'':21s}{r['report']}")
+    elif command == "stats":
+        with SearchIndex() as index:
+            s = index.stats()
+        print(f"🔎 {SEARCH_DB}: {s['titles']} 个话题 / {s['postings']} 条倒排记录")
+        print(f"   已索引到快照 #{s['snapshot']}，报告序号 {s['report']}")
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+热搜快照存储
+每次抓取的完整 Top 50 追加写入 SQLite，支持按时间范围和按标题查询
+
+SQLite 库（.cache/weibo-hot.db）只是查询用的缓存，不提交到仓库：每次写入同时追加一行 JSON 到
+data/snapshots/YYYY-MM.jsonl（按快照时间分月，只追加不改写，git 历史只随新增的行增长）。
+打开快照库时回放日志中库里还没有的记录，缓存丢失时从日志完整重建。
+快照 id 只在本地库中有效：日志中的快照以 (fetch_time, source) 标识，报告也按这两项引用快照，
+缓存过期或两次运行并发写入时 id 可能重复，但不会因此丢失快照。
+
+用法:
+    python scripts/snapshot_store.py stats
+    python scripts/snapshot_store.py range 7          # 最近 7 天的快照
+    python scripts/snapshot_store.py title <话题标题>  # 某个话题的历史排名
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 热搜条目的紧凑表示与获取脚本共用（is_hot / is_new / is_fei 的位字段即 items.flags）
+sys.path.insert(0, str(Path(__file__).parent.parent / ".agent" / "skills" / "weibo-hot-analyzer" / "scripts"))
+
+from hot_items import HotSnapshot, as_snapshot
+
+SNAPSHOT_DB = Path(os.environ.get("SNAPSHOT_DB", ".cache/weibo-hot.db"))
+SNAPSHOT_JOURNAL_DIR = Path(os.environ.get("SNAPSHOT_JOURNAL_DIR", "data/snapshots"))
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 由旧 Markdown 报告导入的快照（backfill_reports.py --import-md）只有 Top 10 且排名近似，
+# 不与实时抓取的 Top 50 快照互相比较：上一次快照、最新快照和热度窗口只在同一类快照中查找
+IMPORT_SOURCE = "import"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    fetch_time TEXT NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_fetch_time ON snapshots (fetch_time);
+
+CREATE TABLE IF NOT EXISTS items (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    rank INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    hot_value INTEGER NOT NULL,
+    category TEXT,
+    url TEXT,
+    label TEXT,
+    flags INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (snapshot_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_items_title ON items (title, snapshot_id);
+
+CREATE TABLE IF NOT EXISTS reports (
+    name TEXT PRIMARY KEY,
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    output_dir TEXT NOT NULL,
+    analysis TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_snapshot ON reports (snapshot_id);
+
+-- 各日志文件已回放到的字节位置
+CREATE TABLE IF NOT EXISTS journal_files (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+# 报告及其快照（iter_reports / get_report 共用）
+REPORT_QUERY = (
+    "SELECT r.name, r.output_dir, r.analysis, s.id, s.fetch_time FROM reports r "
+    "JOIN snapshots s ON s.id = r.snapshot_id"
+)
+
+
+class SnapshotStore:
+    """
+    追加写入的快照库，只有 INSERT 没有 UPDATE/DELETE
+
+    查询方法均为生成器，按游标逐条读取，不会一次性加载全部历史；
+    每次快照的条目读取为按列保存的 HotSnapshot。journal_dir 为 None 时不读写日志。
+    """
+
+    def __init__(self, path: Path = SNAPSHOT_DB, journal_dir: Path = SNAPSHOT_JOURNAL_DIR):
+        self.path = Path(path)
+        self.journal_dir = Path(journal_dir) if journal_dir is not None else None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self._replay_journal()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _journal(self, fetch_time: str, record: dict):
+        """追加一行日志并记下该文件已回放到的位置，与对应的写入在同一事务中"""
+        if self.journal_dir is None:
+            return
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        path = self.journal_dir / f"{fetch_time[:7]}.jsonl"
+        with open(path, "ab") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            size = f.tell()
+        self.conn.execute("INSERT OR REPLACE INTO journal_files VALUES (?, ?)", (path.name, size))
+
+    def _find_snapshot(self, fetch_time: str, source):
+        """按 (fetch_time, source) 查找快照 id，不存在时返回 None"""
+        row = self.conn.execute(
+            "SELECT id FROM snapshots WHERE fetch_time = ? AND source IS ? ORDER BY id LIMIT 1",
+            (fetch_time, source),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _insert_snapshot(self, fetch_time: str, source, items: HotSnapshot) -> tuple:
+        """
+        写入快照及其条目，id 由本地库分配；同一时间、同一数据源的快照已存在时不重复写入
+
+        Returns:
+            tuple: (快照 id, 是否为新写入)
+        """
+        snapshot_id = self._find_snapshot(fetch_time, source)
+        if snapshot_id is not None:
+            return snapshot_id, False
+        cur = self.conn.execute("INSERT INTO snapshots (fetch_time, source) VALUES (?, ?)", (fetch_time, source))
+        self.conn.executemany(
+            "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(cur.lastrowid, *row) for row in items.rows()],
+        )
+        return cur.lastrowid, True
+
+    def _replay_journal(self):
+        """回放日志中库里还没有的记录（快照按 (fetch_time, source)、报告按名称去重，重复回放没有影响）"""
+        if self.journal_dir is None or not self.journal_dir.is_dir():
+            return
+        applied = dict(self.conn.execute("SELECT name, size FROM journal_files"))
+        replayed = 0
+        for path in sorted(self.journal_dir.glob("*.jsonl")):
+            offset = applied.get(path.name, 0)
+            size = path.stat().st_size
+            if size == offset:
+                continue
+            if size < offset:  # 文件被改写过（如 git 回退），从头回放
+                offset = 0
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            end = data.rfind(b"\n") + 1  # 只回放完整的行
+            with self.conn:
+                for line in data[:end].splitlines():
+                    if line.strip():
+                        self._apply(json.loads(line))
+                        replayed += 1
+                self.conn.execute("INSERT OR REPLACE INTO journal_files VALUES (?, ?)", (path.name, offset + end))
+        if replayed:
+            print(f"🔁 从 {self.journal_dir} 回放 {replayed} 条快照记录")
+
+    def _apply(self, record: dict):
+        """
+        回放一行日志
+
+        Raises:
+            ValueError: 报告引用的快照不在日志中
+        """
+        if "report" in record:
+            snapshot_id = self._find_snapshot(record["fetch_time"], record["source"])
+            if snapshot_id is None:
+                raise ValueError(f"报告 {record['report']} 引用的快照 {record['fetch_time']} "
+                                 f"[{record['source']}] 不在日志中")
+            self.conn.execute(
+                "INSERT OR IGNORE INTO reports VALUES (?, ?, ?, ?)",
+                (record["report"], snapshot_id, record["output_dir"],
+                 json.dumps(record["analysis"], ensure_ascii=False)),
+            )
+        else:
+            self._insert_snapshot(record["fetch_time"], record["source"], HotSnapshot.from_rows(record["items"]))
+
+    def append(self, result: dict) -> int:
+        """写入一次抓取结果（fetch_weibo_hot_search 的返回值，data 为 HotSnapshot 或 dict 列表），返回快照 id"""
+        items = as_snapshot(result["data"])
+        fetch_time, source = result["fetch_time"], result.get("source")
+        with self.conn:
+            snapshot_id, created = self._insert_snapshot(fetch_time, source, items)
+            if created:
+                # 与默认链接相同的 url 记为 null
+                rows = [list(row) for row in zip(items.ranks, items.titles, items.hot_values, items.categories,
+                                                  items.urls, items.labels, items.flags)]
+                self._journal(fetch_time, {"fetch_time": fetch_time, "source": source, "items": rows})
+        return snapshot_id
+
+    def save_report(self, name: str, snapshot_id: int, output_dir, analysis: dict):
+        """记录某个快照生成的报告及其 Claude 分析，用于之后重新渲染"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO reports VALUES (?, ?, ?, ?)",
+                (name, snapshot_id, str(output_dir), json.dumps(analysis, ensure_ascii=False)),
+            )
+            fetch_time, source = self.conn.execute(
+                "SELECT fetch_time, source FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+            self._journal(fetch_time, {"report": name, "fetch_time": fetch_time, "source": source,
+                                       "output_dir": str(output_dir), "analysis": analysis})
+
+    def has_report(self, name: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM reports WHERE name = ?", (name,)).fetchone() is not None
+
+    def _report(self, row):
+        if row is None:
+            return None
+        name, output_dir, analysis, snapshot_id, fetch_time = row
+        return {
+            "name": name,
+            "snapshot_id": snapshot_id,
+            "output_dir": output_dir,
+            "fetch_time": fetch_time,
+            "data": self._load_items(snapshot_id),
+            "analysis": json.loads(analysis),
+        }
+
+    def iter_reports(self, since: str = None, until: str = None):
+        """
+        按时间顺序遍历 [since, until) 范围内生成过报告的快照
+
+        Yields:
+            dict: {"name", "snapshot_id", "output_dir", "fetch_time", "data": HotSnapshot, "analysis": {...}}
+        """
+        sql = REPORT_QUERY
+        clauses, params = [], []
+        if since:
+            clauses.append("s.fetch_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("s.fetch_time < ?")
+            params.append(until)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY s.fetch_time, r.name"
+
+        for row in self.conn.cursor().execute(sql, params):
+            yield self._report(row)
+
+    def iter_reports_after(self, seq: int = 0):
+        """
+        按写入顺序遍历 seq 之后保存的报告（reports 表只追加，rowid 即写入序号），用于增量处理
+
+        Yields:
+            tuple: (序号, 报告，结构同 iter_reports)
+        """
+        sql = REPORT_QUERY.replace("SELECT ", "SELECT r.rowid, ", 1) + " WHERE r.rowid > ? ORDER BY r.rowid"
+        for row in self.conn.cursor().execute(sql, (seq,)):
+            yield row[0], self._report(row[1:])
+
+    def get_report(self, name: str = None):
+        """按名称读取报告（结构同 iter_reports），name 为空时取最新一份，不存在时返回 None"""
+        if name:
+            row = self.conn.execute(REPORT_QUERY + " WHERE r.name = ?", (name,)).fetchone()
+        else:
+            row = self.conn.execute(REPORT_QUERY + " ORDER BY s.fetch_time DESC, r.name DESC LIMIT 1").fetchone()
+        return self._report(row)
+
+    def _load_items(self, snapshot_id: int) -> HotSnapshot:
+        rows = self.conn.execute(
+            "SELECT rank, title, hot_value, category, url, label, flags "
+            "FROM items WHERE snapshot_id = ? ORDER BY rank",
+            (snapshot_id,),
+        )
+        return HotSnapshot.from_rows(rows)
+
+    def iter_snapshots(self, since: str = None, until: str = None):
+        """
+        按时间顺序遍历 [since, until) 范围内的快照
+
+        Yields:
+            dict: {"id", "fetch_time", "source", "data": HotSnapshot}
+        """
+        sql = "SELECT id, fetch_time, source FROM snapshots"
+        clauses, params = [], []
+        if since:
+            clauses.append("fetch_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("fetch_time < ?")
+            params.append(until)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY fetch_time, id"
+
+        # 独立游标遍历快照，避免与读取条目的查询互相干扰
+        for snapshot_id, fetch_time, source in self.conn.cursor().execute(sql, params):
+            yield {
+                "id": snapshot_id,
+                "fetch_time": fetch_time,
+                "source": source,
+                "data": self._load_items(snapshot_id),
+            }
+
+    def iter_items_after(self, snapshot_id: int = 0):
+        """
+        按快照 id 顺序遍历 snapshot_id 之后的全部条目，单次查询，用于增量建立索引
+
+        Yields:
+            tuple: (snapshot_id, fetch_time, rank, title, hot_value)
+        """
+        yield from self.conn.cursor().execute(
+            "SELECT s.id, s.fetch_time, i.rank, i.title, i.hot_value FROM snapshots s "
+            "JOIN items i ON i.snapshot_id = s.id WHERE s.id > ? ORDER BY s.id, i.rank",
+            (snapshot_id,),
+        )
+
+    def iter_recent(self, days: float):
+        """遍历最近 days 天的快照"""
+        since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+        return self.iter_snapshots(since=since)
+
+    def _snapshot(self, row):
+        if row is None:
+            return None
+        return {"id": row[0], "fetch_time": row[1], "source": row[2], "data": self._load_items(row[0])}
+
+    def get(self, snapshot_id: int):
+        """按 id 读取快照，不存在时返回 None"""
+        return self._snapshot(self.conn.execute(
+            "SELECT id, fetch_time, source FROM snapshots WHERE id = ?", (snapshot_id,)
+        ).fetchone())
+
+    def latest(self):
+        """返回最新一次实时抓取的快照（不含导入的快照），没有时返回 None"""
+        return self._snapshot(self.conn.execute(
+            "SELECT id, fetch_time, source FROM snapshots WHERE source IS NOT ? "
+            "ORDER BY fetch_time DESC, id DESC LIMIT 1",
+            (IMPORT_SOURCE,),
+        ).fetchone())
+
+    def recent(self, n: int) -> list:
+        """最近 n 次实时抓取的快照（不含导入的快照），最新的在前"""
+        rows = self.conn.execute(
+            "SELECT id, fetch_time, source FROM snapshots WHERE source IS NOT ? "
+            "ORDER BY fetch_time DESC, id DESC LIMIT ?",
+            (IMPORT_SOURCE, n),
+        ).fetchall()
+        return [self._snapshot(row) for row in rows]
+
+    def previous(self, snapshot_id: int):
+        """某次快照的上一次同类快照（实时抓取或导入），没有时返回 None"""
+        return self._snapshot(self.conn.execute(
+            "SELECT p.id, p.fetch_time, p.source FROM snapshots s JOIN snapshots p "
+            "ON (p.fetch_time, p.id) < (s.fetch_time, s.id) "
+            "AND (p.source IS ?) = (s.source IS ?) WHERE s.id = ? "
+            "ORDER BY p.fetch_time DESC, p.id DESC LIMIT 1",
+            (IMPORT_SOURCE, IMPORT_SOURCE, snapshot_id),
+        ).fetchone())
+
+    def hot_value_window(self, size: int, until_id: int = None):
+        """
+        截至某次快照（默认最新一次实时抓取的快照）的最近 size 次同类快照中每条热搜的热度，按时间顺序
+
+        Yields:
+            tuple: (snapshot_id, fetch_time, title, hot_value)
+        """
+        if until_id is None:
+            sql = "SELECT id, fetch_time FROM snapshots WHERE source IS NOT ?"
+            params = [IMPORT_SOURCE]
+        else:
+            sql = (
+                "SELECT p.id, p.fetch_time FROM snapshots s JOIN snapshots p "
+                "ON (p.fetch_time, p.id) <= (s.fetch_time, s.id) AND (p.source IS ?) = (s.source IS ?) WHERE s.id = ?"
+            )
+            params = [IMPORT_SOURCE, IMPORT_SOURCE, until_id]
+        sql += " ORDER BY 2 DESC, 1 DESC LIMIT ?"
+        params.append(size)
+        yield from self.conn.execute(
+            f"WITH w AS ({sql}) SELECT w.id, w.fetch_time, i.title, i.hot_value "
+            "FROM w JOIN items i ON i.snapshot_id = w.id ORDER BY w.fetch_time, w.id, i.rank",
+            params,
+        )
+
+    def title_history(self, title: str, since: str = None):
+        """
+        按时间顺序返回某个话题出现过的记录
+
+        Yields:
+            tuple: (fetch_time, rank, hot_value)
+        """
+        sql = (
+            "SELECT s.fetch_time, i.rank, i.hot_value FROM items i "
+            "JOIN snapshots s ON s.id = i.snapshot_id WHERE i.title = ?"
+        )
+        params = [title]
+        if since:
+            sql += " AND s.fetch_time >= ?"
+            params.append(since)
+        sql += " ORDER BY s.fetch_time, s.id"
+        yield from self.conn.execute(sql, params)
+
+    def stats(self) -> dict:
+        """快照数量、条目数量和时间范围"""
+        count, first, last = self.conn.execute(
+            "SELECT COUNT(*), MIN(fetch_time), MAX(fetch_time) FROM snapshots"
+        ).fetchone()
+        (items,) = self.conn.execute("SELECT COUNT(*) FROM items").fetchone()
+        return {"snapshots": count, "items": items, "first": first, "last": last}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    with SnapshotStore() as store:
+        if command == "stats":
+            s = store.stats()
+            print(f"📦 {store.path}: {s['snapshots']} 个快照 / {s['items']} 条热搜")
+            print(f"   时间范围: {s['first']} ~ {s['last']}")
+        elif command == "range" and len(sys.argv) > 2:
+            for snap in store.iter_recent(float(sys.argv[2])):
+                top = snap["data"][0]["title"] if snap["data"] else "-"
+                print(f"{snap['fetch_time']}  [{snap['source']}]  {len(snap['data'])} 条  Top1: {top}")
+        elif command == "title" and len(sys.argv) > 2:
+            for fetch_time, rank, hot_value in store.title_history(sys.argv[2]):
+                print(f"{fetch_time}  #{rank:<3d} {hot_value}")
+        else:
+            print(__doc__)
+            sys.exit(1)
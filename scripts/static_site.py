@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+静态站点输出
+报告模板中的内联样式抽为带内容哈希的共享样式表（assets/report.<hash>.css，可长期缓存），
+页面 HTML 去掉注释和多余空白，并生成 .gz / .br 预压缩副本（供 gzip_static / brotli_static 直接返回）。
+
+输出逐字节确定（gzip 头不含时间和文件名），内容不变时不改写文件，重新渲染不会产生 git 改动。
+未安装 brotli 时只生成 .gz，并删除已过期的 .br。
+
+用法:
+    python scripts/static_site.py docs       # 校验预压缩副本与原文件一致，并统计体积
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+ASSETS_DIR = "assets"
+PRECOMPRESSED_SUFFIXES = (".gz", ".br")
+PRECOMPRESS_MIN_BYTES = 256  # 更小的文件压缩后省不了多少，不生成副本
+VERIFY_PATTERNS = ("*.html", "*/*.css", "*/*.json")  # 页面、assets/ 样式表和 search/ 分片
+BROTLI_QUALITY = int(os.environ.get("STATIC_BROTLI_QUALITY", "11"))
+
+STYLE_BLOCK_RE = re.compile(r"\s*<style>(.*?)</style>", re.S)
+HTML_COMMENT_RE = re.compile(r"<!--(?!\[).*?-->", re.S)
+HTML_TOKEN_RE = re.compile(r"(<[^>]*>)")
+TAG_NAME_RE = re.compile(r"</?([a-zA-Z][a-zA-Z0-9]*)")
+TAG_SPACE_RE = re.compile(r"(\"[^\"]*\"|'[^']*')|\s+")
+CSS_TOKEN_RE = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s+", re.S)
+CSS_PUNCT_RE = re.compile(r" ?([{};,>]) ?|(:) ")
+LINE_BREAK_SPACE_RE = re.compile(r"\n\s*")
+
+# 这些标签前后的纯空白文本不影响渲染，可以直接删除；其他位置的空白压缩为一个空格
+BLOCK_TAGS = {
+    "html", "head", "body", "meta", "link", "title", "style", "script", "div", "section", "header", "footer",
+    "nav", "main", "article", "aside", "h1", "h2", "h3", "h4", "h5", "h6", "p", "ul", "ol", "li",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "path", "br", "hr",
+}
+# 内容原样保留的标签
+RAW_TEXT_TAGS = {"script", "pre", "textarea"}
+
+_brotli = None
+_brotli_checked = False
+
+
+def _brotli_module():
+    """按需导入 brotli（可选依赖），未安装时返回 None"""
+    global _brotli, _brotli_checked
+    if not _brotli_checked:
+        _brotli_checked = True
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            pass
+    return _brotli
+
+
+def _squeeze_css(code: str) -> str:
+    return CSS_PUNCT_RE.sub(lambda m: m.group(1) or m.group(2), re.sub(r" {2,}", " ", code))
+
+
+def minify_css(css: str) -> str:
+    """去掉注释，空白压缩为一个空格，并删除 { } ; , > 两侧和冒号后的空格（字符串原样保留）"""
+    out, code = [], []
+    pos = 0
+    for match in CSS_TOKEN_RE.finditer(css):
+        code.append(css[pos:match.start()])
+        if match.group(1):
+            out.append(_squeeze_css("".join(code)))
+            out.append(match.group(1))
+            code = []
+        else:
+            code.append(" ")  # 空白和注释都按一个空格处理
+        pos = match.end()
+    code.append(css[pos:])
+    out.append(_squeeze_css("".join(code)))
+    return "".join(out).replace(";}", "}").strip()
+
+
+def _minify_tag(tag: str) -> str:
+    if "\n" not in tag and "  " not in tag and not tag.endswith(" >") and not tag.endswith(" />"):
+        return tag
+    tag = TAG_SPACE_RE.sub(lambda m: m.group(1) or " ", tag)
+    return tag.replace(" >", ">").replace(" />", "/>")
+
+
+def _tag_name(tag: str) -> str:
+    match = TAG_NAME_RE.match(tag)
+    return match.group(1).lower() if match else ""
+
+
+def minify_html(html: str) -> str:
+    """
+    去掉注释和不影响渲染的空白
+
+    块级标签之间的纯空白删除，其余连续空白压缩为一个空格；<style> 内容按 CSS 压缩，
+    <script> / <pre> / <textarea> 内容原样保留。
+    """
+    tokens = HTML_TOKEN_RE.split(HTML_COMMENT_RE.sub("", html))
+    names = [_tag_name(token) if i % 2 else None for i, token in enumerate(tokens)]
+    out = []
+    raw_until = None
+    for i, token in enumerate(tokens):
+        if i % 2:  # 标签
+            name = names[i]
+            if raw_until is not None:
+                if token.startswith("</") and name == raw_until:
+                    raw_until = None
+                    out.append(_minify_tag(token))
+                else:
+                    out.append(token)
+                continue
+            out.append(_minify_tag(token))
+            if not token.startswith("</") and name in RAW_TEXT_TAGS:
+                raw_until = name
+            continue
+
+        if raw_until is not None:
+            out.append(token)
+        elif i > 0 and names[i - 1] == "style" and not tokens[i - 1].startswith("</"):
+            out.append(minify_css(token))
+        elif not token.strip():
+            previous_tag = names[i - 1] if i > 0 else "html"
+            next_tag = names[i + 1] if i + 1 < len(tokens) else "html"
+            if token and previous_tag not in BLOCK_TAGS and next_tag not in BLOCK_TAGS:
+                out.append(" ")
+        else:
+            out.append(re.sub(r"\s+", " ", token))
+    return "".join(out)
+
+
+def collapse_line_breaks(fragment: str) -> str:
+    """
+    把换行及其后的缩进压缩为一个空格，渲染结果不变
+
+    用于填入已压缩模板的动态片段：比 minify_html 保守，但只需一次正则替换。
+    """
+    return LINE_BREAK_SPACE_RE.sub(" ", fragment).strip()
+
+
+def extract_stylesheet(html: str, name: str) -> tuple:
+    """
+    把 html 中的内联 <style> 合并压缩为共享样式表，原位置替换为指向它的 <link>
+
+    Returns:
+        tuple: (替换后的 html, 样式表相对路径 assets/<name>.<hash>.css, 样式表内容)
+    """
+    blocks = STYLE_BLOCK_RE.findall(html)
+    if not blocks:
+        return html, None, None
+    css = minify_css("\n".join(blocks)) + "\n"
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:10]
+    css_path = f"{ASSETS_DIR}/{name}.{digest}.css"
+
+    first = STYLE_BLOCK_RE.search(html)
+    link = f'\n    <link rel="stylesheet" href="{css_path}">'
+    html = html[:first.start()] + link + STYLE_BLOCK_RE.sub("", html[first.end():])
+    return html, css_path, css
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 且不写文件名，同样的输入得到同样的字节
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompressed(data: bytes, brotli_quality: int = BROTLI_QUALITY) -> dict:
+    """{".gz": bytes, ".br": bytes}，未安装 brotli 时没有 .br"""
+    variants = {".gz": gzip_bytes(data)}
+    brotli = _brotli_module()
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=brotli_quality)
+    return variants
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """内容与现有文件完全一致时跳过，否则原子写入，返回是否写入"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_static(path: Path, content, brotli_quality: int = BROTLI_QUALITY) -> bool:
+    """
+    写入静态文件及其 .gz / .br 副本，返回文件本身是否改写
+
+    文件未变且副本齐全时不重新压缩；无法生成的副本（未安装 brotli）如果存在则删除，避免与原文件不一致。
+    brotli_quality: 最高级别 11 压缩几百 KB 的页面需要零点几秒，频繁重写的大页面可以调低
+    """
+    path = Path(path)
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    changed = write_if_changed(path, data)
+
+    siblings = {suffix: path.with_name(path.name + suffix) for suffix in PRECOMPRESSED_SUFFIXES}
+    if len(data) < PRECOMPRESS_MIN_BYTES:
+        variants = {}
+    elif changed or not all(p.exists() for p in siblings.values()):
+        variants = precompressed(data, brotli_quality)
+    else:
+        return changed
+    for suffix, sibling in siblings.items():
+        if suffix in variants:
+            write_if_changed(sibling, variants[suffix])
+        elif sibling.exists():
+            sibling.unlink()
+    return changed
+
+
+def verify_directory(directory: Path) -> tuple:
+    """
+    校验目录下（含 assets/ 和 search/）的预压缩副本解压后与原文件一致
+    （只校验内容：压缩结果的字节随 zlib / brotli 版本变化，换了运行环境的副本仍然有效）
+
+    Returns:
+        tuple: (原文件总字节, .gz 总字节, .br 总字节, 不一致的副本列表)
+    """
+    raw = gz = br = 0
+    mismatched = []
+    brotli = _brotli_module()
+    for path in sorted(p for pattern in VERIFY_PATTERNS for p in directory.glob(pattern)):
+        data = path.read_bytes()
+        raw += len(data)
+        gz_path = path.with_name(path.name + ".gz")
+        if gz_path.exists():
+            packed = gz_path.read_bytes()
+            gz += len(packed)
+            if gzip.decompress(packed) != data:
+                mismatched.append(gz_path)
+        br_path = path.with_name(path.name + ".br")
+        if br_path.exists():
+            packed = br_path.read_bytes()
+            br += len(packed)
+            if brotli is not None and brotli.decompress(packed) != data:
+                mismatched.append(br_path)
+    return raw, gz, br, mismatched
+
+
+def gzip_is_deterministic(data: bytes) -> bool:
+    """同一次运行中对同样的输入重复压缩得到相同字节（内容不变时不改写 .gz 依赖于此）"""
+    return gzip_bytes(data) == gzip_bytes(data)
+
+
+if __name__ == "__main__":
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("docs")
+    raw, gz, br, mismatched = verify_directory(directory)
+    print(f"📦 {directory}: 原文件 {raw / 1024:,.1f} KB，.gz {gz / 1024:,.1f} KB，.br {br / 1024:,.1f} KB")
+    if _brotli_module() is None:
+        print("ℹ️ 未安装 brotli，跳过 .br 校验")
+    for path in mismatched:
+        print(f"❌ 与原文件不一致: {path}")
+    deterministic = gzip_is_deterministic(Path(__file__).read_bytes())
+    if not deterministic:
+        print("❌ gzip 压缩结果不确定，重新渲染会改写 .gz 副本")
+    sys.exit(1 if mismatched or not deterministic else 0)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Claude 输出 token 预算
+按话题数和最近观察到的输出长度计算每次请求的 max_tokens，代替固定的 8192
+
+输出长度分为两项：与话题数无关的固定部分（完整分析和整体洞察中的 trend_insight / commercial_summary，
+见 FIXED_OUTPUT_TOKENS）和随话题数增长的部分。每种请求（完整分析 analysis / 分组分析 group / 整体洞察 summary）
+保存最近 BUDGET_WINDOW 次「扣除固定部分后每个话题的输出 token 数」，
+预算 = (固定部分 + 最近最大值 × 话题数) × TOKEN_HEADROOM，限制在 [MIN_MAX_TOKENS, MAX_MAX_TOKENS]；
+还没有观察记录时使用 MAX_MAX_TOKENS。响应因达到 max_tokens 被截断时实际需要的长度未知，按当次预算的两倍记录。
+
+用法:
+    python scripts/token_budget.py        # 查看各类请求的观察记录和当前预算
+"""
+
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+TOKEN_BUDGET_STATE = os.environ.get("ANTHROPIC_TOKEN_BUDGET_STATE", ".cache/token-budget.json")
+BUDGET_WINDOW = 20
+TOKEN_HEADROOM = float(os.environ.get("ANTHROPIC_TOKEN_HEADROOM", "1.5"))
+MIN_MAX_TOKENS = 512
+MAX_MAX_TOKENS = int(os.environ.get("ANTHROPIC_MAX_TOKENS", "8192"))
+# 每次请求与话题数无关的输出 token 数（trend_insight + commercial_summary 各一句话及 JSON 结构）
+FIXED_OUTPUT_TOKENS = {"analysis": 256, "group": 0, "summary": 256}
+
+
+class TokenBudget:
+    """各类请求的输出长度记录，path 为空时只在内存中保存（守护进程各轮之间仍然有效）"""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else None
+        self.records = {}
+        if self.path is not None:
+            try:
+                self.records = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+
+    def max_tokens(self, kind: str, topics: int) -> int:
+        """kind 类请求分析 topics 个话题时的 max_tokens（整体洞察与话题数无关，传 1）"""
+        recent = self.records.get(kind)
+        if not recent:
+            return MAX_MAX_TOKENS
+        fixed = FIXED_OUTPUT_TOKENS.get(kind, 0)
+        budget = math.ceil((fixed + max(recent) * max(topics, 1)) * TOKEN_HEADROOM)
+        return min(max(budget, MIN_MAX_TOKENS), MAX_MAX_TOKENS)
+
+    def observe(self, kind: str, topics: int, output_tokens: int, max_tokens: int, truncated: bool = False):
+        """记录一次请求的输出长度；truncated 为 stop_reason == "max_tokens"（截断时 output_tokens 不可靠）"""
+        used = max_tokens * 2 if truncated else output_tokens
+        if not used:
+            return
+        per_topic = round(max(used - FIXED_OUTPUT_TOKENS.get(kind, 0), 0) / max(topics, 1), 1)
+        self.records[kind] = (self.records.get(kind, []) + [per_topic])[-BUDGET_WINDOW:]
+
+    def save(self):
+        """原子写回 path；写入失败只打印警告"""
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(self.records, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ token 预算记录保存失败: {e}")
+
+
+if __name__ == "__main__":
+    budget = TokenBudget(sys.argv[1] if len(sys.argv) > 1 else TOKEN_BUDGET_STATE)
+    if not budget.records:
+        print(f"ℹ️ 还没有观察记录，max_tokens 使用上限 {MAX_MAX_TOKENS}")
+    for kind, recent in sorted(budget.records.items()):
+        topics = 1 if kind == "summary" else 10
+        print(f"📏 {kind:<8s} 最近 {len(recent)} 次  固定 {FIXED_OUTPUT_TOKENS.get(kind, 0)} + "
+              f"每话题 {min(recent)}~{max(recent)} tokens  "
+              f"{topics} 个话题的预算 {budget.max_tokens(kind, topics)}")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+近似重复话题聚类
+同一事件常以多个标题变体同时上榜（人名 + 不同后缀），用字符 n-gram 的 MinHash 签名
+和 LSH 分桶找出候选对，再用精确 Jaccard 相似度确认，避免两两比较全部标题
+
+用法:
+    python scripts/topic_cluster.py 标题1 标题2 ...     # 查看一组标题的聚类结果
+"""
+
+import os
+import random
+import sys
+import zlib
+
+from analysis_cache import normalize_title
+
+CLUSTER_THRESHOLD = float(os.environ.get("CLUSTER_THRESHOLD", "0.4"))  # Jaccard 相似度阈值
+NGRAM = 2
+NUM_PERM = 64
+BANDS = 32  # 每段 NUM_PERM // BANDS 行；候选阈值约 (1/BANDS)^(BANDS/NUM_PERM)
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(20260118)
+_PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(title: str, n: int = NGRAM) -> frozenset:
+    """归一化标题的字符 n-gram 集合，标题短于 n 时取整个标题"""
+    text = normalize_title(title)
+    if len(text) <= n:
+        return frozenset([text])
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def minhash(grams: frozenset) -> tuple:
+    """NUM_PERM 个 (a*x + b) mod p 哈希下的最小值"""
+    hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+    return tuple(
+        min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def cluster_titles(titles: list, threshold: float = CLUSTER_THRESHOLD) -> list:
+    """
+    对标题做近似重复聚类
+
+    Returns:
+        list: 每个簇为标题下标列表，簇内和簇间都按下标升序
+    """
+    grams = [shingles(t) for t in titles]
+    rows = NUM_PERM // BANDS
+    parent = list(range(len(titles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    checked = set()
+    for i, g in enumerate(grams):
+        signature = minhash(g)
+        for band in range(BANDS):
+            key = (band, signature[band * rows:(band + 1) * rows])
+            for j in buckets.setdefault(key, []):
+                if (j, i) in checked:
+                    continue
+                checked.add((j, i))
+                if find(i) != find(j) and jaccard(grams[i], grams[j]) >= threshold:
+                    parent[max(find(i), find(j))] = min(find(i), find(j))
+            buckets[key].append(i)
+
+    clusters = {}
+    for i in range(len(titles)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values())
+
+
+def cluster_topics(topics: list, threshold: float = CLUSTER_THRESHOLD) -> list:
+    """
+    合并近似重复的热搜，每个簇保留排名最靠前的一条
+
+    被保留的条目是副本：hot_value 为簇内热度之和，variants 为被合并的其他标题；
+    没有被合并的条目原样返回。结果按原排名排列。
+    """
+    merged = []
+    for members in cluster_titles([t["title"] for t in topics], threshold):
+        head = topics[members[0]]
+        if len(members) == 1:
+            merged.append(head)
+            continue
+        others = [topics[i] for i in members[1:]]
+        merged.append({
+            **head,
+            "hot_value": head["hot_value"] + sum(t["hot_value"] for t in others),
+            "variants": [t["title"] for t in others],
+        })
+    return merged
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    titles = sys.argv[1:]
+    for members in cluster_titles(titles):
+        print(" | ".join(titles[i] for i in members))